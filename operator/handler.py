@@ -1,21 +1,148 @@
+"""Opérateur kopf : réconcilie les ressources ``UEAttachment`` (nexslice.io/v1).
+
+Chaque ``UEAttachment`` (``spec.ueId``) produit les mêmes objets que le
+contrôleur Flask, construits par ``src/renderer.py`` : ConfigMap et Pod UE,
+Deployment et Service UPF dédiés. Les objets portent une ownerReference vers
+le CR : sa suppression les supprime en cascade (garbage collector).
+
+    kopf run --standalone --namespace nexslice operator/handler.py
+
+Montée en charge :
+
+* les handlers sont synchrones et s'exécutent dans un pool de
+  ``OPERATOR_WORKERS`` threads ; kopf sérialise déjà les événements d'un même
+  objet, et un verrou par ``ueId`` protège les CR en doublon ;
+* les appels API passent par la passerelle partagée, limitée à
+  ``OPERATOR_API_QPS`` appels/s (rafales de ``OPERATOR_API_BURST``) ;
+* deux index en mémoire (``ueId`` → CR, ``ueId`` → UPF) évitent une lecture
+  API par UE : au redémarrage, un UPF dont l'empreinte est à jour n'est pas relu.
+"""
+import collections
+import os
+import sys
+import threading
+
 import kopf
-import kubernetes
 
-# Minimal POC operator: when a UEAttachment CR is created, create an UPF Deployment
-# This file is a scaffold and requires a CRD to be applied and operator to run in-cluster.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.k8s_gateway import get_gateway  # noqa: E402
+from src.ratelimit import TokenBucket  # noqa: E402
+from src.reconcile import SPEC_HASH_ANNOTATION, apply, spec_hash  # noqa: E402
+from src.renderer import render_ue_configmap, render_ue_pod, render_upf  # noqa: E402
+
+GROUP, VERSION, PLURAL = "nexslice.io", "v1", "ueattachments"
+
+UE_IMAGE = os.environ.get("UE_IMAGE", "gradiant/ueransim:3.2.6")
+UPF_IMAGE = os.environ.get("UPF_IMAGE", "oaisoftwarealliance/oai-upf:latest")
+try:
+    OPERATOR_WORKERS = int(os.environ.get("OPERATOR_WORKERS", "32"))
+    OPERATOR_API_QPS = float(os.environ.get("OPERATOR_API_QPS", "50"))
+    OPERATOR_API_BURST = float(os.environ.get("OPERATOR_API_BURST", "100"))
+    OPERATOR_RETRY_DELAY = float(os.environ.get("OPERATOR_RETRY_DELAY", "10"))
+except Exception:
+    OPERATOR_WORKERS, OPERATOR_API_QPS, OPERATOR_API_BURST, OPERATOR_RETRY_DELAY = 32, 50.0, 100.0, 10.0
+
+_ue_locks = collections.defaultdict(threading.Lock)
+_ue_locks_guard = threading.Lock()
+
+
+def _ue_lock(ue_id):
+    with _ue_locks_guard:
+        return _ue_locks[ue_id]
+
+
+def _ue_id(spec):
+    try:
+        ue_id = int(spec["ueId"])
+    except (KeyError, TypeError, ValueError):
+        raise kopf.PermanentError("spec.ueId doit être un entier")
+    if ue_id < 1:
+        raise kopf.PermanentError("spec.ueId doit être >= 1")
+    return ue_id
+
+
+def desired_objects(ue_id, spec, namespace):
+    """Manifestes d'un UE, dans l'ordre de création (ConfigMap, UPF, puis Pod UE)."""
+    name = f"upf-ue{ue_id}"
+    labels = {"app": "upf", "ue-id": str(ue_id)}
+    deployment, service = render_upf(name, labels, spec.get("upfImage") or UPF_IMAGE,
+                                      int(spec.get("upfReplicas", 1)))
+    objects = [
+        render_ue_configmap(ue_id),
+        deployment,
+        service,
+        render_ue_pod(ue_id, spec.get("ueImage") or UE_IMAGE),
+    ]
+    for obj in objects:
+        obj["metadata"]["namespace"] = namespace
+    return objects
+
+
+@kopf.on.startup()
+def configure(settings: kopf.OperatorSettings, **_):
+    # Nombre d'objets traités en parallèle, et threads des handlers synchrones
+    settings.batching.worker_limit = OPERATOR_WORKERS
+    settings.execution.max_workers = OPERATOR_WORKERS
+    get_gateway().limiter = TokenBucket(OPERATOR_API_QPS, OPERATOR_API_BURST)
+
+
+@kopf.index(GROUP, VERSION, PLURAL)
+def attachments_by_ue(namespace, name, spec, **_):
+    try:
+        return {int(spec["ueId"]): (namespace, name)}
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+@kopf.index("apps", "v1", "deployments", labels={"app": "upf", "ue-id": kopf.PRESENT})
+def upf_by_ue(name, labels, annotations, status, **_):
+    return {int(labels["ue-id"]): {
+        "name": name,
+        "spec_hash": annotations.get(SPEC_HASH_ANNOTATION),
+        "ready": bool((status or {}).get("readyReplicas")),
+    }}
+
+
+def _indexed_upf(upf_by_ue, ue_id):
+    for upf in upf_by_ue.get(ue_id, []):
+        return upf
+    return None
+
+
+@kopf.on.resume(GROUP, VERSION, PLURAL)
+@kopf.on.create(GROUP, VERSION, PLURAL)
+@kopf.on.update(GROUP, VERSION, PLURAL, field="spec")
+def reconcile_attachment(body, spec, name, namespace, patch, logger, attachments_by_ue, upf_by_ue, **_):
+    ue_id = _ue_id(spec)
+    others = [owner for owner in attachments_by_ue.get(ue_id, []) if owner != (namespace, name)]
+    if others:
+        raise kopf.PermanentError(f"ueId {ue_id} déjà attaché par {others[0][0]}/{others[0][1]}")
 
-@kopf.on.create('example.com', 'v1', 'ueattachments')
-def create_fn(spec, name, namespace, logger, **kwargs):
-    logger.info(f"UEAttachment created: {name} in {namespace}")
-    # Example spec fields: ueId, upfImage
-    ue_id = spec.get('ueId')
-    upf_image = spec.get('upfImage', 'free5gc/upf:latest')
+    with _ue_lock(ue_id):
+        objects = desired_objects(ue_id, spec, namespace)
+        kopf.adopt(objects, owner=body)
+        upf = _indexed_upf(upf_by_ue, ue_id)
+        actions = {}
+        for obj in objects:
+            kind = obj["kind"]
+            if kind == "Deployment" and upf is not None and upf["spec_hash"] == spec_hash(obj):
+                # Déjà à jour d'après le cache watch : pas de lecture API
+                actions[kind] = "unchanged"
+                continue
+            try:
+                actions[kind] = apply(obj, namespace=namespace)
+            except Exception as e:
+                raise kopf.TemporaryError(f"{kind} {obj['metadata']['name']}: {e}", delay=OPERATOR_RETRY_DELAY)
 
-    # Real operator would create Deployment+Service and update status
-    # For brevity, this is only a scaffold.
+    logger.info(f"UE {ue_id} réconcilié : {actions}")
+    patch.status["phase"] = "Provisioned"
+    patch.status["upf"] = f"upf-ue{ue_id}"
+    patch.status["upfReady"] = bool(upf and upf["ready"])
+    patch.status["actions"] = actions
 
-    api = kubernetes.client.AppsV1Api()
-    # Build and create deployment/service based on ue_id/upf_image
-    # ...
 
-    return {'created-upf': f'upf-ue{ue_id}'}
+@kopf.on.delete(GROUP, VERSION, PLURAL, optional=True)
+def release_attachment(spec, name, logger, **_):
+    # Pas de finalizer : les objets possédés sont supprimés en cascade par le garbage collector
+    logger.info(f"UEAttachment {name} supprimé (UE {spec.get('ueId')}) : suppression en cascade")
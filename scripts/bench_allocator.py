@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Benchmark de l'allocateur d'identités UE (identifiant, SD, sous-réseau).
+
+Réserve N identités (base d'état SQLite réelle, ou ``--no-store`` pour
+l'allocateur seul), puis simule ``--churn`` cycles déconnexion/connexion d'UE
+tirés au hasard. Mesure le débit de réservation et de libération, vérifie
+qu'aucun SD ni sous-réseau n'est attribué deux fois et que l'espace
+d'identifiants ne grossit pas, et compte les plages invalides qu'aurait
+produites l'ancien schéma ``12.1.{id}.0/24``.
+
+Usage : python scripts/bench_allocator.py [--ues 50000] [--churn 20000] [--no-store] [--out fichier.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+from bench_attach import git_commit, peak_rss_mb  # noqa: E402
+from src.allocator import IdentityAllocator  # noqa: E402
+from src.state_store import StateStore  # noqa: E402
+
+
+def run(ues, churn, store, seed):
+    allocator = IdentityAllocator(store, id_max=max(ues, 1))
+    start = time.perf_counter()
+    ids = [allocator.allocate() for _ in range(ues)]
+    allocated = time.perf_counter()
+
+    rng = random.Random(seed)
+    released_s = 0.0
+    for _ in range(churn):
+        index = rng.randrange(len(ids))
+        t = time.perf_counter()
+        allocator.release([ids[index]])
+        released_s += time.perf_counter() - t
+        ids[index] = allocator.allocate()
+    churned = time.perf_counter()
+
+    records = [allocator.identity(ue_id) for ue_id in ids]
+    stats = allocator.stats()
+    return {
+        "ues": ues,
+        "churn": churn,
+        "store": store is not None,
+        "allocate_per_s": round(ues / (allocated - start)),
+        "churn_cycles_per_s": round(churn / (churned - allocated)) if churn else None,
+        "release_us": round(released_s / churn * 1e6, 1) if churn else None,
+        "max_id": max(ids),
+        "unique_sd": len({r["sd"] for r in records}) == len(records),
+        "unique_ip_range": len({r["ip_range"] for r in records}) == len(records),
+        # Plages 12.1.{id}.0/24 invalides (id > 255) avec l'ancien schéma
+        "legacy_invalid_ranges": max(0, ues - 255),
+        "collisions": stats["collisions"],
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ues", type=int, default=50000)
+    parser.add_argument("--churn", type=int, default=20000, help="cycles libération + réservation")
+    parser.add_argument("--no-store", action="store_true", help="sans base d'état (allocateur en mémoire seul)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="fichier JSON de résultats")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    out = args.out or os.path.join(ROOT, "tmp", "bench", f"allocator-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="nexslice-bench-") as workdir:
+        store = None if args.no_store else StateStore(os.path.join(workdir, "state.db"))
+        result = run(args.ues, args.churn, store, args.seed)
+    report = {"commit": commit, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), **result}
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{result['ues']} UE : {result['allocate_per_s']} réservations/s, "
+          f"{result['churn']} cycles : {result['churn_cycles_per_s']} cycles/s "
+          f"(libération {result['release_us']} µs)")
+    print(f"identifiant max {result['max_id']}, SD uniques : {result['unique_sd']}, "
+          f"plages uniques : {result['unique_ip_range']}, collisions : {result['collisions']}, "
+          f"plages invalides avec l'ancien schéma : {result['legacy_invalid_ranges']}")
+    print(f"Résultats : {out}")
+    return 0 if result["unique_sd"] and result["unique_ip_range"] and result["max_id"] <= args.ues else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
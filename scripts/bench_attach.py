@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""Benchmark de débit attachement/détachement contre une API Kubernetes factice.
+
+Pour chaque taille (100, 1 000, 10 000 UE par défaut), une API Kubernetes
+factice (scripts/fake_k8s.py) et un SMF factice (scripts/stub_smf.py) sont
+démarrés dans ce processus, puis le contrôleur complet (informers, file de
+jobs, notifications SMF) est lancé dans un processus fils qui enchaîne :
+
+    ue_connect      POST /api/ue-connect pour chaque UE, jusqu'à la fin du job
+    ue_disconnect   POST /api/ue-disconnect pour chaque UE, jusqu'à la fin du job
+    create_pods     un POST /create_pods sur toute la plage
+    delete_pods     un POST /delete_pods sur toute la plage
+
+Pour chaque scénario : débit (UE/s), latence p50/p95/p99 par UE, appels API
+par UE (comptés par l'API factice) et mémoire résidente du contrôleur. Les
+résultats sont écrits en JSON (``--out``, par défaut
+``tmp/bench/attach-<commit>.json``) ; ``--compare`` les compare à un fichier
+précédent.
+
+Usage : python scripts/bench_attach.py [--sizes 100,1000,10000] [--latency 0.002]
+        [--error 500=0.01] [--clients 32] [--compare tmp/bench/attach-abc123.json]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+SCENARIOS = ("ue_connect", "ue_disconnect", "create_pods", "delete_pods")
+
+
+def percentile(values, pct):
+    """Percentile par rang le plus proche (``values`` triées)."""
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values) + 0.5)) - 1))
+    return round(values[index], 3)
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except OSError:
+        return None
+
+
+def peak_rss_mb():
+    # ru_maxrss est en Kio sous Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+# --- processus fils : contrôleur + scénarios -----------------------------------
+
+def _fake_stats(host):
+    import requests
+    return requests.get(f"{host}/_fake/stats", timeout=10).json()
+
+
+def _summarize(ues, duration, latencies_ms, errors, calls_before, calls_after):
+    latencies_ms = sorted(latencies_ms)
+    calls = {verb: n - calls_before["calls"].get(verb, 0) for verb, n in calls_after["calls"].items()
+             if n - calls_before["calls"].get(verb, 0) and not verb.endswith(" watch")}
+    total_calls = sum(calls.values())
+    return {
+        "ues": ues,
+        "duration_s": round(duration, 3),
+        "throughput_ues_s": round(ues / duration, 1) if duration else None,
+        "latency_ms": {"p50": percentile(latencies_ms, 50), "p95": percentile(latencies_ms, 95),
+                       "p99": percentile(latencies_ms, 99),
+                       "max": round(latencies_ms[-1], 3) if latencies_ms else None},
+        "errors": errors,
+        "api_calls": total_calls,
+        "api_calls_per_ue": round(total_calls / ues, 2) if ues else None,
+        "api_calls_by_verb": calls,
+        "rss_mb": rss_mb(),
+    }
+
+
+def run_worker(size, clients, scenarios, result_file):
+    from src import main
+
+    host = os.environ["K8S_API_HOST"]
+    app = main.create_app(start_services=True)
+    for informer in main.INFORMERS:
+        informer.wait_synced(30)
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        return local.client
+
+    def until_done(path, ue_id):
+        start = time.perf_counter()
+        resp = client().post(path, json={"ue_id": ue_id})
+        if resp.status_code != 202:
+            return time.perf_counter() - start, False
+        job = main.JOB_QUEUE.get(resp.get_json()["job_id"])
+        while job.finished_at is None:
+            time.sleep(0.002)
+        return time.perf_counter() - start, job.status == "succeeded"
+
+    def connect(ue_id):
+        return until_done("/api/ue-connect", ue_id)
+
+    def disconnect(ue_id):
+        return until_done("/api/ue-disconnect", ue_id)
+
+    def per_ue(fn):
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            outcomes = list(pool.map(fn, range(1, size + 1)))
+        return [elapsed * 1000 for elapsed, _ in outcomes], sum(1 for _, ok in outcomes if not ok)
+
+    def bulk(path):
+        resp = client().post(path, json={"start": 1, "end": size, "concurrency": clients})
+        report = resp.get_json() or {}
+        if path == "/create_pods":
+            results = report.get("results") or []
+            latencies = [sum(r["timings_ms"].values()) for r in results]
+            return latencies, sum(1 for r in results if not r["ok"])
+        return [], len(report.get("errors") or []) + (resp.status_code >= 400)
+
+    runners = {
+        "ue_connect": lambda: per_ue(connect),
+        "ue_disconnect": lambda: per_ue(disconnect),
+        "create_pods": lambda: bulk("/create_pods"),
+        "delete_pods": lambda: bulk("/delete_pods"),
+    }
+    results = {}
+    for name in scenarios:
+        before = _fake_stats(host)
+        start = time.perf_counter()
+        latencies, errors = runners[name]()
+        duration = time.perf_counter() - start
+        if name == "delete_pods":
+            latencies = [duration * 1000]
+        results[name] = _summarize(size, duration, latencies, errors, before, _fake_stats(host))
+    results["peak_rss_mb"] = peak_rss_mb()
+    with open(result_file, "w") as f:
+        json.dump(results, f)
+
+
+# --- processus principal ---------------------------------------------------------
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(size, args, workdir):
+    from fake_k8s import FakeKube, parse_errors
+    from stub_smf import StubSMF
+
+    kube = FakeKube(args.latency, args.jitter, parse_errors(args.error), args.ready_delay, seed=size)
+    kube_server = kube.serve()
+    smf = StubSMF(latency=args.smf_latency)
+    smf_server = smf.serve()
+    smf_base = f"http://127.0.0.1:{smf_server.server_address[1]}/api/dnn"
+    run_dir = os.path.join(workdir, str(size))
+    os.makedirs(run_dir, exist_ok=True)
+    env = dict(os.environ)
+    env.update({
+        "DEMO_MODE": "0",
+        "K8S_API_HOST": f"http://127.0.0.1:{kube_server.server_address[1]}",
+        "SMF_WEBHOOK_URL": f"{smf_base}/register",
+        "SMF_BATCH_URL": f"{smf_base}/register/batch",
+        "UE_CONF_DIR": os.path.join(run_dir, "ue-confs"),
+        "UE_STATE_DB": os.path.join(run_dir, "state.db"),
+        # Toutes les connexions doivent tenir dans la file et rester consultables
+        "JOB_QUEUE_MAXSIZE": str(max(size, 1000)),
+        "JOB_HISTORY": str(max(2 * size, 5000)),
+    })
+    # Chaque UE ne reçoit qu'un événement : la fenêtre d'anti-rebond n'ajouterait qu'une latence fixe
+    env.setdefault("UE_DEBOUNCE_WINDOW", "0")
+    result_file = os.path.join(run_dir, "result.json")
+    log_file = os.path.join(run_dir, "controller.log")
+    command = [sys.executable, os.path.abspath(__file__), "--worker", "--size", str(size),
+               "--clients", str(args.clients), "--scenarios", ",".join(args.scenarios),
+               "--result-file", result_file]
+    try:
+        with open(log_file, "w") as log:
+            subprocess.run(command, env=env, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT, check=True,
+                           timeout=args.timeout)
+        with open(result_file) as f:
+            return json.load(f)
+    finally:
+        kube_server.shutdown()
+        smf_server.shutdown()
+
+
+def compare(baseline, current, max_regression=None):
+    """Affiche l'évolution débit / p95 ; retourne la liste des régressions au-delà du seuil (%)."""
+    regressions = []
+    print(f"\nComparaison avec {baseline.get('commit') or 'référence'} :")
+    for size, scenarios in current["results"].items():
+        for name, result in scenarios.items():
+            old = (baseline.get("results") or {}).get(size, {}).get(name)
+            if not isinstance(result, dict) or not old:
+                continue
+            throughput = _delta(old.get("throughput_ues_s"), result.get("throughput_ues_s"))
+            p95 = _delta(old["latency_ms"].get("p95"), result["latency_ms"].get("p95"))
+            print(f"  {size:>6} UE {name:<14} débit {_fmt(throughput)}  p95 {_fmt(p95)}")
+            if max_regression is not None and ((throughput is not None and throughput < -max_regression)
+                                               or (p95 is not None and p95 > max_regression)):
+                regressions.append(f"{size}/{name}")
+    return regressions
+
+
+def _delta(old, new):
+    if not old or new is None:
+        return None
+    return round((new - old) / old * 100, 1)
+
+
+def _fmt(delta):
+    return "   n/a" if delta is None else f"{delta:+6.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000", help="nombres d'UE, séparés par des virgules")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--clients", type=int, default=32, help="requêtes HTTP simultanées")
+    parser.add_argument("--latency", type=float, default=0.002, help="latence de l'API factice (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latence aléatoire supplémentaire maximale (s)")
+    parser.add_argument("--ready-delay", type=float, default=0.0, help="délai avant Pod/Deployment prêt (s)")
+    parser.add_argument("--error", action="append", metavar="CODE=TAUX", help="erreurs injectées (409, 429, 500)")
+    parser.add_argument("--smf-latency", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=3600, help="durée maximale par taille (s)")
+    parser.add_argument("--out", help="fichier JSON de résultats")
+    parser.add_argument("--workdir", help="répertoire de travail conservé (logs du contrôleur par taille)")
+    parser.add_argument("--compare", help="résultats de référence (JSON) à comparer")
+    parser.add_argument("--max-regression", type=float, help="échec si débit ou p95 se dégrade de plus de N %%")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.scenarios = [s for s in args.scenarios.split(",") if s]
+
+    if args.worker:
+        run_worker(args.size, args.clients, args.scenarios, args.result_file)
+        return 0
+
+    commit = git_commit()
+    out = args.out or os.path.join(ROOT, "tmp", "bench", f"attach-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    report = {
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "params": {k: getattr(args, k) for k in ("clients", "latency", "jitter", "ready_delay", "error",
+                                                  "smf_latency", "scenarios")},
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="nexslice-bench-") as tmpdir:
+        workdir = args.workdir or tmpdir
+        for size in (int(s) for s in args.sizes.split(",") if s):
+            results = run_size(size, args, workdir)
+            report["results"][str(size)] = results
+            for name in args.scenarios:
+                r = results[name]
+                print(f"{size:>6} UE {name:<14} {r['throughput_ues_s']:>8} UE/s  p50 {r['latency_ms']['p50']} ms  "
+                      f"p95 {r['latency_ms']['p95']} ms  p99 {r['latency_ms']['p99']} ms  "
+                      f"{r['api_calls_per_ue']} appels API/UE  {r['errors']} erreurs  RSS {r['rss_mb']} Mio")
+
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats : {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.max_regression)
+        if regressions:
+            print(f"Régressions au-delà de {args.max_regression}% : {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
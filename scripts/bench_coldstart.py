@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Benchmark du démarrage à froid du contrôleur, par backend de provisionnement.
+
+Pour chaque backend (``kubernetes``, ``memory``, ``dryrun`` par défaut), le
+contrôleur est lancé ``--runs`` fois dans un processus neuf, qui mesure :
+
+    import_s          import de src.main (modules, base d'état, registre)
+    app_s             construction de l'application Flask
+    first_request_s   première requête (GET /api/ue-count)
+    total_s           durée totale depuis le lancement de l'interpréteur
+
+ainsi que les gros modules chargés (``kubernetes``, ``requests``). Aucune
+requête n'est envoyée au cluster : le backend ``kubernetes`` n'est pas appelé.
+La médiane de chaque mesure est écrite en JSON (``--out``, par défaut
+``tmp/bench/coldstart-<commit>.json``) ; ``--compare`` la compare à un fichier
+précédent.
+
+Usage : python scripts/bench_coldstart.py [--backends kubernetes,memory,dryrun] [--runs 5]
+        [--compare tmp/bench/coldstart-abc123.json --max-regression 20]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+MEASURES = ("import_s", "app_s", "first_request_s", "total_s")
+HEAVY_MODULES = ("kubernetes", "requests")
+
+
+def run_worker(spawned_at, result_file):
+    start = time.perf_counter()
+    from src import main as controller
+    imported = time.perf_counter()
+    app = controller.create_app()
+    built = time.perf_counter()
+    response = app.test_client().get("/api/ue-count")
+    answered = time.perf_counter()
+    results = {
+        "import_s": round(imported - start, 4),
+        "app_s": round(built - imported, 4),
+        "first_request_s": round(answered - built, 4),
+        "total_s": round(time.time() - spawned_at, 4),
+        "status": response.status_code,
+        "backend": controller.BACKEND.name,
+        "modules": [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+    with open(result_file, "w") as f:
+        json.dump(results, f)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_backend(backend, runs, workdir):
+    samples = []
+    for run in range(runs):
+        run_dir = os.path.join(workdir, backend, str(run))
+        os.makedirs(run_dir, exist_ok=True)
+        env = dict(os.environ)
+        env.update({
+            "DEMO_MODE": "0",
+            "PROVISIONING_BACKEND": backend,
+            "UE_STATE_DB": os.path.join(run_dir, "state.db"),
+            "UE_CONF_DIR": os.path.join(run_dir, "ue-confs"),
+        })
+        result_file = os.path.join(run_dir, "result.json")
+        command = [sys.executable, os.path.abspath(__file__), "--worker", "--spawned-at", repr(time.time()),
+                   "--result-file", result_file]
+        subprocess.run(command, env=env, cwd=ROOT, stdout=subprocess.DEVNULL, check=True, timeout=120)
+        with open(result_file) as f:
+            samples.append(json.load(f))
+    summary = {measure: round(statistics.median(s[measure] for s in samples), 4) for measure in MEASURES}
+    summary["modules"] = samples[-1]["modules"]
+    summary["runs"] = runs
+    return summary
+
+
+def compare(baseline, current, max_regression=None):
+    """Affiche l'évolution des médianes ; retourne les mesures dégradées au-delà du seuil (%)."""
+    regressions = []
+    print(f"\nComparaison avec {baseline.get('commit') or 'référence'} :")
+    for backend, result in current["results"].items():
+        old = (baseline.get("results") or {}).get(backend)
+        if not old:
+            continue
+        for measure in ("import_s", "total_s"):
+            if not old.get(measure):
+                continue
+            delta = round((result[measure] - old[measure]) / old[measure] * 100, 1)
+            print(f"  {backend:<10} {measure:<8} {old[measure]:>7}s -> {result[measure]:>7}s ({delta:+.1f}%)")
+            if max_regression is not None and delta > max_regression:
+                regressions.append(f"{backend}/{measure}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="kubernetes,memory,dryrun")
+    parser.add_argument("--runs", type=int, default=5, help="démarrages par backend (médiane)")
+    parser.add_argument("--out", help="fichier JSON de résultats")
+    parser.add_argument("--compare", help="résultats de référence (JSON) à comparer")
+    parser.add_argument("--max-regression", type=float, help="échec si un démarrage ralentit de plus de N %%")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--spawned-at", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.spawned_at, args.result_file)
+        return 0
+
+    commit = git_commit()
+    out = args.out or os.path.join(ROOT, "tmp", "bench", f"coldstart-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    report = {
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": sys.version.split()[0],
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="nexslice-bench-") as workdir:
+        for backend in (b for b in args.backends.split(",") if b):
+            r = run_backend(backend, max(1, args.runs), workdir)
+            report["results"][backend] = r
+            print(f"{backend:<10} total {r['total_s']}s  import {r['import_s']}s  app {r['app_s']}s  "
+                  f"1re requête {r['first_request_s']}s  modules : {', '.join(r['modules']) or 'aucun'}")
+
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Résultats : {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.max_regression)
+        if regressions:
+            print(f"Régressions au-delà de {args.max_regression}% : {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Simulation du mode consolidation : UPF nécessaires pour une charge UE donnée.
+
+Attache ``--ues`` UE, puis applique ``--churn`` cycles détachement/attachement
+aléatoires, et compare le nombre d'UPF partagés au modèle 1 UE = 1 UPF (et les
+requêtes CPU/mémoire correspondantes, 100m / 128Mi par UPF).
+
+Usage : python scripts/bench_placement.py [--ues 1000] [--max-per-upf 32] [--churn 5000] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.placement import PlacementScheduler  # noqa: E402
+
+UPF_CPU_MILLI = 100
+UPF_MEMORY_MI = 128
+
+
+def simulate(ues, max_per_upf, churn, seed=0):
+    rng = random.Random(seed)
+    created, removed = [], []
+    placement = PlacementScheduler(max_per_upf, lambda name: created.append(name) or True, removed.append,
+                                   drain_grace=0)
+    attached = list(range(1, ues + 1))
+    for ue_id in attached:
+        placement.assign(ue_id)
+    next_id = ues + 1
+    for _ in range(churn):
+        placement.release(attached.pop(rng.randrange(len(attached))))
+        placement.assign(next_id)
+        attached.append(next_id)
+        next_id += 1
+    stats = placement.stats()
+    return {
+        "ues": stats["ues"],
+        "max_per_upf": max_per_upf,
+        "churn": churn,
+        "upfs_dedicated": stats["ues"],
+        "upfs_shared": stats["upfs"],
+        "upfs_saved": stats["upfs_saved"],
+        "fill_ratio": stats["fill_ratio"],
+        "upfs_created": len(created),
+        "upfs_removed": len(removed),
+        "cpu_requests_saved": f"{stats['upfs_saved'] * UPF_CPU_MILLI}m",
+        "memory_requests_saved": f"{stats['upfs_saved'] * UPF_MEMORY_MI}Mi",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ues", type=int, default=1000)
+    parser.add_argument("--max-per-upf", type=int, default=32)
+    parser.add_argument("--churn", type=int, default=5000)
+    parser.add_argument("--json", action="store_true", help="résultat au format JSON")
+    args = parser.parse_args()
+
+    result = simulate(args.ues, args.max_per_upf, args.churn)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{result['ues']} UE, {args.max_per_upf} UE max par UPF, {args.churn} cycles de churn")
+    print(f"  UPF dédiés (1 UE = 1 UPF) : {result['upfs_dedicated']}")
+    print(f"  UPF partagés              : {result['upfs_shared']} (remplissage {result['fill_ratio']:.0%})")
+    print(f"  UPF économisés            : {result['upfs_saved']} "
+          f"({result['cpu_requests_saved']} CPU, {result['memory_requests_saved']} mémoire)")
+    print(f"  UPF créés / supprimés     : {result['upfs_created']} / {result['upfs_removed']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Micro-benchmark du rendu des configs UE et des manifestes.
+
+Compare, pour N UE, le rendu en mémoire (src/renderer.py) au chemin historique
+(f-string écrite sur disque puis relue pour le ConfigMap), et affiche le
+nombre de rendus par seconde.
+
+Usage : python scripts/bench_render.py [--ues 10000] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.renderer import render_ue_config, render_ue_configmap, render_ue_pod, render_upf  # noqa: E402
+
+UE_IMAGE = "gradiant/ueransim:3.2.6"
+UPF_IMAGE = "oaisoftwarealliance/oai-upf:latest"
+
+
+def render_in_memory(ue_id):
+    config = render_ue_config(ue_id)
+    render_ue_configmap(ue_id, config)
+    render_ue_pod(ue_id, UE_IMAGE)
+    render_upf(f"upf-ue{ue_id}", {"app": "upf", "ue-id": str(ue_id)}, UPF_IMAGE, 1)
+
+
+def render_via_disk(conf_dir):
+    def render(ue_id):
+        path = os.path.join(conf_dir, f"ue{ue_id}.yaml")
+        with open(path, "w") as f:
+            f.write(render_ue_config(ue_id))
+        with open(path) as f:
+            config = f.read()
+        render_ue_configmap(ue_id, config)
+        render_ue_pod(ue_id, UE_IMAGE)
+        render_upf(f"upf-ue{ue_id}", {"app": "upf", "ue-id": str(ue_id)}, UPF_IMAGE, 1)
+    return render
+
+
+def bench(name, fn, ues):
+    start = time.perf_counter()
+    for ue_id in range(1, ues + 1):
+        fn(ue_id)
+    elapsed = time.perf_counter() - start
+    return {"name": name, "ues": ues, "seconds": round(elapsed, 4), "renders_per_s": round(ues / elapsed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ues", type=int, default=10000)
+    parser.add_argument("--json", action="store_true", help="résultats au format JSON")
+    args = parser.parse_args()
+
+    results = [bench("config seule", render_ue_config, args.ues),
+               bench("en mémoire (config + ConfigMap + Pod + UPF)", render_in_memory, args.ues)]
+    with tempfile.TemporaryDirectory() as conf_dir:
+        results.append(bench("via disque (écriture + relecture)", render_via_disk(conf_dir), args.ues))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"{r['name']:<45} {r['ues']:>7} UE  {r['seconds']:>8.3f} s  {r['renders_per_s']:>9} rendus/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Benchmark du redémarrage du contrôleur face à un cluster déjà peuplé.
+
+Une API Kubernetes factice (scripts/fake_k8s.py) est peuplée directement avec
+``--size`` UE complets (ConfigMap, Pod, Deployment et Service UPF), dont une
+fraction ``--broken`` à moitié créés (Pod et Service manquants), plus autant
+d'UE orphelins (Deployment seul, absents de la base d'état). La base d'état
+contient les UE voulus. Le contrôleur est ensuite lancé dans un processus fils,
+qui mesure :
+
+    import_s      import de src.main (base d'état, registre, métriques)
+    synced_s      caches watch synchronisés (LIST paginés)
+    reconcile_s   passage de réconciliation de démarrage terminé
+    ready_s       durée totale depuis le lancement du processus
+
+Les résultats sont écrits en JSON (``--out``, par défaut
+``tmp/bench/restart-<commit>.json``).
+
+Usage : python scripts/bench_restart.py [--size 10000] [--broken 0.02] [--latency 0.002]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+
+from bench_attach import git_commit, peak_rss_mb  # noqa: E402
+
+
+# --- processus fils : contrôleur ---------------------------------------------------
+
+def run_worker(spawned_at, result_file, timeout):
+    start = time.perf_counter()
+    from src import main as controller
+    imported = time.perf_counter()
+    controller.create_app(start_services=True)
+    deadline = time.time() + timeout
+    for informer in controller.INFORMERS:
+        informer.synced.wait(max(0.0, deadline - time.time()))
+    synced = time.perf_counter()
+    while controller.RECONCILER.last_report is None and time.time() < deadline:
+        time.sleep(0.01)
+    reconciled = time.perf_counter()
+    report = controller.RECONCILER.last_report or {}
+    results = {
+        "import_s": round(imported - start, 3),
+        "synced_s": round(synced - imported, 3),
+        "reconcile_s": round(reconciled - imported, 3),
+        "ready_s": round(time.time() - spawned_at, 3),
+        "reconcile": report,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    with open(result_file, "w") as f:
+        json.dump(results, f)
+
+
+# --- processus principal ---------------------------------------------------------
+
+def seed_cluster(kube, size, broken):
+    """Peuple l'API factice ; retourne les UE voulus (à mettre en base)."""
+    from src.renderer import render_upf
+
+    def create_ue(ue_id, kinds):
+        labels = {"app": "ueransim-ue", "ue-id": str(ue_id)}
+        if "configmap" in kinds:
+            kube.create("ConfigMap", "nexslice", {"metadata": {"name": f"ueransim-ue{ue_id}-config", "labels": labels},
+                                                  "data": {"ue.yaml": ""}})
+        if "pod" in kinds:
+            kube.create("Pod", "nexslice", {"metadata": {"name": f"ueransim-ue{ue_id}", "labels": labels}})
+        deployment, service = render_upf(f"upf-ue{ue_id}", {"app": "upf", "ue-id": str(ue_id)}, "upf:bench", 1)
+        if "deployment" in kinds:
+            kube.create("Deployment", "nexslice", deployment)
+        if "service" in kinds:
+            kube.create("Service", "nexslice", service)
+
+    step = max(1, int(1 / broken)) if broken > 0 else None
+    for ue_id in range(1, size + 1):
+        if step and ue_id % step == 0:
+            create_ue(ue_id, ("configmap", "deployment"))
+            # Orphelin : UPF d'un UE dont la suppression a été interrompue
+            create_ue(size + ue_id, ("deployment",))
+        else:
+            create_ue(ue_id, ("configmap", "pod", "deployment", "service"))
+    return list(range(1, size + 1))
+
+
+def run(args, workdir):
+    from fake_k8s import FakeKube
+    from stub_smf import StubSMF
+    from src.state_store import StateStore
+
+    kube = FakeKube(args.latency, seed=args.size)
+    seed_start = time.perf_counter()
+    desired = seed_cluster(kube, args.size, args.broken)
+    StateStore(os.path.join(workdir, "state.db")).upsert_many(
+        {ue_id: {"sst": 1, "sd": f"{ue_id:06x}", "dnn": f"oai-ue{ue_id}", "phase": "provisioned",
+                 "upf": f"upf-ue{ue_id}"} for ue_id in desired})
+    print(f"Cluster factice peuplé ({sum(kube.count(k) for k in ('Pod', 'ConfigMap', 'Deployment', 'Service'))} "
+          f"objets) en {time.perf_counter() - seed_start:.1f}s")
+    kube_server = kube.serve()
+    smf = StubSMF()
+    smf_server = smf.serve()
+    smf_base = f"http://127.0.0.1:{smf_server.server_address[1]}/api/dnn"
+    env = dict(os.environ)
+    env.update({
+        "DEMO_MODE": "0",
+        "K8S_API_HOST": f"http://127.0.0.1:{kube_server.server_address[1]}",
+        "SMF_WEBHOOK_URL": f"{smf_base}/register",
+        "SMF_BATCH_URL": f"{smf_base}/register/batch",
+        "UE_CONF_DIR": os.path.join(workdir, "ue-confs"),
+        "UE_STATE_DB": os.path.join(workdir, "state.db"),
+        # Les UE de la base viennent d'être écrits : les réparer sans délai de grâce
+        "RECONCILE_GRACE": "0",
+        "RECONCILE_INTERVAL": "0",
+    })
+    result_file = os.path.join(workdir, "result.json")
+    log_file = os.path.join(workdir, "controller.log")
+    command = [sys.executable, os.path.abspath(__file__), "--worker", "--spawned-at", repr(time.time()),
+               "--result-file", result_file, "--timeout", str(args.timeout)]
+    try:
+        with open(log_file, "w") as log:
+            subprocess.run(command, env=env, cwd=ROOT, stdout=log, stderr=subprocess.STDOUT, check=True,
+                           timeout=args.timeout + 60)
+        with open(result_file) as f:
+            results = json.load(f)
+        results["api_calls"] = kube.stats()
+        return results
+    finally:
+        kube_server.shutdown()
+        smf_server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10000, help="nombre d'UE voulus")
+    parser.add_argument("--broken", type=float, default=0.02, help="fraction d'UE à moitié créés (et d'orphelins)")
+    parser.add_argument("--latency", type=float, default=0.002, help="latence de l'API factice (s)")
+    parser.add_argument("--timeout", type=float, default=1800, help="durée maximale du redémarrage (s)")
+    parser.add_argument("--out", help="fichier JSON de résultats")
+    parser.add_argument("--workdir", help="répertoire de travail conservé (base d'état, logs du contrôleur)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--spawned-at", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.spawned_at, args.result_file, args.timeout)
+        return 0
+
+    commit = git_commit()
+    out = args.out or os.path.join(ROOT, "tmp", "bench", f"restart-{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="nexslice-bench-") as tmpdir:
+        workdir = args.workdir or tmpdir
+        os.makedirs(workdir, exist_ok=True)
+        results = run(args, workdir)
+    report = results.get("reconcile") or {}
+    print(f"{args.size:>6} UE  prêt en {results['ready_s']}s (import {results['import_s']}s, caches "
+          f"{results['synced_s']}s, réconciliation {results['reconcile_s']}s, {report.get('list_pages')} pages LIST)  "
+          f"{report.get('repaired')} réparés, {report.get('deleted')} orphelins supprimés, "
+          f"{len(report.get('errors') or [])} erreurs  RSS {results['peak_rss_mb']} Mio")
+    with open(out, "w") as f:
+        json.dump({
+            "commit": commit,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": sys.version.split()[0],
+            "params": {k: getattr(args, k) for k in ("size", "broken", "latency")},
+            "results": results,
+        }, f, indent=2)
+    print(f"Résultats : {out}")
+    return 0 if report and not report.get("errors") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
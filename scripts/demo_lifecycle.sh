@@ -15,34 +15,21 @@ fi
 UE_ID=$1
 BASE_URL="http://localhost:5000"
 
-echo "Creating UE $UE_ID via API..."
-curl -s -X POST "$BASE_URL/add_pod" -o /dev/null
-
-# The add_pod endpoint creates a UE with a new index; the API script doesn't allow explicit ID.
-# For a controlled demo, we fetch the last created UE via /api/ue-count
-COUNT_RESPONSE=$(curl -sf "$BASE_URL/api/ue-count")
-if [ $? -ne 0 ] || [ -z "$COUNT_RESPONSE" ]; then
-    echo "Unable to fetch UE count from $BASE_URL/api/ue-count. Is Flask running?"
-    exit 1
-fi
-
-COUNT=$(echo "$COUNT_RESPONSE" | jq -r '.count // 0')
-if [ -z "$COUNT" ] || [ "$COUNT" == "null" ]; then
-    echo "Invalid /api/ue-count response: $COUNT_RESPONSE"
+echo "Creating UE via API..."
+# add_pod picks a free id itself (released ids are reused): read it from the JSON 202 response
+ADD_RESPONSE=$(curl -sf -X POST -H 'Accept: application/json' "$BASE_URL/add_pod")
+if [ $? -ne 0 ] || [ -z "$ADD_RESPONSE" ]; then
+    echo "Unable to create a UE via $BASE_URL/add_pod. Is Flask running?"
     exit 1
 fi
 
+COUNT=$(echo "$ADD_RESPONSE" | jq -r '.ue_id // empty')
 if ! [[ "$COUNT" =~ ^[0-9]+$ ]]; then
-    echo "Field 'count' is not numeric: $COUNT_RESPONSE"
-    exit 1
-fi
-
-if [ "$COUNT" -eq 0 ]; then
-    echo "No UE found after creation. Check Flask service."
+    echo "Field 'ue_id' missing or not numeric: $ADD_RESPONSE"
     exit 1
 fi
 
-echo "Last created UE: $COUNT (checking UPF upf-ue$COUNT)"
+echo "Created UE: $COUNT (checking UPF upf-ue$COUNT)"
 
 echo "Waiting 3s for K8s resources..."
 sleep 3
@@ -0,0 +1,470 @@
+#!/usr/bin/env python3
+"""API Kubernetes factice, en mémoire, pour tester et mesurer le contrôleur sans cluster.
+
+Couvre ce qu'utilise NexSlice sur les Pods, ConfigMaps, Services et
+Deployments d'un namespace :
+
+    GET    .../{ressource}                 LIST (labelSelector, limit/continue) ou WATCH (watch=true)
+    POST   .../{ressource}                 création (409 si l'objet existe)
+    DELETE .../{ressource}                 deletecollection (labelSelector)
+    GET    .../{ressource}/{nom}           lecture
+    PATCH  .../{ressource}/{nom}           fusion récursive (merge / strategic merge ; null supprime)
+    PUT    .../{ressource}/{nom}           remplacement
+    DELETE .../{ressource}/{nom}           suppression immédiate
+    GET    /_fake/stats                    appels reçus par verbe, erreurs injectées, objets stockés
+
+Les Deployments et les Pods passent prêts ``ready_delay`` secondes après leur
+création (événement MODIFIED). Chaque requête peut être ralentie
+(``latency`` + ``jitter``) et les écritures peuvent échouer aléatoirement
+(``errors={409: 0.01, 429: 0.01, 500: 0.01}``).
+
+Usage : python scripts/fake_k8s.py --port 8001 [--latency 0.005] [--error 500=0.01]
+puis lancer le contrôleur avec K8S_API_HOST=http://localhost:8001
+"""
+import argparse
+import copy
+import heapq
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+RESOURCES = {
+    ("api/v1", "pods"): "Pod",
+    ("api/v1", "configmaps"): "ConfigMap",
+    ("api/v1", "services"): "Service",
+    ("apis/apps/v1", "deployments"): "Deployment",
+}
+API_VERSIONS = {"Pod": "v1", "ConfigMap": "v1", "Service": "v1", "Deployment": "apps/v1"}
+PATH_RE = re.compile(r"^/(api/v1|apis/apps/v1)/namespaces/([^/]+)/([a-z]+)(?:/([^/]+))?/?$")
+SELECTOR_TERM_RE = re.compile(r"^\s*(!)?\s*([\w./-]+)\s*(?:(==|=|!=)\s*([\w./-]*)|\s+(in|notin)\s*\(([^)]*)\))?\s*$")
+HISTORY = 50000
+
+
+class ApiError(Exception):
+    def __init__(self, code, reason, message, headers=None):
+        super().__init__(message)
+        self.code = code
+        self.reason = reason
+        self.headers = headers or {}
+
+    def status(self):
+        return {"kind": "Status", "apiVersion": "v1", "metadata": {}, "status": "Failure",
+                "message": str(self), "reason": self.reason, "code": self.code}
+
+
+def parse_selector(selector):
+    """Liste de prédicats ``labels -> bool`` pour un sélecteur de labels Kubernetes."""
+    terms, depth, current = [], 0, ""
+    for char in selector or "":
+        depth += char == "("
+        depth -= char == ")"
+        if char == "," and depth == 0:
+            terms.append(current)
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        terms.append(current)
+
+    predicates = []
+    for term in terms:
+        match = SELECTOR_TERM_RE.match(term)
+        if not match:
+            raise ApiError(400, "BadRequest", f"sélecteur invalide : {term}")
+        negate, key, op, value, set_op, values = match.groups()
+        if op in ("=", "=="):
+            predicates.append(lambda labels, k=key, v=value: labels.get(k) == v)
+        elif op == "!=":
+            predicates.append(lambda labels, k=key, v=value: labels.get(k) != v)
+        elif set_op:
+            allowed = {v.strip() for v in values.split(",") if v.strip()}
+            if set_op == "in":
+                predicates.append(lambda labels, k=key, s=allowed: labels.get(k) in s)
+            else:
+                predicates.append(lambda labels, k=key, s=allowed: labels.get(k) not in s)
+        elif negate:
+            predicates.append(lambda labels, k=key: k not in labels)
+        else:
+            predicates.append(lambda labels, k=key: k in labels)
+    return predicates
+
+
+def matches(obj, predicates):
+    labels = obj["metadata"].get("labels") or {}
+    return all(p(labels) for p in predicates)
+
+
+def merge_patch(target, patch):
+    """Fusion récursive de ``patch`` dans ``target`` (``None`` supprime la clé)."""
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge_patch(target[key], value)
+        else:
+            target[key] = copy.deepcopy(value)
+    return target
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Watch interrompu par la fermeture du client : rien à signaler
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class FakeKube:
+    def __init__(self, latency=0.0, jitter=0.0, errors=None, ready_delay=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.errors = dict(errors or {})
+        self.ready_delay = ready_delay
+        self.random = random.Random(seed)
+        self.objects = {kind: {} for kind in API_VERSIONS}
+        self.events = {kind: deque(maxlen=HISTORY) for kind in API_VERSIONS}
+        self.resource_version = 0
+        self.calls = Counter()
+        self.injected = Counter()
+        self.lock = threading.RLock()
+        self.changed = threading.Condition(self.lock)
+        self._timers = []
+        self._timer_wakeup = threading.Event()
+        self._timer_thread = None
+
+    # --- état -------------------------------------------------------------
+
+    def _next_rv(self):
+        self.resource_version += 1
+        return str(self.resource_version)
+
+    def _store(self, kind, event_type, obj):
+        """Enregistre une nouvelle version de ``obj`` et l'événement correspondant.
+
+        Les objets stockés ne sont jamais modifiés ensuite (copie à chaque
+        écriture) : l'historique des watch et les réponses les partagent.
+        """
+        key = (obj["metadata"]["namespace"], obj["metadata"]["name"])
+        obj["metadata"]["resourceVersion"] = self._next_rv()
+        if event_type == "DELETED":
+            self.objects[kind].pop(key, None)
+        else:
+            self.objects[kind][key] = obj
+        self.events[kind].append((self.resource_version, event_type, obj))
+        self.changed.notify_all()
+        return obj
+
+    def count(self, kind):
+        with self.lock:
+            return len(self.objects[kind])
+
+    def stats(self):
+        with self.lock:
+            return {
+                "calls": dict(self.calls),
+                "total_calls": sum(self.calls.values()),
+                "injected_errors": {str(code): n for code, n in self.injected.items()},
+                "objects": {kind: len(objs) for kind, objs in self.objects.items()},
+            }
+
+    # --- passage à l'état prêt ---------------------------------------------
+
+    def _schedule_ready(self, kind, namespace, name):
+        if self.ready_delay <= 0:
+            self._mark_ready(kind, namespace, name)
+            return
+        heapq.heappush(self._timers, (time.monotonic() + self.ready_delay, kind, namespace, name))
+        if self._timer_thread is None:
+            self._timer_thread = threading.Thread(target=self._run_timers, name="fake-k8s-ready", daemon=True)
+            self._timer_thread.start()
+        self._timer_wakeup.set()
+
+    def _run_timers(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self._timers and self._timers[0][0] <= now:
+                    _, kind, namespace, name = heapq.heappop(self._timers)
+                    self._mark_ready(kind, namespace, name)
+                wait = self._timers[0][0] - now if self._timers else None
+            self._timer_wakeup.wait(wait)
+            self._timer_wakeup.clear()
+
+    def _mark_ready(self, kind, namespace, name):
+        obj = copy.deepcopy(self.objects[kind].get((namespace, name)))
+        if obj is None:
+            return
+        if kind == "Deployment":
+            replicas = (obj.get("spec") or {}).get("replicas", 1)
+            obj["status"] = {"replicas": replicas, "readyReplicas": replicas, "availableReplicas": replicas}
+        else:
+            obj["status"] = {"phase": "Running", "conditions": [{"type": "Ready", "status": "True"}]}
+        self._store(kind, "MODIFIED", obj)
+
+    # --- opérations ---------------------------------------------------------
+
+    def _inject(self, method):
+        if method == "GET" or not self.errors:
+            return
+        roll = self.random.random()
+        for code, rate in self.errors.items():
+            if roll < rate:
+                self.injected[code] += 1
+                if code == 429:
+                    raise ApiError(429, "TooManyRequests", "erreur injectée", {"Retry-After": "1"})
+                if code == 409:
+                    raise ApiError(409, "Conflict", "erreur injectée")
+                raise ApiError(code, "InternalError", "erreur injectée")
+            roll -= rate
+
+    def _get(self, kind, namespace, name):
+        obj = self.objects[kind].get((namespace, name))
+        if obj is None:
+            raise ApiError(404, "NotFound", f"{kind} \"{name}\" not found")
+        return obj
+
+    def create(self, kind, namespace, body):
+        name = (body.get("metadata") or {}).get("name")
+        if not name:
+            raise ApiError(422, "Invalid", "metadata.name requis")
+        with self.lock:
+            if (namespace, name) in self.objects[kind]:
+                raise ApiError(409, "AlreadyExists", f"{kind} \"{name}\" already exists")
+            obj = copy.deepcopy(body)
+            obj.setdefault("apiVersion", API_VERSIONS[kind])
+            obj["kind"] = kind
+            metadata = obj["metadata"]
+            metadata.update(namespace=namespace, uid=str(uuid.uuid4()), generation=1,
+                            creationTimestamp=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+            self._store(kind, "ADDED", obj)
+            if kind in ("Deployment", "Pod"):
+                self._schedule_ready(kind, namespace, name)
+            return obj
+
+    def patch(self, kind, namespace, name, body):
+        if not isinstance(body, dict):
+            raise ApiError(415, "UnsupportedMediaType", "JSON Patch non supporté")
+        with self.lock:
+            obj = copy.deepcopy(self._get(kind, namespace, name))
+            merge_patch(obj, {k: v for k, v in body.items() if k not in ("kind", "apiVersion")})
+            return self._store(kind, "MODIFIED", obj)
+
+    def replace(self, kind, namespace, name, body):
+        with self.lock:
+            live = self._get(kind, namespace, name)
+            obj = copy.deepcopy(body)
+            obj["kind"] = kind
+            obj.setdefault("apiVersion", API_VERSIONS[kind])
+            for field in ("uid", "creationTimestamp", "namespace"):
+                obj["metadata"][field] = live["metadata"][field]
+            obj.setdefault("status", live.get("status"))
+            return self._store(kind, "MODIFIED", obj)
+
+    def delete(self, kind, namespace, name):
+        with self.lock:
+            obj = self._store(kind, "DELETED", copy.deepcopy(self._get(kind, namespace, name)))
+            if kind == "Pod":
+                # Comme l'API réelle : un Pod supprimé est renvoyé, les autres ressources donnent un Status
+                return obj
+            return {"kind": "Status", "apiVersion": "v1", "metadata": {}, "status": "Success",
+                    "details": {"name": name, "kind": kind.lower() + "s", "uid": obj["metadata"]["uid"]}}
+
+    def delete_collection(self, kind, namespace, selector):
+        predicates = parse_selector(selector)
+        with self.lock:
+            doomed = [key for key, obj in self.objects[kind].items()
+                      if key[0] == namespace and matches(obj, predicates)]
+            items = [self._store(kind, "DELETED", copy.deepcopy(self.objects[kind][key])) for key in doomed]
+            return {"kind": f"{kind}List", "apiVersion": API_VERSIONS[kind], "metadata": {}, "items": items}
+
+    def list(self, kind, namespace, selector=None, limit=None, continue_token=None):
+        predicates = parse_selector(selector)
+        with self.lock:
+            names = sorted(name for (ns, name), obj in self.objects[kind].items()
+                           if ns == namespace and matches(obj, predicates))
+            if continue_token:
+                names = [n for n in names if n > continue_token]
+            metadata = {"resourceVersion": str(self.resource_version)}
+            if limit and len(names) > limit:
+                metadata["remainingItemCount"] = len(names) - limit
+                names = names[:limit]
+                metadata["continue"] = names[-1]
+            items = [self.objects[kind][(namespace, n)] for n in names]
+        return {"kind": f"{kind}List", "apiVersion": API_VERSIONS[kind], "metadata": metadata, "items": items}
+
+    def watch(self, kind, namespace, selector, resource_version, timeout):
+        """Générateur d'événements ``{"type", "object"}`` postérieurs à ``resource_version``."""
+        predicates = parse_selector(selector)
+        last = int(resource_version or 0)
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            history = self.events[kind]
+            if history and last and last < history[0][0] - 1 and len(history) == history.maxlen:
+                yield {"type": "ERROR", "object": {"kind": "Status", "code": 410, "reason": "Expired",
+                                                   "message": "too old resource version"}}
+                return
+        while True:
+            with self.lock:
+                # Historique trié par resourceVersion : on ne parcourt que la fin
+                fresh = []
+                for entry in reversed(self.events[kind]):
+                    if entry[0] <= last:
+                        break
+                    fresh.append(entry)
+                if not fresh:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return
+                    self.changed.wait(min(remaining, 1.0))
+                    continue
+            last = fresh[0][0]
+            for _, event_type, obj in reversed(fresh):
+                if obj["metadata"]["namespace"] == namespace and matches(obj, predicates):
+                    yield {"type": event_type, "object": obj}
+
+    # --- HTTP -----------------------------------------------------------------
+
+    def handler(self):
+        kube = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body, headers=None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def _stream(self, events):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for event in events:
+                        line = json.dumps(event).encode() + b"\n"
+                        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                        self.wfile.flush()
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+            def _dispatch(self, method):
+                url = urlparse(self.path)
+                if url.path == "/_fake/stats":
+                    # Compteurs d'appels, hors API Kubernetes (utilisé par les benchmarks)
+                    return self._reply(200, kube.stats())
+                match = PATH_RE.match(url.path)
+                kind = RESOURCES.get((match.group(1), match.group(3))) if match else None
+                if kind is None:
+                    return self._reply(404, ApiError(404, "NotFound", f"chemin inconnu : {url.path}").status())
+                namespace, name = match.group(2), match.group(4)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                body = self._body() if method in ("POST", "PATCH", "PUT") else None
+                verb = f"{method} {kind}{'' if name else 's'}{' watch' if query.get('watch') == 'true' else ''}"
+                with kube.lock:
+                    kube.calls[verb] += 1
+                if kube.latency or kube.jitter:
+                    time.sleep(kube.latency + kube.random.uniform(0, kube.jitter))
+                try:
+                    kube._inject(method)
+                    if name is None:
+                        selector = query.get("labelSelector")
+                        if method == "GET" and query.get("watch") == "true":
+                            return self._stream(kube.watch(kind, namespace, selector, query.get("resourceVersion"),
+                                                           float(query.get("timeoutSeconds") or 300)))
+                        if method == "GET":
+                            limit = int(query["limit"]) if query.get("limit") else None
+                            return self._reply(200, kube.list(kind, namespace, selector, limit, query.get("continue")))
+                        if method == "POST":
+                            return self._reply(201, kube.create(kind, namespace, body))
+                        if method == "DELETE":
+                            return self._reply(200, kube.delete_collection(kind, namespace, selector))
+                    else:
+                        if method == "GET":
+                            with kube.lock:
+                                obj = kube._get(kind, namespace, name)
+                            return self._reply(200, obj)
+                        if method == "PATCH":
+                            return self._reply(200, kube.patch(kind, namespace, name, body))
+                        if method == "PUT":
+                            return self._reply(200, kube.replace(kind, namespace, name, body))
+                        if method == "DELETE":
+                            return self._reply(200, kube.delete(kind, namespace, name))
+                    raise ApiError(405, "MethodNotAllowed", f"{method} non supporté")
+                except ApiError as e:
+                    return self._reply(e.code, e.status(), e.headers)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def do_PATCH(self):
+                self._dispatch("PATCH")
+
+            def do_PUT(self):
+                self._dispatch("PUT")
+
+            def do_DELETE(self):
+                self._dispatch("DELETE")
+
+        return Handler
+
+    def serve(self, host="127.0.0.1", port=0):
+        """Démarre le serveur dans un thread et retourne l'instance HTTP (``server_address``)."""
+        server = _Server((host, port), self.handler())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def parse_errors(specs):
+    """``["500=0.01", "429=0.02"]`` -> ``{500: 0.01, 429: 0.02}``."""
+    errors = {}
+    for spec in specs or []:
+        code, rate = spec.split("=", 1)
+        errors[int(code)] = float(rate)
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0, help="délai ajouté à chaque requête (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="délai aléatoire supplémentaire maximal (s)")
+    parser.add_argument("--ready-delay", type=float, default=0.0, help="délai avant qu'un Pod/Deployment soit prêt (s)")
+    parser.add_argument("--error", action="append", metavar="CODE=TAUX",
+                        help="erreur injectée sur les écritures (409, 429 ou 500), répétable")
+    args = parser.parse_args()
+
+    kube = FakeKube(args.latency, args.jitter, parse_errors(args.error), args.ready_delay)
+    server = _Server((args.host, args.port), kube.handler())
+    print(f"API Kubernetes factice à l'écoute sur {args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""SMF factice pour tester les notifications NexSlice sans cœur 5G.
+
+Expose les endpoints décrits dans docs/INTEGRATION_SMF.md :
+
+    POST /api/dnn/register          enregistre un DNN
+    POST /api/dnn/register/batch    {"registrations": [...]} (désactivable)
+    POST /api/dnn/unregister        {"dnn": "..."}
+    GET  /api/dnn                   mappings DNN → UPF connus
+
+Usage : python scripts/stub_smf.py --port 8080 [--latency 0.01] [--fail-rate 0.2] [--no-batch]
+puis lancer le contrôleur avec SMF_WEBHOOK_URL=http://localhost:8080/api/dnn/register
+(et SMF_BATCH_URL=http://localhost:8080/api/dnn/register/batch pour les lots).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubSMF:
+    def __init__(self, latency=0.0, fail_rate=0.0, batch=True):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.batch = batch
+        self.registrations = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def handler(self):
+        smf = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body=None):
+                data = json.dumps(body if body is not None else {}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path != "/api/dnn":
+                    return self._reply(404, {"error": "not found"})
+                with smf.lock:
+                    return self._reply(200, {"dnns": smf.registrations, "requests": smf.requests})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    return self._reply(400, {"error": "invalid json"})
+                with smf.lock:
+                    smf.requests += 1
+                if smf.latency:
+                    time.sleep(smf.latency)
+                if random.random() < smf.fail_rate:
+                    return self._reply(500, {"error": "injected failure"})
+                if self.path == "/api/dnn/register":
+                    items = [body]
+                elif self.path == "/api/dnn/register/batch" and smf.batch:
+                    items = body.get("registrations") or []
+                elif self.path == "/api/dnn/unregister":
+                    with smf.lock:
+                        found = smf.registrations.pop(body.get("dnn"), None)
+                    return self._reply(200 if found else 404, {"status": "unregistered"})
+                else:
+                    return self._reply(404, {"error": "not found"})
+                with smf.lock:
+                    for item in items:
+                        smf.registrations[item["dnn"]] = item.get("upf_fqdn")
+                return self._reply(201, {"status": "registered", "count": len(items)})
+
+        return Handler
+
+    def serve(self, host="127.0.0.1", port=0):
+        """Démarre le serveur dans un thread et retourne l'instance HTTP (``server_address``)."""
+        server = ThreadingHTTPServer((host, port), self.handler())
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="délai ajouté à chaque requête (s)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="proportion de réponses 500 injectées")
+    parser.add_argument("--no-batch", action="store_true", help="répondre 404 sur l'endpoint de lot")
+    args = parser.parse_args()
+
+    smf = StubSMF(latency=args.latency, fail_rate=args.fail_rate, batch=not args.no_batch)
+    server = ThreadingHTTPServer((args.host, args.port), smf.handler())
+    print(f"Stub SMF à l'écoute sur {args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Contrôle d'admission des webhooks : clés d'idempotence et délestage.
+
+Un client qui rejoue un webhook (timeout réseau, nouvel essai d'Alertmanager)
+envoie le même en-tête ``Idempotency-Key`` : la réponse du premier appel est
+renvoyée telle quelle, sans nouveau job ni nouvelle écriture Kubernetes. La
+clé est associée à l'empreinte de la requête (méthode, chemin, corps) ; une
+clé réutilisée pour une autre requête est refusée (422), une clé dont la
+première requête est encore en cours répond 409.
+
+Les réponses sont gardées ``IDEMPOTENCY_TTL`` secondes, pour au plus
+``IDEMPOTENCY_MAX_KEYS`` clés (les plus anciennes sont oubliées d'abord).
+Le cache est propre à chaque worker : avec ``WEB_WORKERS`` > 1, un rejeu servi
+par un autre worker que le premier appel n'est pas reconnu.
+"""
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, jsonify, make_response, request
+
+try:
+    IDEMPOTENCY_TTL = float(os.environ.get("IDEMPOTENCY_TTL", "600"))
+    IDEMPOTENCY_MAX_KEYS = int(os.environ.get("IDEMPOTENCY_MAX_KEYS", "10000"))
+except Exception:
+    IDEMPOTENCY_TTL, IDEMPOTENCY_MAX_KEYS = 600.0, 10000
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+# En-têtes de la réponse d'origine renvoyés avec la réponse rejouée
+REPLAYED_HEADERS = ("Location", "Retry-After")
+
+
+class IdempotencyCache:
+    """Réponses mémorisées par clé d'idempotence (TTL, taille bornée)."""
+
+    def __init__(self, ttl=IDEMPOTENCY_TTL, max_keys=IDEMPOTENCY_MAX_KEYS, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_keys = max(1, max_keys)
+        self._clock = clock
+        # clé -> [empreinte, réponse (None tant que la requête est en cours), expiration]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry[2] > now and len(self._entries) <= self.max_keys:
+                break
+            del self._entries[key]
+
+    def begin(self, key, fingerprint):
+        """Réserve ``key`` ; retourne ``("new" | "replay" | "conflict" | "in_flight", réponse)``."""
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = [fingerprint, None, now + self.ttl]
+                self._expire(now)
+                return "new", None
+            if entry[0] != fingerprint:
+                return "conflict", None
+            if entry[1] is None:
+                return "in_flight", None
+            return "replay", entry[1]
+
+    def complete(self, key, response):
+        """Mémorise ``response`` (statut, corps, en-têtes) pour les rejeux de ``key``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[1] = response
+                entry[2] = self._clock() + self.ttl
+                self._entries.move_to_end(key)
+
+    def abandon(self, key):
+        """Libère ``key`` : la requête n'a pas abouti, un nouvel essai sera exécuté."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is None:
+                del self._entries[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+def request_fingerprint():
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.path.encode(), request.get_data()):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def idempotent(cache):
+    """Décorateur de vue Flask : applique ``cache`` aux requêtes portant ``Idempotency-Key``.
+
+    Seules les réponses définitives sont mémorisées : après une erreur 5xx ou
+    un délestage (429), le client peut rejouer la requête avec la même clé.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return view(*args, **kwargs)
+            state, cached = cache.begin(key, request_fingerprint())
+            if state == "conflict":
+                return jsonify({"error": f"{IDEMPOTENCY_HEADER} déjà utilisée pour une autre requête"}), 422
+            if state == "in_flight":
+                return jsonify({"error": f"requête {IDEMPOTENCY_HEADER} déjà en cours"}), 409
+            if state == "replay":
+                status, body, headers = cached
+                response = Response(body, status=status, headers=headers, mimetype="application/json")
+                response.headers["Idempotent-Replayed"] = "true"
+                return response
+            try:
+                response = make_response(view(*args, **kwargs))
+            except Exception:
+                cache.abandon(key)
+                raise
+            if response.status_code >= 500 or response.status_code == 429:
+                cache.abandon(key)
+            else:
+                headers = {h: response.headers[h] for h in REPLAYED_HEADERS if h in response.headers}
+                cache.complete(key, (response.status_code, response.get_data(), headers))
+            return response
+        return wrapper
+    return decorator
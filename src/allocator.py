@@ -0,0 +1,340 @@
+"""Allocation des identités réseau des UE : identifiant, SD et sous-réseau.
+
+Une identité (DNN ``oai-ue{id}``, S-NSSAI ``sst``/``sd``, plage IP) est
+réservée une fois par UE ; la même alimente la config UERANSIM, le manifeste
+de l'UPF et la notification SMF. Trois espaces sont gérés par des tables de
+bits :
+
+* identifiants ``1..UE_ID_MAX`` (``allocate()`` pour un nouvel UE) ;
+* SD ``000001..UE_SD_MAX`` (six chiffres, comme avant) ;
+* sous-réseaux ``/UE_SUBNET_PREFIX`` découpés dans ``UE_SUBNET_POOL``.
+
+Réservation et libération sont en O(1) amorti : un emplacement libéré est
+remis en file (réutilisé après les autres libérés, le plus ancien d'abord),
+sinon le prochain jamais attribué est pris. Un UE ``n`` obtient de préférence
+le SD ``n`` et la plage ``12.1.n.0/24`` si elle est dans le pool, ce qui
+conserve les valeurs historiques des petits déploiements.
+
+Avec ``store`` (``StateStore``), chaque réservation est écrite dans la table
+``allocations`` dont les contraintes d'unicité détectent les collisions, y
+compris avec un autre worker : l'emplacement est alors marqué pris et un
+autre est choisi. Les libérations d'un autre worker sont prises en compte
+en relisant la table : ``release()`` d'un UE réservé ailleurs lit son identité
+en base, et un espace épuisé est reconstruit depuis la table (``refresh()``)
+avant de lever ``PoolExhausted``. Au premier démarrage, les identités déjà enregistrées dans
+la base d'état sont importées ; celles invalides ou en collision (ex : plage
+``12.1.300.0/24``) sont réattribuées.
+"""
+import ipaddress
+import os
+import threading
+from collections import deque
+
+try:
+    UE_ID_MAX = int(os.environ.get("UE_ID_MAX", "100000"))
+except Exception:
+    UE_ID_MAX = 100000
+try:
+    UE_SD_MAX = min(int(os.environ.get("UE_SD_MAX", "999999")), 999999)
+except Exception:
+    UE_SD_MAX = 999999
+UE_SUBNET_POOL = os.environ.get("UE_SUBNET_POOL", "12.0.0.0/8")
+try:
+    UE_SUBNET_PREFIX = int(os.environ.get("UE_SUBNET_PREFIX", "24"))
+except Exception:
+    UE_SUBNET_PREFIX = 24
+
+UE_SST = 1
+
+
+class PoolExhausted(Exception):
+    """Plus aucun identifiant, SD ou sous-réseau libre."""
+
+
+class SlotBitmap:
+    """Emplacements ``0..size-1`` libres ou pris (un bit chacun), sans verrou propre."""
+
+    def __init__(self, size):
+        self.size = max(0, size)
+        self.used = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        # Prochain emplacement jamais attribué, et emplacements libérés à réutiliser
+        self._next = 0
+        self._freed = deque()
+
+    def taken(self, slot):
+        return bool(self._bits[slot >> 3] & (1 << (slot & 7)))
+
+    def take(self, slot):
+        """Marque ``slot`` pris ; retourne False s'il l'était déjà (collision) ou hors limites."""
+        if not 0 <= slot < self.size or self.taken(slot):
+            return False
+        self._bits[slot >> 3] |= 1 << (slot & 7)
+        self.used += 1
+        return True
+
+    def allocate(self, preferred=None):
+        """Prend ``preferred`` s'il est libre, sinon un emplacement libre ; None si tout est pris."""
+        if preferred is not None and self.take(preferred):
+            return preferred
+        # Les emplacements libérés puis repris explicitement (take) sont ignorés ici
+        while self._freed:
+            slot = self._freed.popleft()
+            if self.take(slot):
+                return slot
+        while self._next < self.size:
+            slot = self._next
+            self._next += 1
+            if self.take(slot):
+                return slot
+        return None
+
+    def release(self, slot):
+        if 0 <= slot < self.size and self.taken(slot):
+            self._bits[slot >> 3] &= ~(1 << (slot & 7))
+            self.used -= 1
+            self._freed.append(slot)
+
+    def full(self):
+        return self.used >= self.size
+
+    def stats(self):
+        return {"size": self.size, "used": self.used}
+
+
+class IdentityAllocator:
+    def __init__(self, store=None, in_use=None, id_max=UE_ID_MAX, sd_max=UE_SD_MAX, subnet_pool=UE_SUBNET_POOL,
+                 subnet_prefix=UE_SUBNET_PREFIX):
+        self.store = store
+        # in_use(ue_id) : identifiant déjà pris hors allocateur (ex : UE connu du registre)
+        self.in_use = in_use
+        self.subnet_pool = ipaddress.IPv4Network(subnet_pool)
+        if not self.subnet_pool.prefixlen <= subnet_prefix <= 32:
+            raise ValueError(f"préfixe /{subnet_prefix} incompatible avec le pool {subnet_pool}")
+        self.subnet_prefix = subnet_prefix
+        self._ids = SlotBitmap(id_max)
+        self._sds = SlotBitmap(sd_max)
+        self._subnets = SlotBitmap(1 << (subnet_prefix - self.subnet_pool.prefixlen))
+        self._records = {}
+        self.collisions = 0
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    # --- correspondance emplacement <-> valeur --------------------------------
+
+    def _sd(self, slot):
+        return f"{slot + 1:06d}"
+
+    def _sd_slot(self, sd):
+        return int(sd) - 1 if sd and sd.isdigit() else None
+
+    def _ip_range(self, slot):
+        address = self.subnet_pool.network_address + (slot << (32 - self.subnet_prefix))
+        return f"{address}/{self.subnet_prefix}"
+
+    def _subnet_slot(self, ip_range):
+        """Emplacement de ``ip_range`` dans le pool ; None si la plage est invalide ou hors pool."""
+        try:
+            network = ipaddress.IPv4Network(ip_range or "")
+        except ValueError:
+            return None
+        if network.prefixlen != self.subnet_prefix or not network.subnet_of(self.subnet_pool):
+            return None
+        return (int(network.network_address) - int(self.subnet_pool.network_address)) >> (32 - self.subnet_prefix)
+
+    def _legacy_slots(self, ue_id):
+        """Emplacements historiques (SD ``n``, ``12.1.n.0/24``) préférés pour l'UE ``n``."""
+        sd_slot = ue_id - 1 if 1 <= ue_id <= self._sds.size else None
+        subnet_slot = self._subnet_slot(f"12.1.{ue_id}.0/24") if ue_id <= 255 else None
+        return sd_slot, subnet_slot
+
+    def _identity(self, ue_id, sd, ip_range):
+        return {"dnn": f"oai-ue{ue_id}", "ip_range": ip_range, "sst": UE_SST, "sd": sd}
+
+    # --- chargement ------------------------------------------------------------
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded or self.store is None:
+                self._loaded = True
+                return
+            for ue_id, sd, ip_range in self.store.allocations():
+                self._adopt(ue_id, sd, ip_range)
+            if self.store.get_meta("allocations_imported") is None:
+                self._import_legacy()
+            self._loaded = True
+
+    def _adopt(self, ue_id, sd, ip_range):
+        """Marque pris l'identité ``(sd, ip_range)`` réservée (par ce processus ou un autre)."""
+        self._ids.take(ue_id - 1)
+        sd_slot, subnet_slot = self._sd_slot(sd), self._subnet_slot(ip_range)
+        if sd_slot is not None:
+            self._sds.take(sd_slot)
+        if subnet_slot is not None:
+            self._subnets.take(subnet_slot)
+        self._records[ue_id] = self._identity(ue_id, sd, ip_range)
+        return self._records[ue_id]
+
+    def _import_legacy(self):
+        """Reprend les identités de la base d'état ; réattribue les invalides et les doublons."""
+        changed = {}
+        for ue_id, sd, ip_range in self.store.identities():
+            if ue_id in self._records:
+                continue
+            sd_slot, subnet_slot = self._sd_slot(sd), self._subnet_slot(ip_range)
+            identity = None
+            if sd_slot is not None and subnet_slot is not None:
+                identity = self._reserve(ue_id, sd_slot, subnet_slot, exact=True)
+            if identity is None:
+                if sd is not None or ip_range is not None:
+                    self.collisions += 1
+                    print(f"Identité de l'UE {ue_id} invalide ou en collision (sd={sd}, ip_range={ip_range}) : "
+                          f"réattribuée")
+                identity = self._reserve(ue_id)
+                changed[ue_id] = {"sd": identity["sd"], "ip_range": identity["ip_range"]}
+        if changed:
+            self.store.update_many(changed)
+        self.store.set_meta("allocations_imported", len(self._records))
+
+    # --- réservation -----------------------------------------------------------
+
+    def _reserve(self, ue_id, sd_slot=None, subnet_slot=None, exact=False, fresh=False):
+        """Réserve un SD et un sous-réseau pour ``ue_id`` (appelé sous ``self._lock``).
+
+        ``exact`` : uniquement les emplacements donnés (None s'ils sont pris).
+        ``fresh`` : None si ``ue_id`` a déjà été réservé par un autre worker.
+        """
+        if sd_slot is None and subnet_slot is None and not exact:
+            sd_slot, subnet_slot = self._legacy_slots(ue_id)
+        while True:
+            sd = self._sds.allocate(sd_slot) if not exact else (sd_slot if self._sds.take(sd_slot) else None)
+            if sd is None:
+                if exact:
+                    return None
+                raise PoolExhausted(f"plus aucun SD libre ({self._sds.size})")
+            subnet = (self._subnets.allocate(subnet_slot) if not exact
+                      else (subnet_slot if self._subnets.take(subnet_slot) else None))
+            if subnet is None:
+                self._sds.release(sd)
+                if exact:
+                    return None
+                raise PoolExhausted(f"plus aucun sous-réseau libre dans {self.subnet_pool}")
+            identity = self._identity(ue_id, self._sd(sd), self._ip_range(subnet))
+            conflict = (self.store.insert_allocation(ue_id, identity["sd"], identity["ip_range"])
+                        if self.store is not None else None)
+            if conflict is None:
+                self._ids.take(ue_id - 1)
+                self._records[ue_id] = identity
+                return identity
+            # Collision : l'emplacement en conflit reste marqué pris (réservé ailleurs)
+            self.collisions += 1
+            if conflict != "sd":
+                self._sds.release(sd)
+            if conflict != "ip_range":
+                self._subnets.release(subnet)
+            if conflict == "ue_id":
+                row = self.store.allocation(ue_id)
+                if row is not None:
+                    identity = self._adopt(*row)
+                    return None if fresh else identity
+                # Libéré entre-temps par l'autre worker : nouvel essai
+            if exact:
+                return None
+            sd_slot = subnet_slot = None
+
+    def allocate(self):
+        """Réserve un identifiant libre (libéré ou jamais attribué) et son identité ; le retourne."""
+        self._ensure_loaded()
+        with self._lock:
+            try:
+                return self._allocate()
+            except PoolExhausted:
+                if self.store is None:
+                    raise
+                # Des emplacements ont pu être libérés par un autre worker
+                self.refresh()
+                return self._allocate()
+
+    def _allocate(self):
+        # Appelé sous self._lock ; SD et sous-réseaux vérifiés avant de prendre un identifiant,
+        # qui resterait sinon en tête de réutilisation
+        if self._sds.full():
+            raise PoolExhausted(f"plus aucun SD libre ({self._sds.size})")
+        if self._subnets.full():
+            raise PoolExhausted(f"plus aucun sous-réseau libre dans {self.subnet_pool}")
+        while True:
+            slot = self._ids.allocate()
+            if slot is None:
+                raise PoolExhausted(f"plus aucun identifiant d'UE libre ({self._ids.size})")
+            ue_id = slot + 1
+            if self.in_use is not None and self.in_use(ue_id):
+                # UE existant sans identité réservée : il l'obtiendra via identity()
+                continue
+            try:
+                if self._reserve(ue_id, fresh=True) is not None:
+                    return ue_id
+            except PoolExhausted:
+                self._ids.release(slot)
+                raise
+
+    def identity(self, ue_id):
+        """Identité réseau de l'UE ``ue_id`` : ``{dnn, ip_range, sst, sd}`` (réservée au premier appel)."""
+        self._ensure_loaded()
+        identity = self._records.get(ue_id)
+        if identity is not None:
+            return identity
+        with self._lock:
+            return self._records.get(ue_id) or self._reserve(ue_id)
+
+    def release(self, ue_ids):
+        """Libère l'identifiant, le SD et le sous-réseau des ``ue_ids`` (une transaction en base)."""
+        self._ensure_loaded()
+        ue_ids = list(ue_ids)
+        with self._lock:
+            for ue_id in ue_ids:
+                identity = self._records.pop(ue_id, None)
+                if identity is None and self.store is not None:
+                    # Réservé par un autre worker : identité lue en base (ses emplacements ont pu être
+                    # marqués pris ici lors d'une collision)
+                    row = self.store.allocation(ue_id)
+                    identity = self._identity(*row) if row is not None else None
+                if identity is None:
+                    continue
+                self._ids.release(ue_id - 1)
+                sd_slot, subnet_slot = self._sd_slot(identity["sd"]), self._subnet_slot(identity["ip_range"])
+                if sd_slot is not None:
+                    self._sds.release(sd_slot)
+                if subnet_slot is not None:
+                    self._subnets.release(subnet_slot)
+            if self.store is not None and ue_ids:
+                self.store.delete_allocations(ue_ids)
+
+    def refresh(self):
+        """Reconstruit les tables de bits depuis la table ``allocations`` (réservations de tous les workers)."""
+        if self.store is None:
+            return
+        with self._lock:
+            self._ids = SlotBitmap(self._ids.size)
+            self._sds = SlotBitmap(self._sds.size)
+            self._subnets = SlotBitmap(self._subnets.size)
+            self._records = {}
+            for ue_id, sd, ip_range in self.store.allocations():
+                self._adopt(ue_id, sd, ip_range)
+            self._loaded = True
+
+    def __contains__(self, ue_id):
+        self._ensure_loaded()
+        return ue_id in self._records
+
+    def stats(self):
+        self._ensure_loaded()
+        with self._lock:
+            return {
+                "allocated": len(self._records),
+                "collisions": self.collisions,
+                "ids": self._ids.stats(),
+                "sds": self._sds.stats(),
+                "subnets": {"pool": str(self.subnet_pool), "prefix": self.subnet_prefix, **self._subnets.stats()},
+            }
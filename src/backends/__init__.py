@@ -0,0 +1,49 @@
+"""Backends de provisionnement des ressources UE/UPF.
+
+* ``kubernetes`` : ressources écrites dans le cluster (client ``kubernetes``
+  importé au premier appel) ;
+* ``memory`` : ressources en mémoire avec latence d'API simulée (benchmarks) ;
+* ``dryrun`` : enregistre les appels d'écriture prévus, sans cluster.
+
+Le backend du processus est choisi au démarrage par ``PROVISIONING_BACKEND``
+(``kubernetes`` par défaut, ``dryrun`` en DEMO_MODE). Seul le module du backend
+choisi est importé.
+"""
+import importlib
+import os
+import threading
+
+from src.backends.base import KINDS, Backend  # noqa: F401
+
+BACKENDS = {
+    "kubernetes": ("src.backends.kubernetes", "KubernetesBackend"),
+    "memory": ("src.backends.memory", "MemoryBackend"),
+    "dryrun": ("src.backends.dryrun", "DryRunBackend"),
+}
+
+PROVISIONING_BACKEND = os.environ.get("PROVISIONING_BACKEND", "").strip().lower() or (
+    "dryrun" if os.environ.get("DEMO_MODE", "0").lower() in ("1", "true", "yes") else "kubernetes")
+
+
+def create_backend(name, **options):
+    """Instancie le backend ``name`` (importe son module à ce moment seulement)."""
+    try:
+        module, class_name = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"backend inconnu : {name} (attendu : {', '.join(BACKENDS)})") from None
+    return getattr(importlib.import_module(module), class_name)(**options)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Retourne le backend du processus (``PROVISIONING_BACKEND``, créé au premier appel)."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(PROVISIONING_BACKEND)
+    return _backend
+
@@ -0,0 +1,60 @@
+"""Interface commune des backends de provisionnement.
+
+Un backend crée, lit, liste et supprime les ressources d'un UE (ConfigMap de
+configuration, Pod UERANSIM) et de son UPF (Deployment, Service). Les objets
+sont échangés sous forme de dicts (manifestes bruts, comme dans les caches
+watch).
+"""
+
+# Ressources gérées par le contrôleur
+KINDS = ("ConfigMap", "Pod", "Deployment", "Service")
+
+# (clé du rapport de suppression, type, sélecteur de base)
+TEARDOWN_KINDS = (
+    ("pods", "Pod", "app=ueransim-ue"),
+    ("configmaps", "ConfigMap", "app=ueransim-ue"),
+    ("deployments", "Deployment", "app=upf"),
+    ("services", "Service", "app=upf"),
+)
+
+
+class Backend:
+    """Opérations sur les ressources UE/UPF.
+
+    ``cluster_api`` indique que le backend passe par l'API Kubernetes partagée
+    (``get_gateway``) : les fonctions qui l'utilisent directement (caches watch,
+    warm pool, ConfigMaps partagés, UE groupés) ne sont actives qu'avec lui.
+    """
+
+    name = None
+    cluster_api = False
+
+    def apply(self, body, live=None, cached=False):
+        """Crée ou met à jour ``body`` ; retourne l'action (``created``, ``patched``, ``unchanged``...).
+
+        ``live``/``cached`` : objet courant connu d'un cache watch (voir ``src.reconcile.apply``).
+        """
+        raise NotImplementedError
+
+    def get(self, kind, name):
+        """Objet ``kind``/``name``, ou None s'il n'existe pas."""
+        raise NotImplementedError
+
+    def delete(self, kind, name):
+        """Supprime ``kind``/``name`` ; retourne False s'il n'existait pas."""
+        raise NotImplementedError
+
+    def list(self, kind, selector=None):
+        """Objets ``kind`` filtrés par sélecteur de labels : ``(objets, nombre de pages lues)``."""
+        raise NotImplementedError
+
+    def teardown(self, ue_ids=None):
+        """Supprime les ressources de ``ue_ids`` (tous les UE si None), par type.
+
+        Retourne ``{"removed": {clé: [noms]}, "api_calls": n, "errors": [...]}``
+        (clés de ``TEARDOWN_KINDS``).
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
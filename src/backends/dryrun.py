@@ -0,0 +1,52 @@
+"""Backend « dry-run » : enregistre les appels d'écriture qui seraient faits.
+
+Aucune requête ne part vers un cluster : l'état est simulé en mémoire, sans
+latence, pour que le plan reste exact (un manifeste déjà appliqué donne
+``unchanged``, une suppression d'objet absent est signalée). Les
+``DRYRUN_MAX_CALLS`` derniers appels prévus sont consultables via ``planned()``
+(et ``GET /api/k8s-stats``). C'est le backend par défaut en DEMO_MODE.
+"""
+import os
+from collections import deque
+
+from src.backends.memory import MemoryBackend
+
+try:
+    DRYRUN_MAX_CALLS = int(os.environ.get("DRYRUN_MAX_CALLS", "1000"))
+except Exception:
+    DRYRUN_MAX_CALLS = 1000
+
+WRITE_VERBS = ("create", "patch", "delete", "deletecollection")
+
+
+class DryRunBackend(MemoryBackend):
+    name = "dryrun"
+
+    def __init__(self, max_calls=DRYRUN_MAX_CALLS, verbose=True):
+        super().__init__(latency=0.0, jitter=0.0)
+        self.verbose = verbose
+        self._planned = deque(maxlen=max(1, max_calls))
+
+    def _call(self, verb, kind, name=None, selector=None):
+        super()._call(verb, kind, name, selector)
+        if verb not in WRITE_VERBS:
+            return
+        call = {"verb": verb, "kind": kind}
+        if name is not None:
+            call["name"] = name
+        if selector is not None:
+            call["selector"] = selector
+        with self._lock:
+            self._planned.append(call)
+        if self.verbose:
+            print(f"[dry-run] {verb} {kind} {name or selector}")
+
+    def planned(self):
+        """Derniers appels d'écriture prévus, du plus ancien au plus récent."""
+        with self._lock:
+            return list(self._planned)
+
+    def stats(self):
+        stats = super().stats()
+        stats["planned"] = self.planned()
+        return stats
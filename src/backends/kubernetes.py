@@ -0,0 +1,52 @@
+"""Backend Kubernetes : les ressources sont écrites dans le cluster.
+
+S'appuie sur la passerelle partagée (``src.k8s_gateway``, client importé au
+premier appel), l'application idempotente des manifestes (``src.reconcile``),
+les LIST paginés (``src.informer``) et la suppression par sélecteur
+(``src.teardown``).
+"""
+from src import reconcile, teardown
+from src.backends.base import Backend
+from src.informer import list_paginated
+from src.k8s_gateway import NAMESPACE, get_gateway
+
+LIST_METHODS = {
+    "ConfigMap": lambda gw: gw.core_v1.list_namespaced_config_map,
+    "Pod": lambda gw: gw.core_v1.list_namespaced_pod,
+    "Deployment": lambda gw: gw.apps_v1.list_namespaced_deployment,
+    "Service": lambda gw: gw.core_v1.list_namespaced_service,
+}
+
+
+class KubernetesBackend(Backend):
+    name = "kubernetes"
+    cluster_api = True
+
+    def __init__(self, namespace=NAMESPACE):
+        self.namespace = namespace
+
+    def apply(self, body, live=None, cached=False):
+        return reconcile.apply(body, live=live, namespace=self.namespace, cached=cached)
+
+    def get(self, kind, name):
+        return reconcile.read(kind, name, self.namespace)
+
+    def delete(self, kind, name):
+        gw = get_gateway()
+        try:
+            gw.call(reconcile.KINDS[kind][3](gw), name=name, namespace=self.namespace)
+        except Exception as e:
+            if getattr(e, "status", None) != 404:
+                raise
+            return False
+        return True
+
+    def list(self, kind, selector=None):
+        items, _, pages = list_paginated(LIST_METHODS[kind](get_gateway()), self.namespace, selector)
+        return items, pages
+
+    def teardown(self, ue_ids=None):
+        return teardown.teardown_cluster(ue_ids)
+
+    def stats(self):
+        return get_gateway().stats()
@@ -0,0 +1,159 @@
+"""Backend en mémoire : ressources gardées dans des dicts, latence d'API simulée.
+
+Pour les benchmarks et le développement sans cluster. Chaque appel (lecture,
+LIST, écriture) attend ``MEMORY_BACKEND_LATENCY`` secondes, plus un aléa
+jusqu'à ``MEMORY_BACKEND_JITTER``, comme un aller-retour vers l'API server.
+Les objets portent la même empreinte ``nexslice.io/spec-hash`` qu'en cluster ;
+Pods et Deployments sont prêts dès leur création.
+"""
+import copy
+import os
+import random
+import threading
+import time
+
+from src.backends.base import KINDS, TEARDOWN_KINDS, Backend
+from src.reconcile import APPLY_TOTAL, SPEC_HASH_ANNOTATION, is_subset, stamped
+
+try:
+    MEMORY_BACKEND_LATENCY = float(os.environ.get("MEMORY_BACKEND_LATENCY", "0"))
+    MEMORY_BACKEND_JITTER = float(os.environ.get("MEMORY_BACKEND_JITTER", "0"))
+except Exception:
+    MEMORY_BACKEND_LATENCY, MEMORY_BACKEND_JITTER = 0.0, 0.0
+
+
+def parse_selector(selector):
+    """Sélecteur ``k=v``, ``k!=v``, ``k``, ``k in (a,b)`` → liste de ``(clé, opérateur, valeurs)``."""
+    predicates, depth, term = [], 0, ""
+    for char in (selector or "") + ",":
+        depth += char == "("
+        depth -= char == ")"
+        if char == "," and depth == 0:
+            term = term.strip()
+            if " in " in term:
+                key, values = term.split(" in ", 1)
+                predicates.append((key.strip(), "in", {v.strip() for v in values.strip("() ").split(",")}))
+            elif "!=" in term:
+                key, value = term.split("!=", 1)
+                predicates.append((key.strip(), "!=", {value.strip()}))
+            elif "=" in term:
+                key, value = term.split("=", 1)
+                predicates.append((key.strip(), "in", {value.strip().lstrip("=")}))
+            elif term:
+                predicates.append((term, "exists", None))
+            term = ""
+        else:
+            term += char
+    return predicates
+
+
+def matches(obj, predicates):
+    labels = (obj.get("metadata") or {}).get("labels") or {}
+    for key, op, values in predicates:
+        if op == "exists" and key not in labels:
+            return False
+        if op == "in" and labels.get(key) not in values:
+            return False
+        if op == "!=" and labels.get(key) in values:
+            return False
+    return True
+
+
+class MemoryBackend(Backend):
+    name = "memory"
+
+    def __init__(self, latency=MEMORY_BACKEND_LATENCY, jitter=MEMORY_BACKEND_JITTER, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.objects = {kind: {} for kind in KINDS}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._version = 0
+        # verbe -> nombre d'appels
+        self._calls = {}
+
+    def _call(self, verb, kind, name=None, selector=None):
+        """Compte un appel simulé et attend sa latence."""
+        with self._lock:
+            self._calls[verb] = self._calls.get(verb, 0) + 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _stored(self, body):
+        obj = copy.deepcopy(body)
+        self._version += 1
+        metadata = obj["metadata"]
+        metadata.setdefault("creationTimestamp", time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+        metadata["resourceVersion"] = str(self._version)
+        if obj["kind"] == "Deployment":
+            replicas = (obj.get("spec") or {}).get("replicas") or 1
+            obj["status"] = {"replicas": replicas, "readyReplicas": replicas, "availableReplicas": replicas}
+        elif obj["kind"] == "Pod":
+            obj["status"] = {"phase": "Running", "conditions": [{"type": "Ready", "status": "True"}]}
+        return obj
+
+    def apply(self, body, live=None, cached=False):
+        desired = stamped(body)
+        kind, name = desired["kind"], desired["metadata"]["name"]
+        digest = desired["metadata"]["annotations"][SPEC_HASH_ANNOTATION]
+        if live is None and not cached:
+            self._call("read", kind, name)
+        with self._lock:
+            current = self.objects[kind].get(name)
+            if current is None:
+                action = "created"
+            elif (current["metadata"].get("annotations") or {}).get(SPEC_HASH_ANNOTATION) == digest \
+                    and is_subset(desired, current):
+                action = "unchanged"
+            else:
+                action = "patched"
+            if action != "unchanged":
+                self.objects[kind][name] = self._stored(desired)
+        if action != "unchanged":
+            self._call("create" if action == "created" else "patch", kind, name)
+        APPLY_TOTAL.labels(kind=kind, action=action).inc()
+        return action
+
+    def get(self, kind, name):
+        self._call("read", kind, name)
+        with self._lock:
+            obj = self.objects[kind].get(name)
+            return copy.deepcopy(obj) if obj is not None else None
+
+    def delete(self, kind, name):
+        self._call("delete", kind, name)
+        with self._lock:
+            return self.objects[kind].pop(name, None) is not None
+
+    def list(self, kind, selector=None):
+        self._call("list", kind, selector=selector)
+        predicates = parse_selector(selector)
+        with self._lock:
+            items = [copy.deepcopy(obj) for _, obj in sorted(self.objects[kind].items()) if matches(obj, predicates)]
+        return items, 1
+
+    def teardown(self, ue_ids=None):
+        wanted = None if ue_ids is None else {str(ue_id) for ue_id in ue_ids}
+        removed, calls = {}, 0
+        for key, kind, selector in TEARDOWN_KINDS:
+            # Un deletecollection par type, qui retourne les objets supprimés
+            calls += 1
+            self._call("deletecollection", kind, selector=selector)
+            predicates = parse_selector(selector)
+            with self._lock:
+                names = [name for name, obj in self.objects[kind].items() if matches(obj, predicates) and (
+                    wanted is None or obj["metadata"].get("labels", {}).get("ue-id") in wanted)]
+                for name in names:
+                    del self.objects[kind][name]
+            removed[key] = sorted(names)
+        return {"removed": removed, "api_calls": calls, "errors": []}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "latency_s": self.latency,
+                "jitter_s": self.jitter,
+                "calls": dict(self._calls),
+                "objects": {kind: len(objects) for kind, objects in self.objects.items()},
+            }
@@ -0,0 +1,70 @@
+"""Journal des changements d'UE/UPF, numérotés par un compteur de version.
+
+Chaque ajout ou retrait d'UE dans le registre, changement de phase ou de
+nombre d'UPF est publié une fois dans le journal et reçoit une version
+croissante. La version sert d'ETag aux listes (une requête ``If-None-Match``
+sur une version inchangée répond 304 sans rien recalculer) et de curseur au
+flux SSE : un client qui se reconnecte avec ``Last-Event-ID`` ne reçoit que
+les changements suivants, tant qu'ils sont encore dans les
+``UE_CHANGES_HISTORY`` derniers.
+
+``epoch`` (tiré au démarrage) distingue les processus : une version d'un
+autre worker ou d'avant un redémarrage n'est jamais confondue avec la nôtre.
+"""
+import os
+import threading
+import uuid
+from collections import deque
+
+try:
+    UE_CHANGES_HISTORY = int(os.environ.get("UE_CHANGES_HISTORY", "1000"))
+except Exception:
+    UE_CHANGES_HISTORY = 1000
+
+
+class ChangeFeed:
+    def __init__(self, history=UE_CHANGES_HISTORY):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._events = deque(maxlen=max(1, history))
+        self._cond = threading.Condition()
+
+    def publish(self, event):
+        """Ajoute ``event`` (dict) au journal ; retourne sa version."""
+        with self._cond:
+            self.version += 1
+            self._events.append((self.version, event))
+            self._cond.notify_all()
+            return self.version
+
+    def token(self, version=None):
+        """Identifiant ``<epoch>-<version>`` (ETag, ``id`` des événements SSE)."""
+        return f"{self.epoch}-{self.version if version is None else version}"
+
+    def parse_token(self, token):
+        """Version d'un identifiant de ``token()``, ou None s'il vient d'un autre processus."""
+        epoch, _, version = (token or "").partition("-")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        return int(version)
+
+    def since(self, version):
+        """Changements postérieurs à ``version`` : liste de ``(version, événement)``.
+
+        None si le client doit repartir d'un instantané (version inconnue ou
+        changements déjà sortis du journal).
+        """
+        with self._cond:
+            if version is None or version > self.version:
+                return None
+            if version == self.version:
+                return []
+            if not self._events or self._events[0][0] > version + 1:
+                return None
+            return [(v, event) for v, event in self._events if v > version]
+
+    def wait(self, version, timeout):
+        """Attend une version différente de ``version`` (au plus ``timeout`` s) ; retourne la version courante."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version, timeout)
+            return self.version
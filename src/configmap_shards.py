@@ -0,0 +1,172 @@
+"""ConfigMaps partagés (« shards ») regroupant les configurations de plusieurs UE.
+
+Au lieu d'un ConfigMap ``ueransim-ue{id}-config`` par UE, les configs sont
+rangées sous la clé ``ue{id}.yaml`` d'un ConfigMap ``ueransim-shard-{n}``
+couvrant ``shard_size`` identifiants consécutifs. Le Pod UE ne monte que sa
+propre clé (``items``), renommée en ``ue.yaml``.
+
+Les ajouts et retraits de clés sont mis en attente puis regroupés par un
+thread d'écriture : une rafale de connexions devient un PATCH (merge) par
+shard touché au lieu d'une création par UE. Retirer une clé se fait en la
+mettant à ``null`` dans le patch.
+
+Le mode UE groupés (``UE_GROUP_SIZE``) réutilise ce stockage avec le préfixe
+``ueransim-group-`` : le Pod du groupe monte alors toutes les clés.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client import Counter
+
+from src.k8s_gateway import NAMESPACE, get_gateway
+from src.renderer import render_shard_configmap
+
+try:
+    CONFIGMAP_SHARD_SIZE = int(os.environ.get("CONFIGMAP_SHARD_SIZE", "0"))
+    CONFIGMAP_SHARD_FLUSH_INTERVAL = float(os.environ.get("CONFIGMAP_SHARD_FLUSH_INTERVAL", "0.05"))
+    CONFIGMAP_SHARD_WAIT = float(os.environ.get("CONFIGMAP_SHARD_WAIT", "10"))
+except Exception:
+    CONFIGMAP_SHARD_SIZE, CONFIGMAP_SHARD_FLUSH_INTERVAL, CONFIGMAP_SHARD_WAIT = 0, 0.05, 10.0
+
+SHARD_WRITES = Counter('nexslice_configmap_shard_writes_total', 'Ecritures de ConfigMaps partagés', ['action'])
+SHARD_KEYS = Counter('nexslice_configmap_shard_keys_total', 'Clés UE écrites dans les ConfigMaps partagés', ['op'])
+
+
+def shard_of(ue_id, shard_size):
+    return (ue_id - 1) // shard_size
+
+
+def shard_name(shard, prefix="ueransim-shard-"):
+    return f"{prefix}{shard}"
+
+
+def shard_key(ue_id):
+    return f"ue{ue_id}.yaml"
+
+
+class ShardWrite:
+    """Résultat d'une écriture de shard, partagé par toutes les clés du lot."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+    def wait(self, timeout=None):
+        """True si la clé est écrite dans le délai et sans erreur."""
+        return self.done.wait(timeout) and self.error is None
+
+    def finish(self, error=None):
+        self.error = error
+        self.done.set()
+
+
+class ShardedConfigMaps:
+    def __init__(self, shard_size=CONFIGMAP_SHARD_SIZE, flush_interval=CONFIGMAP_SHARD_FLUSH_INTERVAL,
+                 namespace=NAMESPACE, prefix="ueransim-shard-"):
+        self.shard_size = max(1, shard_size)
+        self.prefix = prefix
+        self.flush_interval = flush_interval
+        self.namespace = namespace
+        # shard -> ({clé: contenu ou None}, ShardWrite du lot en attente)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def locate(self, ue_id):
+        """(nom du ConfigMap, clé) portant la config de ``ue_id``."""
+        return shard_name(shard_of(ue_id, self.shard_size), self.prefix), shard_key(ue_id)
+
+    def bounds(self, ue_id):
+        """Plage [lo, hi] des identifiants partageant le shard de ``ue_id``."""
+        lo = shard_of(ue_id, self.shard_size) * self.shard_size + 1
+        return lo, lo + self.shard_size - 1
+
+    def _stage(self, ue_id, content):
+        shard = shard_of(ue_id, self.shard_size)
+        data, write = self._pending.setdefault(shard, ({}, ShardWrite()))
+        data[shard_key(ue_id)] = content
+        return write
+
+    def put(self, ue_id, content):
+        """Met en attente la config de ``ue_id`` ; retourne le ``ShardWrite`` de son lot."""
+        with self._lock:
+            write = self._stage(ue_id, content)
+        self._kick()
+        return write
+
+    def remove(self, ue_ids):
+        """Met en attente le retrait des clés de ``ue_ids`` (sans attendre l'écriture)."""
+        with self._lock:
+            for ue_id in ue_ids:
+                self._stage(ue_id, None)
+        self._kick()
+
+    def depth(self):
+        with self._lock:
+            return sum(len(data) for data, _ in self._pending.values())
+
+    def _kick(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="configmap-shards", daemon=True)
+                    self._thread.start()
+        self._wakeup.set()
+
+    def _write_shard(self, shard, data):
+        gw = get_gateway()
+        name = shard_name(shard, self.prefix)
+        try:
+            gw.call(gw.core_v1.patch_namespaced_config_map, name=name, namespace=self.namespace,
+                    body={"data": data}, _preload_content=False)
+            SHARD_WRITES.labels(action="patched").inc()
+            return
+        except Exception as e:
+            if getattr(e, "status", None) != 404:
+                raise
+        present = {k: v for k, v in data.items() if v is not None}
+        if not present:
+            # Shard absent et uniquement des retraits : rien à faire
+            return
+        try:
+            gw.call(gw.core_v1.create_namespaced_config_map, namespace=self.namespace,
+                    body=render_shard_configmap(name, shard, present), _preload_content=False)
+            SHARD_WRITES.labels(action="created").inc()
+        except Exception as e:
+            if getattr(e, "status", None) != 409:
+                raise
+            # Créé entre-temps par un autre réplica : on fusionne
+            gw.call(gw.core_v1.patch_namespaced_config_map, name=name, namespace=self.namespace,
+                    body={"data": data}, _preload_content=False)
+            SHARD_WRITES.labels(action="patched").inc()
+
+    def _flush_one(self, shard, data, write):
+        try:
+            self._write_shard(shard, data)
+        except Exception as e:
+            print(f"Erreur écriture ConfigMap {shard_name(shard, self.prefix)}: {e}")
+            write.finish(str(e))
+            return
+        for content in data.values():
+            SHARD_KEYS.labels(op="put" if content is not None else "remove").inc()
+        write.finish()
+
+    def flush(self):
+        """Ecrit tous les shards en attente (un PATCH par shard) ; retourne leur nombre."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if not batch:
+            return 0
+        with ThreadPoolExecutor(max_workers=min(8, len(batch)), thread_name_prefix="shard-flush") as pool:
+            list(pool.map(lambda item: self._flush_one(item[0], *item[1]), batch.items()))
+        return len(batch)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # Laisser les connexions simultanées rejoindre le même lot
+            threading.Event().wait(self.flush_interval)
+            self.flush()
@@ -0,0 +1,116 @@
+"""Ingestion en flux d'événements de connexion/déconnexion d'UE (NDJSON).
+
+Un corps NDJSON (éventuellement envoyé en ``Transfer-Encoding: chunked``)
+contient un événement par ligne :
+
+    {"event": "connect", "ue_id": 1}
+    {"event": "disconnect", "ue_id": 2}
+
+Les lignes sont lues et validées au fil de l'eau, puis regroupées par lots de
+``UE_EVENTS_BATCH_SIZE`` : dans un lot, seul le dernier événement d'un UE est
+retenu (les précédents sont ``superseded``), et le lot est déposé en une fois
+dans la file de jobs. Un résultat par ligne est produit dès que son lot est
+traité : un gNB qui revient avec 2 000 UE envoie une requête au lieu de 2 000.
+"""
+import json
+import os
+from collections import Counter, OrderedDict
+
+try:
+    UE_EVENTS_BATCH_SIZE = int(os.environ.get("UE_EVENTS_BATCH_SIZE", "500"))
+    UE_EVENTS_MAX = int(os.environ.get("UE_EVENTS_MAX", "100000"))
+    UE_EVENTS_MAX_LINE = int(os.environ.get("UE_EVENTS_MAX_LINE", "4096"))
+except Exception:
+    UE_EVENTS_BATCH_SIZE, UE_EVENTS_MAX, UE_EVENTS_MAX_LINE = 500, 100000, 4096
+
+EVENT_KINDS = ("connect", "disconnect")
+
+
+def read_lines(stream, max_line=UE_EVENTS_MAX_LINE):
+    """Lignes non vides de ``stream`` avec leur numéro ; ``(n, None)`` pour une ligne trop longue."""
+    number = 0
+    while True:
+        raw = stream.readline(max_line + 1)
+        if not raw:
+            return
+        number += 1
+        if len(raw) > max_line:
+            # Ignorer le reste de la ligne sans la garder en mémoire
+            while raw and not raw.endswith(b"\n"):
+                raw = stream.readline(max_line + 1)
+            yield number, None
+            continue
+        line = raw.strip()
+        if line:
+            yield number, line
+
+
+def parse_event(line):
+    """Valide une ligne ; retourne ``(event, ue_id, None)`` ou ``(None, None, erreur)``."""
+    if line is None:
+        return None, None, f"ligne de plus de {UE_EVENTS_MAX_LINE} octets"
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None, None, "JSON invalide"
+    if not isinstance(data, dict):
+        return None, None, "objet JSON attendu"
+    event = data.get("event")
+    if event not in EVENT_KINDS:
+        return None, None, f"event doit valoir {' ou '.join(EVENT_KINDS)}"
+    ue_id = data.get("ue_id")
+    if not isinstance(ue_id, int) or isinstance(ue_id, bool) or ue_id <= 0:
+        return None, None, "ue_id entier positif requis"
+    return event, ue_id, None
+
+
+def ingest(stream, submit, batch_size=UE_EVENTS_BATCH_SIZE, max_events=UE_EVENTS_MAX):
+    """Lit les événements de ``stream`` et produit un résultat par ligne, puis un résumé.
+
+    ``submit([(event, ue_id), ...])`` dépose un lot et retourne, pour chaque
+    événement, le job créé (attribut ``id``) ou l'exception qui l'a refusé.
+    """
+    summary = Counter()
+    batch = OrderedDict()  # ue_id -> (ligne, event)
+    results = []
+
+    def flush():
+        items = list(batch.items())
+        batch.clear()
+        outcomes = submit([(event, ue_id) for ue_id, (_, event) in items]) if items else []
+        for (ue_id, (number, event)), outcome in zip(items, outcomes):
+            result = {"line": number, "event": event, "ue_id": ue_id}
+            if isinstance(outcome, Exception):
+                result.update(status="rejected", error=str(outcome))
+            else:
+                result.update(status="accepted", job_id=outcome.id)
+            results.append(result)
+        results.sort(key=lambda r: r["line"])
+        done = list(results)
+        results.clear()
+        for result in done:
+            summary[result["status"]] += 1
+        return done
+
+    truncated = False
+    count = 0
+    for number, line in read_lines(stream):
+        count += 1
+        if count > max_events:
+            truncated = True
+            results.append({"line": number, "status": "rejected",
+                            "error": f"limite de {max_events} événements par requête atteinte"})
+            break
+        event, ue_id, error = parse_event(line)
+        if error:
+            results.append({"line": number, "status": "rejected", "error": error})
+        else:
+            previous = batch.pop(ue_id, None)
+            if previous is not None:
+                results.append({"line": previous[0], "event": previous[1], "ue_id": ue_id,
+                                "status": "superseded", "superseded_by_line": number})
+            batch[ue_id] = (number, event)
+        if len(batch) >= batch_size or len(results) >= batch_size:
+            yield from flush()
+    yield from flush()
+    yield {"summary": {"lines": count, "truncated": truncated, **summary}}
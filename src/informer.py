@@ -0,0 +1,267 @@
+"""Caches locaux alimentés par watch (pattern « informer »).
+
+Un ``Informer`` fait un LIST initial d'une ressource filtrée par label, puis
+suit les changements avec un WATCH repris depuis le dernier
+``resourceVersion``. Si la version a expiré (410 Gone), il refait un LIST.
+Les objets sont conservés bruts (dicts JSON) et indexés par label ``ue-id`` :
+comptages, existence et readiness sont servis depuis la mémoire, sans appel
+à l'API.
+
+Les LIST sont paginés (``limit``/``continue``, ``LIST_PAGE_SIZE`` objets par
+page) : avec 10 000 UE, aucune réponse ne porte la collection entière.
+"""
+import json
+import os
+import threading
+import time
+
+from src.k8s_gateway import NAMESPACE, get_gateway
+
+try:
+    WATCH_TIMEOUT_SECONDS = int(os.environ.get("WATCH_TIMEOUT_SECONDS", "300"))
+except Exception:
+    WATCH_TIMEOUT_SECONDS = 300
+try:
+    LIST_PAGE_SIZE = int(os.environ.get("LIST_PAGE_SIZE", "500"))
+except Exception:
+    LIST_PAGE_SIZE = 500
+
+
+class ResourceExpired(Exception):
+    """Le resourceVersion du watch n'est plus disponible côté serveur (410)."""
+
+
+def list_paginated(fn, namespace=NAMESPACE, label_selector=None, page_size=None):
+    """LIST paginé : retourne ``(objets, resourceVersion, nombre de pages)``.
+
+    Le ``resourceVersion`` retenu est celui de la première page : un watch
+    repris depuis cette version rejoue tout changement survenu pendant la
+    pagination.
+    """
+    gw = get_gateway()
+    page_size = LIST_PAGE_SIZE if page_size is None else page_size
+    items, resource_version, pages, token = [], None, 0, None
+    while True:
+        kwargs = {"limit": page_size} if page_size > 0 else {}
+        if token:
+            kwargs["_continue"] = token
+        resp = gw.call(fn, namespace=namespace, label_selector=label_selector, _preload_content=False, **kwargs)
+        data = json.loads(resp.data)
+        pages += 1
+        items.extend(data.get("items") or [])
+        metadata = data.get("metadata") or {}
+        if resource_version is None:
+            resource_version = metadata.get("resourceVersion")
+        token = metadata.get("continue")
+        if not token:
+            return items, resource_version, pages
+
+
+def _iter_lines(resp):
+    buffer = b""
+    for chunk in resp.stream(4096, decode_content=False):
+        buffer += chunk
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+def ue_id_of(obj):
+    """Valeur entière du label ``ue-id`` d'un objet brut, ou None."""
+    labels = (obj.get("metadata") or {}).get("labels") or {}
+    try:
+        return int(labels.get("ue-id"))
+    except (TypeError, ValueError):
+        return None
+
+
+def deployment_ready(obj):
+    spec = obj.get("spec") or {}
+    status = obj.get("status") or {}
+    return (status.get("readyReplicas") or 0) >= max(1, spec.get("replicas") or 0)
+
+
+def pod_ready(obj):
+    status = obj.get("status") or {}
+    if status.get("phase") != "Running":
+        return False
+    conditions = status.get("conditions") or []
+    return any(c.get("type") == "Ready" and c.get("status") == "True" for c in conditions)
+
+
+POD_STATES = ("pending", "not_ready", "ready", "failed", "succeeded", "terminating", "unknown")
+
+
+def pod_state(obj):
+    """Etat résumé d'un Pod brut (une valeur de ``POD_STATES``)."""
+    if (obj.get("metadata") or {}).get("deletionTimestamp"):
+        return "terminating"
+    if pod_ready(obj):
+        return "ready"
+    phase = (obj.get("status") or {}).get("phase")
+    if phase == "Running":
+        return "not_ready"
+    if phase in ("Pending", "Failed", "Succeeded"):
+        return phase.lower()
+    return "unknown"
+
+
+class Informer:
+    """Cache d'une ressource namespacée, maintenu par LIST + WATCH.
+
+    ``list_fn(gateway)`` retourne la méthode ``list_namespaced_*`` à utiliser.
+    ``on_change(event_type, obj)`` est appelé après chaque mise à jour du cache.
+    """
+
+    def __init__(self, kind, list_fn, label_selector, namespace=NAMESPACE, on_change=None):
+        self.kind = kind
+        self.list_fn = list_fn
+        self.label_selector = label_selector
+        self.namespace = namespace
+        self.on_change = on_change
+        self.synced = threading.Event()
+        self.resource_version = None
+        self.relists = 0
+        self._objects = {}
+        self._by_ue = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    # --- lecture du cache -------------------------------------------------
+
+    def count(self):
+        with self._lock:
+            return len(self._objects)
+
+    def get(self, name):
+        with self._lock:
+            return self._objects.get(name)
+
+    def get_by_ue(self, ue_id):
+        with self._lock:
+            return [self._objects[n] for n in self._by_ue.get(ue_id, ())]
+
+    def has_ue(self, ue_id):
+        with self._lock:
+            return bool(self._by_ue.get(ue_id))
+
+    def ue_ids(self):
+        with self._lock:
+            return sorted(self._by_ue)
+
+    def items(self):
+        with self._lock:
+            return list(self._objects.values())
+
+    def wait_synced(self, timeout=None):
+        return self.synced.wait(timeout)
+
+    # --- mise à jour du cache ---------------------------------------------
+
+    def _index(self, obj):
+        name = obj["metadata"]["name"]
+        previous = self._objects.get(name)
+        if previous is not None:
+            self._unindex(previous)
+        self._objects[name] = obj
+        ue_id = ue_id_of(obj)
+        if ue_id is not None:
+            self._by_ue.setdefault(ue_id, set()).add(name)
+
+    def _unindex(self, obj):
+        name = obj["metadata"]["name"]
+        self._objects.pop(name, None)
+        ue_id = ue_id_of(obj)
+        names = self._by_ue.get(ue_id)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self._by_ue[ue_id]
+
+    def _notify(self, event_type, obj):
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(event_type, obj)
+        except Exception as e:
+            print(f"Erreur callback informer {self.kind}: {e}")
+
+    def apply_event(self, event_type, obj):
+        with self._lock:
+            if event_type == "DELETED":
+                self._unindex(obj)
+            else:
+                self._index(obj)
+        self._notify(event_type, obj)
+
+    def relist(self):
+        gw = get_gateway()
+        items, resource_version, _ = list_paginated(self.list_fn(gw), self.namespace, self.label_selector)
+        with self._lock:
+            self._objects = {}
+            self._by_ue = {}
+            for obj in items:
+                self._index(obj)
+        self.resource_version = resource_version
+        self.relists += 1
+        self.synced.set()
+        self._notify("SYNCED", None)
+
+    def watch_once(self):
+        """Suit le watch jusqu'à son expiration (``WATCH_TIMEOUT_SECONDS``)."""
+        gw = get_gateway()
+        resp = gw.call(self.list_fn(gw), namespace=self.namespace, label_selector=self.label_selector,
+                       watch=True, resource_version=self.resource_version, allow_watch_bookmarks=True,
+                       timeout_seconds=WATCH_TIMEOUT_SECONDS, _preload_content=False)
+        try:
+            for line in _iter_lines(resp):
+                if self._stop.is_set():
+                    return
+                event = json.loads(line)
+                event_type, obj = event.get("type"), event.get("object") or {}
+                if event_type == "ERROR":
+                    if obj.get("code") == 410:
+                        raise ResourceExpired(obj.get("message", ""))
+                    raise RuntimeError(f"watch {self.kind}: {obj.get('message', obj)}")
+                rv = (obj.get("metadata") or {}).get("resourceVersion")
+                if event_type != "BOOKMARK":
+                    self.apply_event(event_type, obj)
+                if rv:
+                    self.resource_version = rv
+        finally:
+            resp.close()
+            resp.release_conn()
+
+    # --- boucle de fond ---------------------------------------------------
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=f"informer-{self.kind}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                if self.resource_version is None:
+                    self.relist()
+                self.watch_once()
+                backoff = 1
+            except ResourceExpired:
+                self.resource_version = None
+            except Exception as e:
+                status = getattr(e, "status", None)
+                if status == 410:
+                    self.resource_version = None
+                    continue
+                print(f"Informer {self.kind}: {e} (nouvelle tentative dans {backoff}s)")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30)
@@ -0,0 +1,252 @@
+"""File de jobs asynchrone pour les opérations de cycle de vie des UE.
+
+Les endpoints HTTP déposent un job et répondent immédiatement (202) ; un pool
+borné de threads exécute ensuite les écritures Kubernetes et la notification
+SMF. L'état de chaque job (statut, durée des étapes, erreur) reste consultable
+dans un historique de taille limitée.
+
+Coalescence : un job soumis avec une clé (``ue:<id>``) remplace le job encore
+en attente de même clé, marqué ``superseded`` ; avec un délai (fenêtre
+d'anti-rebond), une rafale connexion/déconnexion/connexion d'un UE instable
+n'exécute que le dernier état demandé. Les jobs d'une même clé ne s'exécutent
+jamais en parallèle.
+
+La file vit dans la mémoire du processus : avec ``WEB_WORKERS`` > 1, la
+coalescence, l'anti-rebond et la sérialisation par clé ne valent qu'entre les
+requêtes reçues par un même worker. Deux événements d'un UE servis par deux
+workers donnent deux jobs qui peuvent s'exécuter en parallèle ; un émetteur
+qui en dépend doit passer par un seul worker.
+"""
+import heapq
+import itertools
+import math
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+try:
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "8"))
+except Exception:
+    JOB_WORKERS = 8
+try:
+    JOB_QUEUE_MAXSIZE = int(os.environ.get("JOB_QUEUE_MAXSIZE", "1000"))
+except Exception:
+    JOB_QUEUE_MAXSIZE = 1000
+try:
+    JOB_HISTORY = int(os.environ.get("JOB_HISTORY", "5000"))
+except Exception:
+    JOB_HISTORY = 5000
+
+
+class QueueFull(Exception):
+    """La file de jobs a atteint sa taille maximale."""
+
+
+# Délai avant nouvel essai d'un job dont la clé est déjà en cours d'exécution
+KEY_BUSY_RETRY = 0.05
+
+
+class Job:
+    def __init__(self, kind, ue_id, run, key=None, not_before=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.ue_id = ue_id
+        self.run = run
+        self.key = key
+        self.status = "queued"
+        self.created_at = time.time()
+        self.not_before = not_before
+        self.superseded_by = None
+        self.started_at = None
+        self.finished_at = None
+        self.timings_ms = {}
+        self.failed_step = None
+        self.error = None
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "ue_id": self.ue_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "not_before": self.not_before,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queue_wait_ms": round((self.started_at - self.created_at) * 1000, 3) if self.started_at else None,
+            "timings_ms": dict(self.timings_ms),
+            "failed_step": self.failed_step,
+            "error": self.error,
+            "superseded_by": self.superseded_by,
+        }
+
+
+class JobQueue:
+    """Pool de ``workers`` threads consommant une file bornée à ``maxsize`` jobs.
+
+    ``run(ue_id)`` doit retourner un rapport au format de
+    ``BulkProvisioner.provision_one`` (``ok``, ``timings_ms``, ``failed_step``,
+    ``error``). Les threads sont démarrés au premier ``submit``. Les jobs
+    différés (``delay``) comptent dans la taille de la file.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, maxsize=JOB_QUEUE_MAXSIZE, history=JOB_HISTORY):
+        self.workers = max(1, workers)
+        self.history = max(1, history)
+        self.maxsize = maxsize
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._running = 0
+        self._pending = {}
+        self._active_keys = set()
+        self._delayed = []
+        self._delayed_cond = threading.Condition(self._lock)
+        self._seq = itertools.count()
+        self._avg_duration = None
+
+    def _start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for n in range(self.workers):
+                t = threading.Thread(target=self._worker, name=f"job-worker-{n}", daemon=True)
+                t.start()
+                self._threads.append(t)
+            t = threading.Thread(target=self._scheduler, name="job-scheduler", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, kind, ue_id, run, key=None, delay=0):
+        """Dépose un job ; ``key`` remplace le job en attente de même clé, ``delay`` le diffère."""
+        job = self.submit_many([(kind, ue_id, run, key)], delay)[0]
+        if isinstance(job, QueueFull):
+            raise job
+        return job
+
+    def submit_many(self, requests, delay=0):
+        """Dépose un lot de jobs ``(kind, ue_id, run, key)`` sous un seul verrou.
+
+        Retourne, dans l'ordre, le ``Job`` créé ou l'exception ``QueueFull``
+        pour les jobs refusés une fois la file pleine.
+        """
+        self._start()
+        now = time.time()
+        not_before = now + delay if delay > 0 else None
+        results = []
+        with self._lock:
+            depth = self._depth()
+            for kind, ue_id, run, key in requests:
+                previous = self._pending.get(key) if key is not None else None
+                if previous is not None and previous.status == "queued":
+                    previous.status = "superseded"
+                    previous.finished_at = now
+                elif self.maxsize > 0 and depth >= self.maxsize:
+                    results.append(QueueFull(f"file de jobs pleine ({self.maxsize})"))
+                    continue
+                else:
+                    depth += 1
+                    previous = None
+                job = Job(kind, ue_id, run, key=key, not_before=not_before)
+                if previous is not None:
+                    previous.superseded_by = job.id
+                self._jobs[job.id] = job
+                if key is not None:
+                    self._pending[key] = job
+                if not_before is not None:
+                    self._schedule(job, not_before)
+                else:
+                    self._queue.put_nowait(job)
+                results.append(job)
+            while len(self._jobs) > self.history:
+                self._jobs.popitem(last=False)
+        return results
+
+    def _schedule(self, job, when):
+        # Appelé verrou tenu
+        heapq.heappush(self._delayed, (when, next(self._seq), job))
+        self._delayed_cond.notify()
+
+    def _depth(self):
+        return self._queue.qsize() + sum(1 for _, _, job in self._delayed if job.status == "queued")
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def depth(self):
+        with self._lock:
+            return self._depth()
+
+    def running(self):
+        return self._running
+
+    def busy(self, key):
+        """True si un job de clé ``key`` est en attente ou en cours d'exécution."""
+        with self._lock:
+            pending = self._pending.get(key)
+            return key in self._active_keys or (pending is not None and pending.status == "queued")
+
+    def retry_after(self):
+        """Estimation (s, entre 1 et 60) du temps nécessaire pour vider la file actuelle."""
+        with self._lock:
+            depth = self._depth()
+            avg = self._avg_duration or 1.0
+        return int(min(60, max(1, math.ceil(depth * avg / self.workers))))
+
+    def _scheduler(self):
+        while True:
+            with self._lock:
+                while not self._delayed or self._delayed[0][0] > time.time():
+                    timeout = self._delayed[0][0] - time.time() if self._delayed else None
+                    self._delayed_cond.wait(timeout)
+                _, _, job = heapq.heappop(self._delayed)
+                if job.status == "queued":
+                    self._queue.put_nowait(job)
+
+    def _claim(self, job):
+        """Réserve la clé du job ; False si le job est périmé ou sa clé déjà en cours."""
+        with self._lock:
+            if job.status != "queued":
+                return False
+            if job.key is not None:
+                if job.key in self._active_keys:
+                    self._schedule(job, time.time() + KEY_BUSY_RETRY)
+                    return False
+                self._active_keys.add(job.key)
+                if self._pending.get(job.key) is job:
+                    del self._pending[job.key]
+            job.status = "running"
+            self._running += 1
+            return True
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if not self._claim(job):
+                self._queue.task_done()
+                continue
+            job.started_at = time.time()
+            try:
+                report = job.run(job.ue_id)
+                job.timings_ms = report.get("timings_ms", {})
+                job.failed_step = report.get("failed_step")
+                job.error = report.get("error")
+                job.status = "succeeded" if report.get("ok") else "failed"
+            except Exception as e:
+                job.error = str(e) or e.__class__.__name__
+                job.status = "failed"
+            finally:
+                job.finished_at = time.time()
+                duration = job.finished_at - job.started_at
+                with self._lock:
+                    self._running -= 1
+                    self._active_keys.discard(job.key)
+                    # Moyenne glissante, utilisée pour le Retry-After
+                    self._avg_duration = duration if self._avg_duration is None else \
+                        0.9 * self._avg_duration + 0.1 * duration
+                self._queue.task_done()
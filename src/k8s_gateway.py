@@ -0,0 +1,233 @@
+"""Passerelle Kubernetes partagée par tout le contrôleur.
+
+La configuration (kubeconfig ou ServiceAccount in-cluster) est chargée une
+seule fois par processus, et un unique ``ApiClient`` est réutilisé par tous les
+helpers : les connexions HTTPS restent ouvertes (keep-alive) dans un pool
+urllib3 dimensionné pour les écritures concurrentes.
+
+Les écritures (create/patch/replace/delete) sont limitées par un seau à jetons
+(``K8S_WRITE_QPS``, rafales de ``K8S_WRITE_BURST``) pour qu'une tempête
+d'attachements ne fasse pas brider le contrôleur par l'API server ; une
+réponse 429 est rejouée après le ``Retry-After`` indiqué (``K8S_RETRY_429``
+essais au plus).
+
+Le paquet ``kubernetes`` (plusieurs centaines de ms d'import) n'est importé
+qu'au premier appel : un contrôleur lancé avec un autre backend, ou un test,
+ne le charge jamais.
+"""
+import os
+import threading
+import time
+
+from prometheus_client import Counter
+
+from src.ratelimit import TokenBucket
+
+NAMESPACE = "nexslice"
+# Les clients générés récents envoient par défaut un PATCH en JSON Patch
+# (liste d'opérations) ; nos patchs sont des objets partiels.
+PATCH_CONTENT_TYPE = "application/strategic-merge-patch+json"
+
+try:
+    K8S_POOL_MAXSIZE = int(os.environ.get("K8S_POOL_MAXSIZE", "32"))
+except Exception:
+    K8S_POOL_MAXSIZE = 32
+# URL explicite de l'API (ex: API factice de scripts/fake_k8s.py) ; sinon kubeconfig / in-cluster
+K8S_API_HOST = os.environ.get("K8S_API_HOST", "")
+try:
+    K8S_WRITE_QPS = float(os.environ.get("K8S_WRITE_QPS", "100"))
+    K8S_WRITE_BURST = float(os.environ.get("K8S_WRITE_BURST", "200"))
+    K8S_RETRY_429 = int(os.environ.get("K8S_RETRY_429", "3"))
+    K8S_RETRY_AFTER_MAX = float(os.environ.get("K8S_RETRY_AFTER_MAX", "10"))
+except Exception:
+    K8S_WRITE_QPS, K8S_WRITE_BURST, K8S_RETRY_429, K8S_RETRY_AFTER_MAX = 100.0, 200.0, 3, 10.0
+
+WRITE_VERBS = ("create_", "patch_", "replace_", "delete_")
+
+
+K8S_API_CALLS = Counter('nexslice_k8s_api_calls_total', 'Appels à l\'API Kubernetes', ['verb'])
+K8S_API_ERRORS = Counter('nexslice_k8s_api_errors_total', 'Appels à l\'API Kubernetes en erreur', ['verb', 'code'])
+K8S_API_RETRIES = Counter('nexslice_k8s_api_retries_total', 'Appels rejoués après une réponse 429', ['verb'])
+
+
+def retry_after(exc, attempt, cap=K8S_RETRY_AFTER_MAX):
+    """Attente (s) avant de rejouer un appel refusé en 429 : ``Retry-After`` ou backoff exponentiel."""
+    headers = getattr(exc, "headers", None) or {}
+    try:
+        wait = float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        wait = 0.5 * 2 ** (attempt - 1)
+    return max(0.0, min(cap, wait))
+
+
+class KubeGateway:
+    """Point d'accès unique à l'API Kubernetes.
+
+    Les clients ``CoreV1Api``/``AppsV1Api`` sont construits paresseusement au
+    premier appel. ``call()`` exécute une méthode de l'API en mesurant sa
+    latence, ce qui alimente ``stats()``. Si ``limiter`` (``TokenBucket``) est
+    défini, chaque appel attend d'abord son jeton ; les écritures attendent en
+    plus celui de ``write_limiter``.
+    """
+
+    def __init__(self, pool_maxsize=K8S_POOL_MAXSIZE, host=K8S_API_HOST,
+                 write_qps=K8S_WRITE_QPS, write_burst=K8S_WRITE_BURST, retries_429=K8S_RETRY_429):
+        self.pool_maxsize = pool_maxsize
+        self.host = host
+        self.in_cluster = False
+        self._lock = threading.Lock()
+        self._api_client = None
+        self._core_v1 = None
+        self._apps_v1 = None
+        self.limiter = None
+        self.write_limiter = TokenBucket(write_qps, write_burst)
+        self.retries_429 = retries_429
+        self._throttled = [0, 0.0]
+        self._retried = 0
+        self._stats_lock = threading.Lock()
+        # verbe -> [appels, erreurs, latence cumulée (s), latence max (s)]
+        self._calls = {}
+
+    def _ensure_loaded(self):
+        if self._api_client is not None:
+            return
+        with self._lock:
+            if self._api_client is not None:
+                return
+            from kubernetes import client
+            from kubernetes import config as k8s_config
+
+            configuration = client.Configuration()
+            # Le Deployment nexslice-controller tourne avec un ServiceAccount :
+            # Kubernetes injecte alors KUBERNETES_SERVICE_HOST dans le pod.
+            if self.host:
+                configuration.host = self.host
+            elif os.environ.get("KUBERNETES_SERVICE_HOST"):
+                k8s_config.load_incluster_config(client_configuration=configuration)
+                self.in_cluster = True
+            else:
+                k8s_config.load_kube_config(client_configuration=configuration)
+            configuration.connection_pool_maxsize = self.pool_maxsize
+            api_client = client.ApiClient(configuration)
+            self._core_v1 = client.CoreV1Api(api_client)
+            self._apps_v1 = client.AppsV1Api(api_client)
+            self._api_client = api_client
+
+    @property
+    def core_v1(self):
+        self._ensure_loaded()
+        return self._core_v1
+
+    @property
+    def apps_v1(self):
+        self._ensure_loaded()
+        return self._apps_v1
+
+    def _throttle(self, limiter):
+        if limiter is None:
+            return
+        waited = limiter.acquire()
+        if waited > 0:
+            with self._stats_lock:
+                self._throttled[0] += 1
+                self._throttled[1] += waited
+
+    def call(self, fn, *args, **kwargs):
+        """Exécute ``fn`` (méthode d'un client API) et enregistre sa latence."""
+        verb = getattr(fn, "__name__", "unknown")
+        if verb.startswith("patch_") and isinstance(kwargs.get("body"), dict):
+            kwargs.setdefault("_content_type", PATCH_CONTENT_TYPE)
+        write = verb.startswith(WRITE_VERBS)
+        attempt = 0
+        while True:
+            self._throttle(self.limiter)
+            if write:
+                self._throttle(self.write_limiter)
+            try:
+                return self._invoke(verb, fn, args, kwargs)
+            except Exception as e:
+                if getattr(e, "status", None) != 429 or attempt >= self.retries_429:
+                    raise
+                attempt += 1
+                wait = retry_after(e, attempt)
+                print(f"API Kubernetes : 429 sur {verb}, nouvel essai {attempt}/{self.retries_429} dans {wait:.1f}s")
+                K8S_API_RETRIES.labels(verb=verb).inc()
+                with self._stats_lock:
+                    self._retried += 1
+                time.sleep(wait)
+
+    def _invoke(self, verb, fn, args, kwargs):
+        start = time.perf_counter()
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            failed = True
+            K8S_API_ERRORS.labels(verb=verb, code=str(getattr(e, "status", None) or "error")).inc()
+            raise
+        finally:
+            K8S_API_CALLS.labels(verb=verb).inc()
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                entry = self._calls.setdefault(verb, [0, 0, 0.0, 0.0])
+                entry[0] += 1
+                if failed:
+                    entry[1] += 1
+                entry[2] += elapsed
+                entry[3] = max(entry[3], elapsed)
+
+    def pool_stats(self):
+        """Etat des pools de connexions urllib3 (un pool par hôte API)."""
+        if self._api_client is None:
+            return []
+        pools = []
+        try:
+            manager = self._api_client.rest_client.pool_manager
+            for key in list(manager.pools.keys()):
+                pool = manager.pools[key]
+                pools.append({
+                    "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                    "maxsize": pool.pool.maxsize if pool.pool is not None else 0,
+                    "idle": pool.pool.qsize() if pool.pool is not None else 0,
+                    "connections_opened": pool.num_connections,
+                    "requests": pool.num_requests,
+                })
+        except Exception:
+            pass
+        return pools
+
+    def stats(self):
+        with self._stats_lock:
+            calls = {
+                verb: {
+                    "count": count,
+                    "errors": errors,
+                    "avg_ms": round(total / count * 1000, 3) if count else 0.0,
+                    "max_ms": round(worst * 1000, 3),
+                }
+                for verb, (count, errors, total, worst) in self._calls.items()
+            }
+        return {
+            "loaded": self._api_client is not None,
+            "in_cluster": self.in_cluster,
+            "pool_maxsize": self.pool_maxsize,
+            "pools": self.pool_stats(),
+            "calls": calls,
+            "throttled": {"count": self._throttled[0], "wait_s": round(self._throttled[1], 3)},
+            "write_limiter": self.write_limiter.stats(),
+            "retried_429": self._retried,
+        }
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Retourne la passerelle Kubernetes du processus (créée au premier appel)."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = KubeGateway()
+    return _gateway
@@ -1,12 +1,36 @@
-from flask import Flask, render_template, redirect, url_for, jsonify, request, Response
+from flask import Blueprint, Flask, render_template, redirect, url_for, jsonify, request, Response, stream_with_context
+import json
 import os
-from kubernetes import client
-from kubernetes import config as k8s_config
 import re
-import requests
-from prometheus_client import Gauge, Counter, generate_latest, CONTENT_TYPE_LATEST
-
-app = Flask(__name__)
+import threading
+import time
+import zlib
+from prometheus_client import Gauge, Counter
+
+from src.admission import IdempotencyCache, idempotent
+from src.allocator import IdentityAllocator, PoolExhausted
+from src.backends import get_backend
+from src.changefeed import ChangeFeed
+from src.events import ingest as ingest_ue_events
+from src.configmap_shards import CONFIGMAP_SHARD_SIZE, CONFIGMAP_SHARD_WAIT, ShardedConfigMaps
+from src.informer import POD_STATES, Informer, deployment_ready, pod_ready, pod_state, ue_id_of
+from src.jobs import JobQueue, QueueFull
+from src.metrics import (METRICS_PER_UE_LIMIT, StateCollector, gauge_function, latest as latest_metrics,
+                         register_state_collector, start_sampler)
+from src.placement import UPF_MAX_UES_PER_UPF, PlacementScheduler
+from src.provisioning import BulkProvisioner, PROVISION_CONCURRENCY
+from src.reconciler import RECONCILE_INTERVAL, Reconciler
+from src.renderer import (ConfigWriter, render_ue_config, render_ue_configmap, render_ue_group_pod, render_ue_pod,
+                          render_upf)
+from src.smf_notifier import SMFNotifier
+from src.state_store import PHASES, SMF_STATUSES, UE_STATE_DB, StateStore
+from src.teardown import bulk_teardown
+from src.tracing import Tracer
+from src.ue_registry import UERegistry
+from src.warm_pool import WarmPool
+
+# Routes du contrôleur ; l'application Flask est construite par create_app()
+bp = Blueprint("controller", __name__)
 
 # Configuration simple via variables d'environnement
 UPF_IMAGE = os.environ.get("UPF_IMAGE", "oaisoftwarealliance/oai-upf:latest")
@@ -14,371 +38,698 @@ try:
     UPF_REPLICAS = int(os.environ.get("UPF_REPLICAS", "1"))
 except Exception:
     UPF_REPLICAS = 1
+# Nombre d'UPF pré-démarrés gardés prêts pour les connexions UE (0 = désactivé)
+try:
+    WARM_POOL_SIZE = int(os.environ.get("WARM_POOL_SIZE", "0"))
+except Exception:
+    WARM_POOL_SIZE = 0
+# DEMO_MODE : backend dry-run et notifications SMF désactivées, sauf réglage explicite
 DEMO_MODE = os.environ.get("DEMO_MODE", "0").lower() in ("1", "true", "yes")
-
-UE_GAUGE = Gauge('nexslice_active_ues', 'Nombre d\'UE configur\u00e9s (fichiers locaux)')
-# Gauge for total UPFs present in the cluster (or approximated in DEMO_MODE)
-UPF_GAUGE = Gauge('nexslice_upfs_total', 'Nombre total d\'UPF d\u00e9ploy\u00e9s')
+# Backend de provisionnement (PROVISIONING_BACKEND : kubernetes, memory ou dryrun)
+BACKEND = get_backend()
+SMF_NOTIFY_ENABLED = os.environ.get("SMF_NOTIFY_ENABLED", "0" if DEMO_MODE else "1").lower() in ("1", "true", "yes")
+INFORMERS_ENABLED = BACKEND.cluster_api and os.environ.get("INFORMERS_ENABLED", "1").lower() in ("1", "true", "yes")
+UE_CONF_DIR = os.environ.get("UE_CONF_DIR", "./tmp/ue-confs/")
+# Copie disque des configs UE (audit) : optionnelle, écrite par lots en arrière-plan
+PERSIST_UE_CONFIGS = os.environ.get("PERSIST_UE_CONFIGS", "1").lower() in ("1", "true", "yes")
+try:
+    UE_CONFIG_FLUSH_INTERVAL = float(os.environ.get("UE_CONFIG_FLUSH_INTERVAL", "0.2"))
+except Exception:
+    UE_CONFIG_FLUSH_INTERVAL = 0.2
+try:
+    BULK_MAX_UES = int(os.environ.get("BULK_MAX_UES", "10000"))
+except Exception:
+    BULK_MAX_UES = 10000
+# Pagination de /api/ue-list (taille de page par défaut et maximale)
+try:
+    UE_LIST_PAGE_SIZE = int(os.environ.get("UE_LIST_PAGE_SIZE", "500"))
+except Exception:
+    UE_LIST_PAGE_SIZE = 500
+try:
+    UE_LIST_MAX_PAGE_SIZE = int(os.environ.get("UE_LIST_MAX_PAGE_SIZE", "5000"))
+except Exception:
+    UE_LIST_MAX_PAGE_SIZE = 5000
+# Flux SSE /api/ue-stream : clients simultanés par worker, durée max d'une connexion (le
+# navigateur se reconnecte avec Last-Event-ID) et intervalle des commentaires keep-alive
+try:
+    UE_STREAM_MAX_CLIENTS = int(os.environ.get("UE_STREAM_MAX_CLIENTS", "16"))
+except Exception:
+    UE_STREAM_MAX_CLIENTS = 16
+try:
+    UE_STREAM_MAX_SECONDS = float(os.environ.get("UE_STREAM_MAX_SECONDS", "300"))
+except Exception:
+    UE_STREAM_MAX_SECONDS = 300.0
+try:
+    UE_STREAM_KEEPALIVE = float(os.environ.get("UE_STREAM_KEEPALIVE", "15"))
+except Exception:
+    UE_STREAM_KEEPALIVE = 15.0
+# Intervalle (s) de vérification des écritures des autres workers dans la base d'état
+try:
+    UE_REGISTRY_SYNC_INTERVAL = float(os.environ.get("UE_REGISTRY_SYNC_INTERVAL", "1"))
+except Exception:
+    UE_REGISTRY_SYNC_INTERVAL = 1.0
+# Mode UE groupés : UE_GROUP_SIZE UE consécutifs simulés par un même Pod (0 = un Pod par UE)
+try:
+    UE_GROUP_SIZE = int(os.environ.get("UE_GROUP_SIZE", "0"))
+except Exception:
+    UE_GROUP_SIZE = 0
+UE_GROUPS_ENABLED = UE_GROUP_SIZE > 0 and BACKEND.cluster_api
+# Réconciliation cluster / base d'état au démarrage puis toutes les RECONCILE_INTERVAL secondes
+# (activée par défaut avec le backend kubernetes seulement)
+RECONCILE_ENABLED = os.environ.get("RECONCILE_ENABLED", "1" if BACKEND.cluster_api else "0").lower() in ("1", "true",
+                                                                                                      "yes")
+# Fenêtre d'anti-rebond (s) des webhooks connexion/déconnexion : seul le dernier état demandé est appliqué
+try:
+    UE_DEBOUNCE_WINDOW = float(os.environ.get("UE_DEBOUNCE_WINDOW", "0.5"))
+except Exception:
+    UE_DEBOUNCE_WINDOW = 0.5
+
+JOB_QUEUE = JobQueue()
+# Réponses des webhooks par en-tête Idempotency-Key
+IDEMPOTENCY = IdempotencyCache()
+# Etat des UE (identité, UPF, SMF, phase) dans une base SQLite partagée par les workers
+STATE_STORE = StateStore(UE_STATE_DB)
+# Changements UE/UPF numérotés : ETag des listes et flux SSE /api/ue-stream
+UE_CHANGES = ChangeFeed()
+# Index des UE (et de leur phase) chargé depuis STATE_STORE, tenu à jour en mémoire et en base,
+# rechargé si un autre worker modifie la base
+UE_REGISTRY = UERegistry(UE_CONF_DIR, store=STATE_STORE, feed=UE_CHANGES)
+# Identités réseau (identifiant, SD, sous-réseau) réservées dans STATE_STORE, réutilisées après libération
+ALLOCATOR = IdentityAllocator(STATE_STORE, in_use=UE_REGISTRY.__contains__)
+CONFIG_WRITER = ConfigWriter(UE_CONF_DIR, PERSIST_UE_CONFIGS, UE_CONFIG_FLUSH_INTERVAL)
+# Configs UE regroupées dans des ConfigMaps partagés (CONFIGMAP_SHARD_SIZE > 0), sinon un ConfigMap par UE
+if UE_GROUPS_ENABLED:
+    # Un ConfigMap par groupe, monté en entier par le Pod du groupe
+    CONFIGMAP_SHARDS = ShardedConfigMaps(UE_GROUP_SIZE, prefix="ueransim-group-")
+elif CONFIGMAP_SHARD_SIZE > 0 and BACKEND.cluster_api:
+    CONFIGMAP_SHARDS = ShardedConfigMaps(CONFIGMAP_SHARD_SIZE)
+else:
+    CONFIGMAP_SHARDS = None
+
+# Les gauges d'état (UE, UPF) sont calculées au scrape : voir STATE_METRICS
+UE_ATTACH_COUNTER = Counter('nexslice_ue_attach_total', 'Attachements d\'UE terminés', ['result'])
+UE_DETACH_COUNTER = Counter('nexslice_ue_detach_total', 'Détachements d\'UE terminés', ['result'])
+UPF_DELETE_COUNTER = Counter('nexslice_upf_deletions_total', 'Nombre de suppressions d\'UPF')
+# Notifications SMF (outbox persistée dans STATE_STORE, retentée en arrière-plan)
+SMF_NOTIFIER = SMFNotifier(store=STATE_STORE)
+SMF_OUTBOX_GAUGE = Gauge('nexslice_smf_outbox_depth', 'Notifications SMF en attente de livraison',
+                         multiprocess_mode='livesum')
+gauge_function(SMF_OUTBOX_GAUGE, SMF_NOTIFIER.depth)
+# Histogrammes par étape + chronologie d'attachement par UE
+TRACER = Tracer()
+JOB_QUEUE_GAUGE = Gauge('nexslice_job_queue_depth', 'Nombre de jobs en attente dans la file',
+                        multiprocess_mode='livesum')
+gauge_function(JOB_QUEUE_GAUGE, JOB_QUEUE.depth)
+JOB_RUNNING_GAUGE = Gauge('nexslice_jobs_running', 'Nombre de jobs en cours d\'ex\u00e9cution',
+                          multiprocess_mode='livesum')
+gauge_function(JOB_RUNNING_GAUGE, JOB_QUEUE.running)
 
 def get_last_ue_index():
-    """Récupère l'index du dernier fichier de configuration UE"""
-    ue_conf_dir = "./tmp/ue-confs/"
-    
-    # Vérifier si le dossier existe
-    if not os.path.exists(ue_conf_dir):
-        return 0
-    
-    # Lister tous les fichiers dans le dossier
-    files = os.listdir(ue_conf_dir)
-    
-    # Extraire les numéros des fichiers ue*.yaml
-    ue_numbers = []
-    for file in files:
-        match = re.match(r'ue(\d+)\.yaml', file)
-        if match:
-            ue_numbers.append(int(match.group(1)))
-    
-    # Retourner le plus grand numéro ou 0 si aucun fichier
-    return max(ue_numbers) if ue_numbers else 0
-
-
-def refresh_ue_metrics():
-    try:
-        UE_GAUGE.set(get_last_ue_index())
-    except Exception:
-        pass
+    """Récupère l'index du dernier UE configuré (index en mémoire, O(1))"""
+    return UE_REGISTRY.max_id()
 
 
 def get_upf_count():
-    """Count UPF deployments in the cluster or approximate via local files in DEMO_MODE.
+    """Count UPF deployments (from the watch cache, or listed through the backend).
 
     Returns an integer count.
     """
-    # In demo mode we approximate by counting local UE config files (one UPF per UE)
-    if DEMO_MODE:
-        ue_conf_dir = "./tmp/ue-confs/"
-        if not os.path.exists(ue_conf_dir):
-            return 0
-        files = os.listdir(ue_conf_dir)
-        cnt = 0
-        for file in files:
-            if re.match(r'ue(\d+)\.yaml', file):
-                cnt += 1
-        return cnt
-
-    # In real mode, query Kubernetes for deployments labeled app=upf in namespace nexslice
+    # Served from the watch-based cache once it has completed its initial LIST
+    if UPF_DEPLOYMENTS.synced.is_set():
+        return UPF_DEPLOYMENTS.count()
+
+    # Otherwise, list deployments labeled app=upf through the provisioning backend
     try:
-        k8s_config.load_kube_config()
-        apps_v1 = client.AppsV1Api()
-        deps = apps_v1.list_namespaced_deployment(namespace="nexslice", label_selector="app=upf")
-        return len(deps.items)
+        deployments, _ = BACKEND.list("Deployment", "app=upf")
+        return len(deployments)
     except Exception:
         return 0
 
 
+# Caches locaux (LIST + WATCH) des UPF et des Pods UERANSIM, indexés par ue-id
+def _on_upf_deployment_change(event_type, obj):
+    refresh_upf_metrics()
+    if event_type in ("ADDED", "MODIFIED") and deployment_ready(obj):
+        ue_id = ue_id_of(obj)
+        if ue_id is not None:
+            TRACER.mark_upf_ready(ue_id)
+
+
+UPF_DEPLOYMENTS = Informer("upf-deployments", lambda gw: gw.apps_v1.list_namespaced_deployment, "app=upf",
+                           on_change=_on_upf_deployment_change)
+UPF_SERVICES = Informer("upf-services", lambda gw: gw.core_v1.list_namespaced_service, "app=upf")
+UE_PODS = Informer("ueransim-pods", lambda gw: gw.core_v1.list_namespaced_pod, "app=ueransim-ue")
+INFORMERS = (UPF_DEPLOYMENTS, UPF_SERVICES, UE_PODS)
+
+
+def _cached(informer, name):
+    """Arguments ``live``/``cached`` pour ``BACKEND.apply`` depuis un cache watch."""
+    if informer.synced.is_set():
+        return {"live": informer.get(name), "cached": True}
+    return {"live": None, "cached": False}
+
+
+def start_informers():
+    """Démarre les caches watch (backend kubernetes, désactivables via INFORMERS_ENABLED=0)."""
+    if not INFORMERS_ENABLED:
+        return
+    for informer in INFORMERS:
+        informer.start()
+
+
+# Dernier nombre d'UPF connu, pour les scrapes sans cache watch synchronisé
+LAST_UPF_COUNT = 0
+
+
 def refresh_upf_metrics():
+    global LAST_UPF_COUNT
     try:
-        UPF_GAUGE.set(get_upf_count())
+        count = get_upf_count()
     except Exception:
-        pass
+        return
+    if count != LAST_UPF_COUNT:
+        UE_CHANGES.publish({"op": "upfs", "count": count})
+    LAST_UPF_COUNT = count
+
+
+# --- Métriques calculées au scrape (mémoire uniquement, sans appel API) ------
+
+def _scrape_upf_count():
+    if UPF_DEPLOYMENTS.synced.is_set():
+        return get_upf_count()
+    return LAST_UPF_COUNT
+
+
+def _scrape_ue_pods():
+    counts = {(state,): 0 for state in POD_STATES}
+    if UE_PODS.synced.is_set():
+        for pod in UE_PODS.items():
+            counts[(pod_state(pod),)] += 1
+    return counts
+
+
+def _scrape_upfs():
+    if not BACKEND.cluster_api:
+        # Backends simulés : un UPF est prêt dès sa création
+        return {("ready",): LAST_UPF_COUNT, ("not_ready",): 0}
+    counts = {("ready",): 0, ("not_ready",): 0}
+    if UPF_DEPLOYMENTS.synced.is_set():
+        for deployment in UPF_DEPLOYMENTS.items():
+            counts[("ready",) if deployment_ready(deployment) else ("not_ready",)] += 1
+    return counts
+
+
+def _scrape_ue_phases():
+    counts = {(phase,): 0 for phase in PHASES}
+    for phase, count in UE_REGISTRY.phase_counts().items():
+        counts[(phase,)] = count
+    return counts
+
+
+def _scrape_ue_ready():
+    # Séries par UE pour les METRICS_PER_UE_LIMIT plus petits ue_id seulement
+    series = {}
+    for ue_id in UE_PODS.ue_ids()[:max(0, METRICS_PER_UE_LIMIT)]:
+        pods = UE_PODS.get_by_ue(ue_id)
+        series[(ue_id,)] = 1 if pods and pod_ready(pods[0]) else 0
+    return series
+
+
+STATE_METRICS = (
+    StateCollector()
+    .gauge('nexslice_active_ues', 'Index du dernier UE configuré', get_last_ue_index)
+    .gauge('nexslice_ues_configured', 'Nombre d\'UE configurés', lambda: UE_REGISTRY.count())
+    .gauge('nexslice_ues_by_phase', 'UE par phase du cycle de vie (base d\'état)', _scrape_ue_phases,
+           labels=['phase'])
+    .gauge('nexslice_ue_pods', 'Pods UERANSIM par état (cache watch)', _scrape_ue_pods, labels=['state'])
+    .gauge('nexslice_upfs_total', 'Nombre total d\'UPF déployés', _scrape_upf_count)
+    .gauge('nexslice_upfs', 'UPF par état de disponibilité (cache watch)', _scrape_upfs, labels=['state'])
+    .gauge('nexslice_ue_ready', 'Pod UE prêt, par UE (limité à METRICS_PER_UE_LIMIT UE)',
+           _scrape_ue_ready, labels=['ue_id'])
+    .gauge('nexslice_ue_series_dropped', 'UE sans série par UE (au-delà de METRICS_PER_UE_LIMIT)',
+           lambda: max(0, len(UE_PODS.ue_ids()) - max(0, METRICS_PER_UE_LIMIT)))
+)
+register_state_collector(STATE_METRICS)
+
+
+def upf_name_for(ue_id):
+    """Nom du Service UPF qui route le trafic de l'UE (partagé en mode consolidation)."""
+    if PLACEMENT is not None:
+        return PLACEMENT.upf_of(ue_id)
+    return f"upf-ue{ue_id}"
+
+
+def ue_identity(ue_id):
+    """Identité réseau d'un UE : DNN, plage IP et S-NSSAI (sst, sd), réservée par ``ALLOCATOR``."""
+    return ALLOCATOR.identity(ue_id)
+
+
+def smf_registration_payload(ue_id, upf_name=None):
+    """Corps de la notification SMF pour le DNN d'un UE (voir docs/INTEGRATION_SMF.md)."""
+    upf_name = upf_name or f"upf-ue{ue_id}"
+    identity = ue_identity(ue_id)
+    return {
+        "dnn": identity["dnn"],
+        "upf_fqdn": f"{upf_name}.nexslice.svc.cluster.local",
+        "upf_port": 8805,  # Port PFCP
+        "ip_range": identity["ip_range"],
+        "sst": identity["sst"],
+        "sd": identity["sd"],
+        "pdu_session_type": "IPv4"
+    }
 
 
-def notify_smf_new_dnn(ue_id):
+def notify_smf_new_dnn(ue_id, upf_name=None):
     """Notifie le SMF d'un nouveau mapping DNN → UPF via webhook.
     
     Cette fonction envoie une requête HTTP au SMF pour l'informer qu'un nouveau
     DNN a été créé et doit être routé vers l'UPF dédié correspondant.
     
     Le SMF doit exposer un endpoint webhook compatible avec ce format.
+
+    La notification passe par l'outbox persistée de ``SMF_NOTIFIER`` : si le
+    SMF ne répond pas dans ``SMF_NOTIFY_WAIT`` secondes, elle est conservée et
+    retentée en arrière-plan, et la création de l'UE se poursuit.
+
+    ``upf_name`` est l'UPF choisi pour l'UE (par défaut ``upf_name_for``).
     """
-    if DEMO_MODE:
-        print(f"[DEMO_MODE] Skip SMF notification for UE {ue_id}")
+    if not SMF_NOTIFY_ENABLED:
+        print(f"Notification SMF désactivée : UE {ue_id} non enregistré auprès du SMF")
+        update_ue_state({ue_id: {"smf_status": "skipped"}})
         return True
-    
-    # URL du webhook SMF (à adapter selon votre déploiement)
-    smf_webhook_url = os.environ.get(
-        "SMF_WEBHOOK_URL",
-        "http://oai-smf.nexslice.svc.cluster.local:8080/api/dnn/register"
-    )
-    
-    payload = {
-        "dnn": f"oai-ue{ue_id}",
-        "upf_fqdn": f"upf-ue{ue_id}.nexslice.svc.cluster.local",
-        "upf_port": 8805,  # Port PFCP
-        "ip_range": f"12.1.{ue_id}.0/24",
-        "sst": 1,
-        "sd": f"{ue_id:06d}",
-        "pdu_session_type": "IPv4"
-    }
-    
-    try:
-        response = requests.post(
-            smf_webhook_url,
-            json=payload,
-            timeout=5,
-            headers={"Content-Type": "application/json"}
-        )
-        
-        if response.status_code in [200, 201, 204]:
-            print(f"✓ SMF notifié : oai-ue{ue_id} → upf-ue{ue_id} (Status: {response.status_code})")
-            return True
-        else:
-            print(f"⚠ SMF webhook status {response.status_code}: {response.text}")
-            return False
-            
-    except requests.exceptions.Timeout:
-        print(f"⚠ Timeout lors de la notification SMF pour UE {ue_id}")
-        return False
-    except requests.exceptions.ConnectionError:
-        print(f"⚠ SMF webhook non disponible (vérifier que le service est accessible)")
-        return False
-    except Exception as e:
-        print(f"Erreur notification SMF: {e}")
+    upf_name = upf_name or upf_name_for(ue_id)
+    if upf_name is None:
+        print(f"Aucun UPF attribué à l'UE {ue_id} : notification SMF impossible")
         return False
 
+    # Passe à "registered" à la livraison (voir _record_smf_delivered)
+    update_ue_state({ue_id: {"smf_status": "pending"}})
+    with TRACER.span(ue_id, "smf_notify"):
+        delivered = SMF_NOTIFIER.notify("register", smf_registration_payload(ue_id, upf_name))
+    if not delivered:
+        print(f"⚠ SMF non joignable pour UE {ue_id} : notification conservée dans l'outbox")
+    return True
 
-@app.route('/')
+
+DNN_RE = re.compile(r"oai-ue(\d+)")
+
+# Champs d'état diffusés dans le flux de changements (ceux filtrables dans /api/ue-list)
+STREAMED_FIELDS = ("phase", "smf_status", "upf")
+
+
+def update_ue_state(changes):
+    """Met à jour la base d'état ``{ue_id: {champ: valeur}}`` et publie le changement."""
+    UE_REGISTRY.update_many(changes)
+    ues = {ue_id: {k: v for k, v in fields.items() if k in STREAMED_FIELDS} for ue_id, fields in changes.items()}
+    ues = {ue_id: fields for ue_id, fields in ues.items() if fields}
+    if ues:
+        UE_CHANGES.publish({"op": "state", "ues": ues})
+
+
+def _record_smf_delivered(notifications):
+    """Marque ``registered`` en base les UE dont l'enregistrement SMF a été livré."""
+    changes = {}
+    for op, payload in notifications:
+        match = DNN_RE.fullmatch(payload.get("dnn", ""))
+        if op == "register" and match:
+            changes[int(match.group(1))] = {"smf_status": "registered"}
+    if changes:
+        update_ue_state(changes)
+
+
+SMF_NOTIFIER.on_delivered = _record_smf_delivered
+
+
+def record_attach_results(results):
+    """Enregistre en une transaction la phase (et l'UPF) des UE provisionnés."""
+    changes = {}
+    for r in results:
+        if r["ok"]:
+            changes[r["ue_id"]] = {"phase": "provisioned", "error": None, "upf": upf_name_for(r["ue_id"])}
+        else:
+            changes[r["ue_id"]] = {"phase": "failed", "error": f"{r['failed_step']}: {r['error']}"}
+    update_ue_state(changes)
+
+
+def notify_smf_dnn_removed(ue_id):
+    """Demande au SMF d'oublier le DNN d'un UE déconnecté (envoi asynchrone via l'outbox)."""
+    if not SMF_NOTIFY_ENABLED:
+        return True
+    SMF_NOTIFIER.enqueue("unregister", {"dnn": f"oai-ue{ue_id}"})
+    return True
+
+
+@bp.route('/')
 def hello():
     return render_template('index.html')
 
-@app.route('/api/ue-count')
+def _conditional_json(build):
+    """Réponse JSON de ``build()`` avec un ETag tiré de la version de ``UE_CHANGES``.
+
+    La version est lue avant de construire le corps : si un changement arrive
+    entre-temps, l'ETag est simplement périmé et la requête suivante recalcule.
+    Un ``If-None-Match`` sur la version courante répond 304 sans rien calculer.
+    Les écritures des autres workers sont prises en compte avant (``sync()``).
+    """
+    UE_REGISTRY.sync()
+    etag = f"{UE_CHANGES.token()}-{zlib.crc32(request.query_string):08x}"
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+@bp.route('/api/ue-count')
 def ue_count():
-    """API pour récupérer le nombre de UE créés"""
-    count = get_last_ue_index()
-    return jsonify({'count': count})
+    """API pour récupérer le nombre de UE créés (``count``) et le plus grand identifiant (``last``)"""
+    return _conditional_json(lambda: {'count': UE_REGISTRY.count(), 'last': get_last_ue_index()})
+
 
-@app.route('/api/ue-list')
+@bp.route('/api/ue-list')
 def ue_list():
-    """API pour récupérer la liste des UE actifs"""
-    ue_conf_dir = "./tmp/ue-confs/"
-    
-    if not os.path.exists(ue_conf_dir):
-        return jsonify({'ues': []})
-    
-    files = os.listdir(ue_conf_dir)
-    ue_ids = []
-    
-    for file in files:
-        match = re.match(r'ue(\d+)\.yaml', file)
-        if match:
-            ue_ids.append(int(match.group(1)))
-    
-    ue_ids.sort()
-    return jsonify({'ues': ue_ids})
+    """Liste paginée des UE : ``?cursor=<dernier id reçu>&limit=N``.
 
-@app.route('/create_pods', methods=['POST'])
-def create_pods():
-    # Générer 100 UE UERANSIM
-    for i in range(1, 101):
-        generate_ue_config(i)
-        create_ue_configmap(i)
-        create_ue_pod(i)
-        # Créer un UPF dédié pour cet UE
-        try:
-            create_upf_for_ue(i, image=UPF_IMAGE, replicas=UPF_REPLICAS)
-        except Exception as e:
-            print(f"Erreur lors de la création de l'UPF pour UE {i}: {e}")
-    
-    return redirect(url_for('hello'))
+    Filtres optionnels ``phase``, ``smf_status`` et ``upf`` (base d'état,
+    index). La réponse donne ``next_cursor`` (None en fin de liste) et la
+    ``version`` du registre ; l'ETag permet de répondre 304 si rien n'a changé.
+    """
+    try:
+        cursor = int(request.args.get("cursor", 0))
+        limit = int(request.args.get("limit", UE_LIST_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"error": "cursor et limit doivent être des entiers"}), 400
+    if cursor < 0 or not 1 <= limit <= UE_LIST_MAX_PAGE_SIZE:
+        return jsonify({"error": f"cursor >= 0 et limit entre 1 et {UE_LIST_MAX_PAGE_SIZE} requis"}), 400
+    filters = {key: request.args.get(key) for key in STREAMED_FIELDS}
+    if filters["phase"] not in (None, *PHASES) or filters["smf_status"] not in (None, *SMF_STATUSES):
+        return jsonify({"error": f"phase parmi {PHASES}, smf_status parmi {SMF_STATUSES}"}), 400
+
+    def build():
+        version = UE_CHANGES.version
+        # Un élément de plus que la page pour savoir s'il reste des UE
+        if any(value is not None for value in filters.values()):
+            ues = STATE_STORE.page(cursor, limit + 1, **filters)
+        else:
+            ues = UE_REGISTRY.page(cursor, limit + 1)
+        next_cursor = ues[limit - 1] if len(ues) > limit else None
+        return {'ues': ues[:limit], 'next_cursor': next_cursor, 'version': version}
 
+    return _conditional_json(build)
 
-@app.route('/delete_pods', methods=['POST'])
-def delete_pods():
-    """Supprime les 100 UEs/UPFs créés par le bouton de génération.
 
-    Itère sur les IDs 1..100 et supprime le fichier de config local, le Pod
-    UERANSIM, le ConfigMap et l'UPF (Deployment + Service). Ignore les erreurs
-    individuelles afin que l'opération soit idempotente.
-    """
-    start = 1
-    end = 100
-    for i in range(start, end + 1):
-        # supprimer fichier local
-        config_file = f"./tmp/ue-confs/ue{i}.yaml"
-        if os.path.exists(config_file):
-            try:
-                os.remove(config_file)
-                print(f"Fichier {config_file} supprimé.")
-            except Exception as e:
-                print(f"Erreur suppression fichier {config_file}: {e}")
-
-        # supprimer ressources Kubernetes (pod, configmap, deployment, service)
-        if DEMO_MODE:
-            # In demo mode, just increment deletion counter and continue
-            UPF_DELETE_COUNTER.inc()
-            refresh_ue_metrics()
-            continue
+# Connexions SSE ouvertes sur ce worker (chacune occupe un thread du serveur)
+UE_STREAM_SLOTS = threading.BoundedSemaphore(max(1, UE_STREAM_MAX_CLIENTS))
 
-        try:
-            k8s_config.load_kube_config()
-            v1 = client.CoreV1Api()
-            apps_v1 = client.AppsV1Api()
 
-            pod_name = f"ueransim-ue{i}"
-            configmap_name = f"ueransim-ue{i}-config"
-            upf_name = f"upf-ue{i}"
+def _sse(event, version, data):
+    return f"id: {UE_CHANGES.token(version)}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
 
-            try:
-                v1.delete_namespaced_pod(name=pod_name, namespace="nexslice")
-                print(f"Pod {pod_name} supprimé.")
-            except Exception:
-                pass
 
-            try:
-                v1.delete_namespaced_config_map(name=configmap_name, namespace="nexslice")
-                print(f"ConfigMap {configmap_name} supprimé.")
-            except Exception:
-                pass
+def _ue_snapshot():
+    UE_REGISTRY.sync()
+    version = UE_CHANGES.version
+    return version, {"version": version, "count": UE_REGISTRY.count(), "last": get_last_ue_index(),
+                     "upfs": LAST_UPF_COUNT}
 
-            try:
-                apps_v1.delete_namespaced_deployment(name=upf_name, namespace="nexslice")
-                print(f"Deployment {upf_name} supprimé.")
-            except Exception:
-                pass
 
-            try:
-                v1.delete_namespaced_service(name=upf_name, namespace="nexslice")
-                print(f"Service {upf_name} supprimé.")
-            except Exception:
-                pass
+def _ue_stream(version, max_seconds):
+    """Messages SSE : instantané si ``version`` est inconnue, puis un ``delta`` par changement."""
+    deadline = time.monotonic() + max_seconds
+    yield "retry: 2000\n\n"
+    changes = UE_CHANGES.since(version)
+    while True:
+        if changes is None:
+            # Version d'un autre processus ou sortie du journal : le client recharge la liste
+            version, snapshot = _ue_snapshot()
+            yield _sse("snapshot", version, snapshot)
+        else:
+            for version, change in changes:
+                yield _sse("delta", version, {"version": version, **change})
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            # Fin de connexion : le navigateur se reconnecte avec Last-Event-ID
+            return
+        if UE_CHANGES.wait(version, min(UE_STREAM_KEEPALIVE, remaining)) == version:
+            yield ": keepalive\n\n"
+            changes = []
+        else:
+            changes = UE_CHANGES.since(version)
 
-            UPF_DELETE_COUNTER.inc()
-            refresh_ue_metrics()
-        except Exception as e:
-            print(f"Erreur lors de la suppression des ressources pour UE {i}: {e}")
 
-    return redirect(url_for('hello'))
+@bp.route('/api/ue-stream')
+def ue_stream():
+    """Flux Server-Sent Events des changements UE/UPF (ajouts, retraits, phases, nombre d'UPF).
 
-@app.route('/add_pod', methods=['POST'])
+    Un client qui se reconnecte (``Last-Event-ID`` ou ``?since=``) reçoit les
+    changements manqués s'ils sont encore dans le journal, sinon un événement
+    ``snapshot``. Au plus ``UE_STREAM_MAX_CLIENTS`` flux par worker (503 sinon).
+    """
+    if not UE_STREAM_SLOTS.acquire(blocking=False):
+        response = jsonify({"error": "trop de flux ouverts, réessayer plus tard"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "5"
+        return response
+    since = request.headers.get("Last-Event-ID") or request.args.get("since")
+    response = Response(_ue_stream(UE_CHANGES.parse_token(since), UE_STREAM_MAX_SECONDS),
+                        mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Pas de mise en tampon par un proxy nginx
+    response.headers["X-Accel-Buffering"] = "no"
+    response.call_on_close(UE_STREAM_SLOTS.release)
+    return response
+
+
+def provision_ue_steps():
+    """Etapes de provisionnement d'un UE, dans l'ordre d'exécution."""
+    return [
+        ("config", generate_ue_config),
+        # Indépendants : ConfigMap et UPF sont créés en même temps
+        [("configmap", create_ue_configmap), ("upf", provision_upf_for_ue)],
+        ("pod", create_ue_pod),
+    ]
+
+
+def _bulk_params():
+    """Lit ``start``/``end``/``count``/``concurrency`` depuis le JSON, le formulaire ou la query string."""
+    data = request.get_json(silent=True) or {}
+    values = {}
+    for key in ("start", "end", "count", "concurrency"):
+        raw = data.get(key, request.values.get(key))
+        if raw is None or raw == "":
+            continue
+        try:
+            values[key] = int(raw)
+        except (TypeError, ValueError):
+            raise ValueError(f"{key} doit être un entier")
+    start = values.get("start", 1)
+    if "end" in values:
+        end = values["end"]
+    else:
+        end = start + values.get("count", 100) - 1
+    if start <= 0 or end < start:
+        raise ValueError("plage d'UE invalide")
+    if end - start + 1 > BULK_MAX_UES:
+        raise ValueError(f"au plus {BULK_MAX_UES} UE par requête")
+    return start, end, values.get("concurrency", PROVISION_CONCURRENCY)
+
+
+def _wants_json():
+    return request.is_json or request.accept_mimetypes.best == "application/json"
+
+
+@bp.route('/create_pods', methods=['POST'])
+def create_pods():
+    """Génère une plage d'UE UERANSIM (1..100 par défaut) avec leurs UPF dédiés.
+
+    Paramètres optionnels (JSON, formulaire ou query string) : ``start``,
+    ``end`` ou ``count``, et ``concurrency``. Les UE sont provisionnés en
+    parallèle ; le rapport par UE est retourné en JSON si le client le demande.
+    """
+    try:
+        start, end, concurrency = _bulk_params()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    for i in range(start, end + 1):
+        TRACER.begin(i)
+    provisioner = BulkProvisioner(provision_ue_steps(), concurrency=concurrency, outcomes=UE_ATTACH_COUNTER,
+                                  on_results=record_attach_results)
+    report = provisioner.run(range(start, end + 1))
+    for r in report["results"]:
+        if not r["ok"]:
+            print(f"Erreur provisionnement UE {r['ue_id']} ({r['failed_step']}): {r['error']}")
+    print(f"Provisionnement UE {start}..{end}: {report['succeeded']} OK, {report['failed']} en échec "
+          f"en {report['duration_s']}s")
+
+    if _wants_json():
+        return jsonify(report), 200 if report["failed"] == 0 else 207
+    return redirect(url_for('.hello'))
+
+
+@bp.route('/delete_pods', methods=['POST'])
+def delete_pods():
+    """Supprime les UEs/UPFs d'une plage d'IDs (1..100 par défaut, ``all`` pour tous).
+
+    Les Pods UERANSIM, ConfigMaps et UPF (Deployment + Service) sont supprimés
+    par ``deletecollection`` sur sélecteur de labels, en parallèle par type de
+    ressource. Les UE retirés sont ceux de la base d'état (une transaction),
+    leurs fichiers de config locaux sont supprimés sans parcourir le répertoire.
+    L'opération est idempotente. Paramètres optionnels (JSON, formulaire ou
+    query string) : ``start``, ``end`` ou ``count``, ``all``.
+    """
+    data = request.get_json(silent=True) or {}
+    delete_all = str(data.get("all", request.values.get("all", ""))).lower() in ("1", "true", "yes")
+    if delete_all:
+        lo = hi = None
+    else:
+        try:
+            lo, hi, _ = _bulk_params()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    removed_ues = set(UE_REGISTRY.list() if delete_all else UE_REGISTRY.between(lo, hi))
+    # Ecrire les configs en attente pour que le nettoyage local les voie
+    CONFIG_WRITER.flush()
+    report = bulk_teardown(UE_CONF_DIR, lo, hi, cluster=BACKEND.teardown,
+                           local_ids=sorted(removed_ues) if PERSIST_UE_CONFIGS else [])
+    UE_REGISTRY.remove_many(removed_ues)
+    ALLOCATOR.release(removed_ues)
+    for ue_id in removed_ues:
+        notify_smf_dnn_removed(ue_id)
+    UE_DETACH_COUNTER.labels(result="ok" if not report["errors"] else "failed").inc(len(removed_ues))
+    if PLACEMENT is not None:
+        if delete_all:
+            PLACEMENT.reset()
+        else:
+            for ue_id in removed_ues:
+                PLACEMENT.release(ue_id)
+    if CONFIGMAP_SHARDS is not None and not delete_all:
+        # Les ConfigMaps partagés n'ont pas de label ue-id : on retire les clés une à une
+        CONFIGMAP_SHARDS.remove(removed_ues)
+        if UE_GROUPS_ENABLED:
+            # Pods de groupe sans UE restant
+            for first_ue in sorted({CONFIGMAP_SHARDS.bounds(ue_id)[0] for ue_id in removed_ues}):
+                try:
+                    delete_ue_pod(first_ue)
+                except Exception as e:
+                    print(f"Erreur lors de la suppression du Pod de groupe de l'UE {first_ue}: {e}")
+
+    UPF_DELETE_COUNTER.inc(len(report["removed"].get("deployments", [])))
+    refresh_upf_metrics()
+    for error in report["errors"]:
+        print(f"Erreur lors de la suppression en masse: {error}")
+    counts = ", ".join(f"{len(names)} {kind}" for kind, names in report["removed"].items())
+    print(f"Suppression en masse : {len(removed_ues)} UE ({counts or 'aucune ressource'}) "
+          f"en {report['api_calls']} appels API ({report['duration_s']}s)")
+
+    if _wants_json():
+        report["ues"] = sorted(removed_ues)
+        return jsonify(report), 200 if not report["errors"] else 207
+    return redirect(url_for('.hello'))
+
+
+def _accepted(job):
+    """Réponse 202 pour un job mis en file."""
+    status_url = url_for('.job_status', job_id=job.id)
+    body = {"status": "accepted", "job_id": job.id, "ue_id": job.ue_id, "status_url": status_url}
+    return jsonify(body), 202, {"Location": status_url}
+
+
+def _shed(error):
+    """Réponse 429 quand la file de jobs est pleine, avec un Retry-After estimé."""
+    retry_after = JOB_QUEUE.retry_after()
+    return jsonify({"error": str(error), "retry_after": retry_after}), 429, {"Retry-After": str(retry_after)}
+
+
+def _ue_job_key(ue_id):
+    """Clé de coalescence des jobs d'un UE : un job plus récent remplace celui en attente."""
+    return f"ue:{ue_id}"
+
+
+def _reserve_identity(ue_id):
+    """Réserve l'identité de ``ue_id`` ; retourne ``True`` si elle n'était pas encore réservée."""
+    reserved = ue_id not in ALLOCATOR
+    ue_identity(ue_id)
+    return reserved
+
+
+def connect_ue(ue_id):
+    """Provisionne un UE connecté ; sa chronologie démarre à l'exécution du job, pas à son dépôt."""
+    TRACER.begin(ue_id)
+    provisioner = BulkProvisioner(provision_ue_steps(), outcomes=UE_ATTACH_COUNTER,
+                                  on_results=record_attach_results)
+    return provisioner.provision_one(ue_id)
+
+
+def _ue_event_job(event, ue_id):
+    """Job ``(kind, ue_id, run, key)`` appliquant un événement ``connect``/``disconnect`` d'un UE."""
+    if event == "connect":
+        return "ue_connect", ue_id, connect_ue, _ue_job_key(ue_id)
+    return "ue_disconnect", ue_id, disconnect_ue, _ue_job_key(ue_id)
+
+
+@bp.route('/add_pod', methods=['POST'])
 def add_pods():
-    i = get_last_ue_index() + 1
+    # Réservation atomique de l'identifiant et de l'identité réseau (emplacements libérés réutilisés)
+    try:
+        i = ALLOCATOR.allocate()
+    except PoolExhausted as e:
+        return jsonify({"error": str(e)}), 503
+    TRACER.begin(i)
     print(f"Génération du UE {i}...")
     
-    # 1. Générer config UE avec DNN unique
-    generate_ue_config(i)
+    # 1. Générer config UE avec DNN unique (local, réserve l'index)
+    config_content = generate_ue_config(i)
     
-    # 2. Créer un UPF dédié pour ce nouvel UE
+    # 2-4. UPF dédié, notification SMF, puis ConfigMap et Pod : en arrière-plan
+    steps = [
+        [("upf", provision_upf_for_ue), ("configmap", lambda ue_id: create_ue_configmap(ue_id, config_content))],
+        ("smf_notify", notify_smf_new_dnn),
+        ("pod", create_ue_pod),
+    ]
+    provisioner = BulkProvisioner(steps, outcomes=UE_ATTACH_COUNTER, on_results=record_attach_results)
     try:
-        create_upf_for_ue(i, image=UPF_IMAGE, replicas=UPF_REPLICAS)
-    except Exception as e:
-        print(f"Erreur lors de la création de l'UPF pour UE {i}: {e}")
-    
-    # 3. Notifier le SMF du nouveau mapping DNN → UPF
-    notify_smf_new_dnn(i)
+        job = JOB_QUEUE.submit("add_pod", i, provisioner.provision_one, key=_ue_job_key(i))
+    except QueueFull as e:
+        return _shed(e)
+    print(f"UE {i} généré (job {job.id} en file)")
     
-    # 4. Créer les ressources UE (ConfigMap et Pod)
-    create_ue_configmap(i)
-    create_ue_pod(i)
-    print(f"UE {i} généré (fichiers de config créés)")
-    
-    return redirect(url_for('hello'))
+    if _wants_json():
+        return _accepted(job)
+    return redirect(url_for('.hello'))
 
 def generate_ue_config(ue_id):
-    """Génère un fichier de configuration UERANSIM pour un UE"""
-    # Padding pour avoir un IMSI unique (ex: 208950000000001)
-    imsi = f"20895{ue_id:010d}"
-    msisdn = f"{ue_id:010d}"
-    
-    config_content = f"""# UE Configuration for ue{ue_id}
-supi: 'imsi-{imsi}'
-mcc: '208'
-mnc: '95'
-key: '465B5CE8B199B49FAA5F0A2EE238A6BC'
-op: 'E8ED289DEBA952E4283B54E88E6183CA'
-opType: 'OPC'
-amf: '8000'
-imei: '{ue_id:015d}'
-imeiSv: '{ue_id:016d}'
-
-# List of gNB IP addresses for Radio Link Simulation
-# Use pod name directly for radio link simulation (not service)
-gnbSearchList:
-  - ueransim-gnb.nexslice.svc.cluster.local
-
-# UAC Access Identities Configuration
-uacAic:
-  mps: false
-  mcs: false
-
-# UAC Access Control Class
-uacAcc:
-  normalClass: 0
-  class11: false
-  class12: false
-  class13: false
-  class14: false
-  class15: false
-
-# Initial PDU sessions to be established
-sessions:
-  - type: 'IPv4'
-    apn: 'oai-ue{ue_id}'
-    slice:
-      sst: 1
-      sd: {ue_id:06d}
-
-# Configured NSSAI for this UE by HPLMN
-configured-nssai:
-  - sst: 1
-    sd: {ue_id:06d}
-
-# Default Configured NSSAI for this UE
-default-nssai:
-  - sst: 1
-    sd: {ue_id:06d}
-
-# Supported encryption and integrity algorithms by this UE
-integrity:
-  IA1: true
-  IA2: true
-  IA3: true
-
-integrityMaxRate:
-  uplink: 'full'
-  downlink: 'full'
-
-ciphering:
-  EA1: true
-  EA2: true
-  EA3: true
-"""
-    
-    # Créer le dossier s'il n'existe pas
-    os.makedirs("./tmp/ue-confs/", exist_ok=True)
-    
-    with open(f"./tmp/ue-confs/ue{ue_id}.yaml", "w") as f:
-        f.write(config_content)
-    refresh_ue_metrics()
-
-def create_ue_configmap(ue_id):
+    """Génère la configuration UERANSIM d'un UE (rendue en mémoire, persistée en arrière-plan)"""
+    identity = ue_identity(ue_id)
+    with TRACER.span(ue_id, "config_render"):
+        config_content = render_ue_config(ue_id, identity)
+    CONFIG_WRITER.write(ue_id, config_content)
+    UE_REGISTRY.add(ue_id, phase="configured", error=None, **identity)
+    return config_content
+
+def create_ue_configmap(ue_id, config_data=None):
     """Crée un ConfigMap Kubernetes pour la configuration du UE"""
-    if DEMO_MODE:
-        print(f"[DEMO_MODE] Skip ConfigMap creation for UE {ue_id}.")
+    if config_data is None:
+        config_data = render_ue_config(ue_id, ue_identity(ue_id))
+    if CONFIGMAP_SHARDS is not None:
+        configmap_name, key = CONFIGMAP_SHARDS.locate(ue_id)
+        with TRACER.span(ue_id, "configmap_create"):
+            write = CONFIGMAP_SHARDS.put(ue_id, config_data)
+            # Le Pod monte la clé : elle doit exister avant sa création
+            if not write.wait(CONFIGMAP_SHARD_WAIT):
+                print(f"Erreur lors de l'écriture de {key} dans {configmap_name}: {write.error or 'délai dépassé'}")
+                return False
+        print(f"ConfigMap {configmap_name} : clé {key} écrite.")
         return True
     try:
-        k8s_config.load_kube_config()
-        v1 = client.CoreV1Api()
-        
-        # Lire le fichier de configuration
-        with open(f"./tmp/ue-confs/ue{ue_id}.yaml", "r") as f:
-            config_data = f.read()
-        
-        configmap_name = f"ueransim-ue{ue_id}-config"
-        configmap = {
-            "apiVersion": "v1",
-            "kind": "ConfigMap",
-            "metadata": {
-                "name": configmap_name,
-                "namespace": "nexslice"
-            },
-            "data": {
-                # UERANSIM entrypoint expects /etc/ueransim/ue.yaml (hardcoded)
-                "ue.yaml": config_data
-            }
-        }
-        
-        v1.create_namespaced_config_map(namespace="nexslice", body=configmap)
-        print(f"ConfigMap {configmap_name} créé avec succès.")
+        # La config est rendue en mémoire : aucune relecture du fichier local
+        configmap = render_ue_configmap(ue_id, config_data)
+        with TRACER.span(ue_id, "configmap_create"):
+            action = BACKEND.apply(configmap)
+        print(f"ConfigMap {configmap['metadata']['name']} : {action}.")
     except Exception as e:
         print(f"Erreur lors de la création du ConfigMap: {e}")
         # En mode dev sans Kubernetes, on continue sans créer le ConfigMap
@@ -387,59 +738,20 @@ def create_ue_configmap(ue_id):
 
 def create_ue_pod(ue_id, image="gradiant/ueransim:3.2.6"):
     """Crée un Pod UERANSIM pour simuler un UE"""
-    if DEMO_MODE:
-        print(f"[DEMO_MODE] Skip Pod creation for UE {ue_id}.")
-        return True
     try:
-        # Charger la config Kubernetes uniquement quand nécessaire
-        k8s_config.load_kube_config()
-        v1 = client.CoreV1Api()
-        
-        pod_name = f"ueransim-ue{ue_id}"
-        configmap_name = f"ueransim-ue{ue_id}-config"
-        
-        pod_manifest = {
-            "apiVersion": "v1",
-            "kind": "Pod",
-            "metadata": {
-                "name": pod_name,
-                "namespace": "nexslice",
-                "labels": {
-                    "app": "ueransim-ue",
-                    "ue-id": str(ue_id)
-                }
-            },
-                "spec": {
-                "containers": [{
-                    "name": "ueransim-ue",
-                    "image": image,
-                    "imagePullPolicy": "Always",
-                    # UERANSIM entrypoint expects: <component> <config-file>
-                    # where component is 'ue' or 'gnb'
-                    "args": ["ue", "/etc/ueransim/ue.yaml"],
-                    "volumeMounts": [{
-                        "name": "config-volume",
-                        "mountPath": "/etc/ueransim"
-                    }],
-                    "securityContext": {
-                        "capabilities": {
-                            "add": ["NET_ADMIN"]
-                        },
-                        "privileged": True
-                    }
-                }],
-                "volumes": [{
-                    "name": "config-volume",
-                    "configMap": {
-                        "name": configmap_name
-                    }
-                }],
-                "restartPolicy": "Always"
-            }
-        }
-        
-        v1.create_namespaced_pod(namespace="nexslice", body=pod_manifest)
-        print(f"Pod {pod_name} créé avec succès.")
+        if UE_GROUPS_ENABLED:
+            # Le Pod du groupe démarre l'UE dès que sa clé apparaît dans le ConfigMap monté
+            pod_name, _ = CONFIGMAP_SHARDS.locate(ue_id)
+            group = (ue_id - 1) // UE_GROUP_SIZE
+            pod_manifest = render_ue_group_pod(pod_name, group, image)
+        else:
+            shard = CONFIGMAP_SHARDS.locate(ue_id) if CONFIGMAP_SHARDS is not None else None
+            upf = PLACEMENT.upf_of(ue_id) if PLACEMENT is not None else None
+            pod_manifest = render_ue_pod(ue_id, image, shard, upf)
+            pod_name = pod_manifest["metadata"]["name"]
+        with TRACER.span(ue_id, "pod_create"):
+            action = BACKEND.apply(pod_manifest, **_cached(UE_PODS, pod_name))
+        print(f"Pod {pod_name} (UE {ue_id}) : {action}.")
     except Exception as e:
         print(f"Erreur lors de la création du Pod: {e}")
         # En mode dev sans Kubernetes, on continue sans créer le Pod
@@ -447,69 +759,77 @@ def create_ue_pod(ue_id, image="gradiant/ueransim:3.2.6"):
     return True
 
 
-def make_upf_deployment_and_service(name, labels, image, replicas):
+def make_upf_deployment_and_service(name, labels, image, replicas, identity=None):
     """Return a (deployment, service) tuple for an UPF named `name`.
 
     Includes minimal resource requests/limits to avoid noisy-neighbor issues in cluster.
+    `identity` (dedicated UPF) is the served UE's allocation, added as annotations.
     """
-    deployment = {
-        "apiVersion": "apps/v1",
-        "kind": "Deployment",
-        "metadata": {"name": name, "namespace": "nexslice"},
-        "spec": {
-            "replicas": replicas,
-            "selector": {"matchLabels": labels},
-            "template": {
-                "metadata": {"labels": labels},
-                "spec": {
-                    "volumes": [{
-                        "name": "configuration",
-                        "configMap": {
-                            "name": "oai-upf-configmap"
-                        }
-                    }],
-                    "containers": [{
-                        "name": "upf",
-                        "image": image,
-                        "imagePullPolicy": "IfNotPresent",
-                        "ports": [{"containerPort": 2152, "name": "gtpu"}, {"containerPort": 8805, "name": "pfcp"}],
-                        "env": [
-                            {"name": "TZ", "value": "Europe/Paris"},
-                            {"name": "ENABLE_5G_FEATURES", "value": "yes"},
-                            {"name": "REGISTER_NRF", "value": "no"}
-                        ],
-                        "volumeMounts": [{
-                            "name": "configuration",
-                            "mountPath": "/openair-upf/etc"
-                        }],
-                        "securityContext": {
-                            "capabilities": {"add": ["NET_ADMIN", "SYS_ADMIN"]},
-                            "privileged": True
-                        },
-                        "resources": {
-                            "requests": {"cpu": "100m", "memory": "128Mi"},
-                            "limits": {"cpu": "500m", "memory": "512Mi"}
-                        }
-                    }]
-                }
-            }
-        }
-    }
+    return render_upf(name, labels, image, replicas, identity)
 
-    service = {
-        "apiVersion": "v1",
-        "kind": "Service",
-        "metadata": {"name": name, "namespace": "nexslice"},
-        "spec": {
-            "selector": labels,
-            "ports": [
-                {"protocol": "UDP", "port": 2152, "targetPort": "gtpu", "name": "gtpu"},
-                {"protocol": "UDP", "port": 8805, "targetPort": "pfcp", "name": "pfcp"}
-            ]
-        }
-    }
 
-    return deployment, service
+# UPF pré-démarrés (backend kubernetes), construits avec le même manifeste que les UPF dédiés
+WARM_POOL = WarmPool(make_upf_deployment_and_service, WARM_POOL_SIZE if BACKEND.cluster_api else 0, UPF_IMAGE,
+                     UPF_REPLICAS)
+
+
+def create_shared_upf(name):
+    """Crée (ou vérifie) l'UPF partagé ``name`` du mode consolidation."""
+    deployment, service = make_upf_deployment_and_service(name, {"app": "upf", "upf-shared": name},
+                                                          UPF_IMAGE, UPF_REPLICAS)
+    deployment_action = BACKEND.apply(deployment, **_cached(UPF_DEPLOYMENTS, name))
+    service_action = BACKEND.apply(service, **_cached(UPF_SERVICES, name))
+    print(f"UPF partagé {name} : Deployment {deployment_action}, Service {service_action}.")
+    refresh_upf_metrics()
+    return True
+
+
+def remove_shared_upf(name):
+    """Supprime l'UPF partagé ``name`` une fois vidé de ses UE."""
+    for kind in ("Deployment", "Service"):
+        BACKEND.delete(kind, name)
+    UPF_DELETE_COUNTER.inc()
+    refresh_upf_metrics()
+
+
+# Mode consolidation (UPF_MAX_UES_PER_UPF > 0) : plusieurs UE par UPF, placés par bin-packing
+PLACEMENT = (PlacementScheduler(UPF_MAX_UES_PER_UPF, create_shared_upf, remove_shared_upf)
+             if UPF_MAX_UES_PER_UPF > 0 else None)
+
+
+def restore_placement():
+    """Reconstruit le placement UE → UPF partagé depuis les labels des Pods UE."""
+    if PLACEMENT is None or not UE_PODS.wait_synced(30):
+        return
+    PLACEMENT.restore({ue_id_of(pod): pod["metadata"]["labels"].get("nexslice.io/upf")
+                       for pod in UE_PODS.items() if ue_id_of(pod) is not None})
+
+
+def provision_upf_for_ue(ue_id):
+    """Fournit un UPF à un UE : pris dans le warm pool si possible, sinon créé à froid.
+
+    En mode consolidation, l'UE est placé sur un UPF partagé.
+    """
+    if PLACEMENT is not None:
+        with TRACER.span(ue_id, "upf_place"):
+            upf_name = PLACEMENT.assign(ue_id)
+        if upf_name is None:
+            return False
+        print(f"UE {ue_id} placé sur l'UPF partagé {upf_name}.")
+        return True
+    if WARM_POOL.enabled:
+        # Connexion rejouée : l'UE a déjà un UPF (éventuellement issu du pool)
+        if UPF_DEPLOYMENTS.synced.is_set() and UPF_DEPLOYMENTS.has_ue(ue_id):
+            return True
+        try:
+            with TRACER.span(ue_id, "upf_claim"):
+                claimed = WARM_POOL.claim(ue_id)
+            if claimed:
+                refresh_upf_metrics()
+                return True
+        except Exception as e:
+            print(f"Erreur lors de l'attribution d'un UPF du pool à l'UE {ue_id}: {e}")
+    return create_upf_for_ue(ue_id, image=UPF_IMAGE, replicas=UPF_REPLICAS)
 
 
 def create_upf_for_ue(ue_id, image="free5gc/upf:latest", replicas=1):
@@ -518,24 +838,17 @@ def create_upf_for_ue(ue_id, image="free5gc/upf:latest", replicas=1):
     Note: l'image par défaut est un placeholder — changez-la pour une image UPF réelle
     adaptée à votre environnement (ex: free5gc/upf, upf-bess, etc.).
     """
-    if DEMO_MODE:
-        print(f"[DEMO_MODE] Pretend creating UPF upf-ue{ue_id} (no Kubernetes API call).")
-        # Update gauge approximation
-        refresh_upf_metrics()
-        return True
     try:
-        k8s_config.load_kube_config()
-        apps_v1 = client.AppsV1Api()
-        v1 = client.CoreV1Api()
-
         name = f"upf-ue{ue_id}"
         labels = {"app": "upf", "ue-id": str(ue_id)}
 
-        deployment, service = make_upf_deployment_and_service(name, labels, image, replicas)
+        deployment, service = make_upf_deployment_and_service(name, labels, image, replicas, ue_identity(ue_id))
 
-        apps_v1.create_namespaced_deployment(namespace="nexslice", body=deployment)
-        v1.create_namespaced_service(namespace="nexslice", body=service)
-        print(f"UPF {name} (Deployment+Service) créé pour UE {ue_id}.")
+        with TRACER.span(ue_id, "deployment_create"):
+            deployment_action = BACKEND.apply(deployment, **_cached(UPF_DEPLOYMENTS, name))
+        with TRACER.span(ue_id, "service_create"):
+            service_action = BACKEND.apply(service, **_cached(UPF_SERVICES, name))
+        print(f"UPF {name} pour UE {ue_id} : Deployment {deployment_action}, Service {service_action}.")
         # Refresh gauge to reflect the new UPF
         refresh_upf_metrics()
     except Exception as e:
@@ -545,32 +858,40 @@ def create_upf_for_ue(ue_id, image="free5gc/upf:latest", replicas=1):
 
 
 def delete_upf_for_ue(ue_id):
-    """Supprime la Deployment et le Service UPF pour un UE si ils existent."""
-    if DEMO_MODE:
-        print(f"[DEMO_MODE] Pretend deleting UPF upf-ue{ue_id} (no Kubernetes API call).")
-        # Update gauge approximation
-        refresh_upf_metrics()
+    """Supprime la Deployment et le Service UPF pour un UE si ils existent.
+
+    En mode consolidation, l'UE libère sa place ; l'UPF partagé n'est supprimé qu'une fois vide.
+    """
+    if PLACEMENT is not None:
+        PLACEMENT.release(ue_id)
         return True
     try:
-        k8s_config.load_kube_config()
-        apps_v1 = client.AppsV1Api()
-        v1 = client.CoreV1Api()
-
         name = f"upf-ue{ue_id}"
 
+        # Un UPF venant du warm pool garde son nom upf-warm-* : on le retrouve par label
+        if UPF_DEPLOYMENTS.synced.is_set():
+            deployment_names = [d["metadata"]["name"] for d in UPF_DEPLOYMENTS.get_by_ue(ue_id)]
+        elif WARM_POOL.enabled:
+            deployments, _ = BACKEND.list("Deployment", f"app=upf,ue-id={ue_id}")
+            deployment_names = [d["metadata"]["name"] for d in deployments]
+        else:
+            deployment_names = []
+
         # Delete deployment (ignore if not found)
-        try:
-            apps_v1.delete_namespaced_deployment(name=name, namespace="nexslice")
-            print(f"Deployment {name} supprimé.")
-        except Exception:
-            pass
+        for deployment_name in deployment_names or [name]:
+            try:
+                if BACKEND.delete("Deployment", deployment_name):
+                    print(f"Deployment {deployment_name} supprimé.")
+            except Exception:
+                pass
 
         # Delete service
         try:
-            v1.delete_namespaced_service(name=name, namespace="nexslice")
-            print(f"Service {name} supprimé.")
+            if BACKEND.delete("Service", name):
+                print(f"Service {name} supprimé.")
         except Exception:
             pass
+        UPF_DELETE_COUNTER.inc()
         # Refresh gauge to reflect deletion
         refresh_upf_metrics()
     except Exception as e:
@@ -579,50 +900,141 @@ def delete_upf_for_ue(ue_id):
     return True
 
 
-@app.route('/remove_pod/<int:ue_id>', methods=['POST'])
-def remove_pod(ue_id):
-    """Supprime le Pod UE, le ConfigMap associé et l'UPF dédié.
+def delete_ue_pod(ue_id):
+    """Arrête la simulation de l'UE : suppression de son Pod, ou du Pod de groupe devenu vide.
 
-    Cette route permet de simuler la déconnexion d'un UE et libérer les
-    ressources UPF associées.
+    En mode UE groupés, l'UE s'arrête quand sa clé est retirée du ConfigMap du
+    groupe ; le Pod n'est supprimé que lorsque plus aucun UE du groupe n'est configuré.
     """
-    # Supprimer le fichier de configuration local
-    config_file = f"./tmp/ue-confs/ue{ue_id}.yaml"
+    if UE_GROUPS_ENABLED:
+        lo, hi = CONFIGMAP_SHARDS.bounds(ue_id)
+        if UE_REGISTRY.between(lo, hi):
+            return True
+        pod_name, _ = CONFIGMAP_SHARDS.locate(ue_id)
+    else:
+        pod_name = f"ueransim-ue{ue_id}"
+    if not BACKEND.delete("Pod", pod_name):
+        print(f"Pod {pod_name} non trouvé.")
+        return True
+    print(f"Pod {pod_name} supprimé.")
+    return True
+
+
+def delete_ue_configmap(ue_id):
+    """Retire la config du UE du cluster (clé de shard ou ConfigMap dédié)."""
+    if CONFIGMAP_SHARDS is not None:
+        CONFIGMAP_SHARDS.remove([ue_id])
+        return True
+    configmap_name = f"ueransim-ue{ue_id}-config"
+    if not BACKEND.delete("ConfigMap", configmap_name):
+        print(f"ConfigMap {configmap_name} non trouvé.")
+        return True
+    print(f"ConfigMap {configmap_name} supprimé.")
+    return True
+
+
+def disconnect_ue_resources(ue_id):
+    """Supprime en parallèle le Pod, la config et l'UPF d'un UE ; retourne le rapport d'exécution."""
+    steps = [[("pod", delete_ue_pod), ("configmap", delete_ue_configmap), ("upf", delete_upf_for_ue)]]
+    return BulkProvisioner(steps, outcomes=UE_DETACH_COUNTER).provision_one(ue_id)
+
+
+def _upf_deployment_of(ue_id):
+    """Deployment UPF attribuée à l'UE (cache watch, sinon LIST) ; None si absente."""
+    if UPF_DEPLOYMENTS.synced.is_set():
+        deployments = UPF_DEPLOYMENTS.get_by_ue(ue_id)
+    else:
+        deployments, _ = BACKEND.list("Deployment", f"app=upf,ue-id={ue_id}")
+    return deployments[0] if deployments else None
+
+
+def create_upf_service(ue_id):
+    """Recrée le seul Service d'un UPF dédié dont la Deployment existe."""
+    name = f"upf-ue{ue_id}"
+    ue_labels = {"app": "upf", "ue-id": str(ue_id)}
+    deployment = _upf_deployment_of(ue_id)
+    pool_id = (deployment["metadata"].get("labels") or {}).get("pool-id") if deployment else None
+    # UPF pris dans le warm pool : son pod garde les labels du pool, le Service le sélectionne par pool-id
+    selector = {"pool-id": pool_id} if pool_id else ue_labels
+    _, service = make_upf_deployment_and_service(name, selector, UPF_IMAGE, UPF_REPLICAS, ue_identity(ue_id))
+    service["metadata"]["labels"] = ue_labels
+    action = BACKEND.apply(service, **_cached(UPF_SERVICES, name))
+    print(f"Service {name} (UE {ue_id}) : {action}.")
+    return True
+
+
+def repair_ue(ue_id, missing):
+    """Recrée les ressources ``missing`` (types du réconciliateur) d'un UE voulu."""
+    steps = []
+    if "configmap" in missing:
+        steps.append(("configmap", create_ue_configmap))
+    if "deployment" in missing:
+        steps.append(("upf", provision_upf_for_ue))
+    elif "service" in missing:
+        steps.append(("upf_service", create_upf_service))
+    if "pod" in missing:
+        steps.append(("pod", create_ue_pod))
+    return BulkProvisioner(steps, on_results=record_attach_results).provision_one(ue_id)["ok"]
+
+
+def adopt_ues(ue_ids):
+    """Réintègre en base (une transaction) des UE complets trouvés dans le cluster."""
+    UE_REGISTRY.add_many({ue_id: {**ue_identity(ue_id), "phase": "provisioned", "upf": upf_name_for(ue_id)}
+                          for ue_id in ue_ids})
+
+
+def _reconciled_kinds():
+    """Ressources propres à chaque UE dans le mode de déploiement actif."""
+    kinds = []
+    if not UE_GROUPS_ENABLED:
+        kinds.append("pod")
+    if CONFIGMAP_SHARDS is None:
+        kinds.append("configmap")
+    if PLACEMENT is None:
+        kinds += ["deployment", "service"]
+    return kinds
+
+
+RECONCILER = Reconciler(
+    _reconciled_kinds(), STATE_STORE.updated_at, repair_ue, adopt_ues,
+    busy=lambda ue_id: JOB_QUEUE.busy(_ue_job_key(ue_id)),
+    caches={"pod": UE_PODS, "deployment": UPF_DEPLOYMENTS, "service": UPF_SERVICES},
+)
+
+
+def disconnect_ue(ue_id):
+    """Déconnexion complète d'un UE : état local, notification SMF puis ressources du cluster."""
+    CONFIG_WRITER.discard(ue_id)
+    config_file = os.path.join(UE_CONF_DIR, f"ue{ue_id}.yaml")
     if os.path.exists(config_file):
         os.remove(config_file)
-        refresh_ue_metrics()
         print(f"Fichier {config_file} supprimé.")
-        refresh_ue_metrics()
-    
-    # Supprimer le Pod
-    try:
-        k8s_config.load_kube_config()
-        v1 = client.CoreV1Api()
-        pod_name = f"ueransim-ue{ue_id}"
-        configmap_name = f"ueransim-ue{ue_id}-config"
+    UE_REGISTRY.remove(ue_id)
+    notify_smf_dnn_removed(ue_id)
 
-        try:
-            v1.delete_namespaced_pod(name=pod_name, namespace="nexslice")
-            print(f"Pod {pod_name} supprimé.")
-        except Exception:
-            print(f"Pod {pod_name} non trouvé ou erreur lors de la suppression.")
+    # Supprimer le Pod, le ConfigMap et l'UPF (appels API en parallèle)
+    result = disconnect_ue_resources(ue_id)
+    if not result["ok"]:
+        print(f"Erreur lors de la suppression des ressources pour UE {ue_id} "
+              f"({result['failed_step']}): {result['error']}")
+    # Identifiant, SD et sous-réseau réutilisables une fois les ressources supprimées
+    ALLOCATOR.release([ue_id])
+    return result
 
-        # Supprimer ConfigMap
-        try:
-            v1.delete_namespaced_config_map(name=configmap_name, namespace="nexslice")
-            print(f"ConfigMap {configmap_name} supprimé.")
-        except Exception:
-            print(f"ConfigMap {configmap_name} non trouvé ou erreur lors de la suppression.")
 
-        # Supprimer l'UPF
-        delete_upf_for_ue(ue_id)
-    except Exception as e:
-        print(f"Erreur lors de la suppression des ressources pour UE {ue_id}: {e}")
+@bp.route('/remove_pod/<int:ue_id>', methods=['POST'])
+def remove_pod(ue_id):
+    """Supprime le Pod UE, le ConfigMap associé et l'UPF dédié.
 
-    return redirect(url_for('hello'))
+    Cette route permet de simuler la déconnexion d'un UE et libérer les
+    ressources UPF associées.
+    """
+    disconnect_ue(ue_id)
+    return redirect(url_for('.hello'))
 
 
-@app.route('/api/ue-disconnect', methods=['POST'])
+@bp.route('/api/ue-disconnect', methods=['POST'])
+@idempotent(IDEMPOTENCY)
 def ue_disconnect():
     """Webhook simplifié pour signaler la déconnexion d'un UE.
 
@@ -630,44 +1042,25 @@ def ue_disconnect():
     {"ue_id": 1}
 
     Supprime les ressources UE locales (fichier de config, Pod, ConfigMap)
-    ainsi que l'UPF dédié.
+    ainsi que l'UPF dédié. Répond 202 avec un ``job_id``, comme
+    ``/api/ue-connect`` : les deux webhooks d'un même UE partagent la fenêtre
+    d'anti-rebond ``UE_DEBOUNCE_WINDOW``.
     """
     data = request.get_json(silent=True) or {}
     ue_id = data.get("ue_id")
     if not isinstance(ue_id, int) or ue_id <= 0:
         return jsonify({"error": "ue_id entier positif requis"}), 400
 
-    # Réutiliser la logique existante de remove_pod
-    config_file = f"./tmp/ue-confs/ue{ue_id}.yaml"
-    if os.path.exists(config_file):
-        os.remove(config_file)
-        refresh_ue_metrics()
-
     try:
-        k8s_config.load_kube_config()
-        v1 = client.CoreV1Api()
-        pod_name = f"ueransim-ue{ue_id}"
-        configmap_name = f"ueransim-ue{ue_id}-config"
-
-        try:
-            v1.delete_namespaced_pod(name=pod_name, namespace="nexslice")
-        except Exception:
-            pass
-
-        try:
-            v1.delete_namespaced_config_map(name=configmap_name, namespace="nexslice")
-        except Exception:
-            pass
-
-        delete_upf_for_ue(ue_id)
-    except Exception as e:
-        print(f"Erreur lors de la suppression des ressources pour UE {ue_id}: {e}")
-        return jsonify({"error": "erreur de suppression des ressources"}), 500
+        job = JOB_QUEUE.submit(*_ue_event_job("disconnect", ue_id), delay=UE_DEBOUNCE_WINDOW)
+    except QueueFull as e:
+        return _shed(e)
 
-    return jsonify({"status": "ok", "ue_id": ue_id}), 200
+    return _accepted(job)
 
 
-@app.route('/api/ue-connect', methods=['POST'])
+@bp.route('/api/ue-connect', methods=['POST'])
+@idempotent(IDEMPOTENCY)
 def ue_connect():
     """Webhook simplifié pour signaler la connexion d'un UE.
 
@@ -677,36 +1070,205 @@ def ue_connect():
     Dans un système complet, cet endpoint pourrait être appelé par
     Alertmanager, un opérateur 5G ou un autre composant lorsqu'un
     événement de connexion UE est détecté.
+
+    Répond 202 avec un ``job_id`` ; l'avancement est consultable via
+    ``GET /api/jobs/<job_id>``. Le job attend ``UE_DEBOUNCE_WINDOW``
+    secondes : une déconnexion du même UE reçue entre-temps le remplace
+    (statut ``superseded``), sans création ni suppression d'UPF inutile.
     """
     data = request.get_json(silent=True) or {}
     ue_id = data.get("ue_id")
     if not isinstance(ue_id, int) or ue_id <= 0:
         return jsonify({"error": "ue_id entier positif requis"}), 400
 
-    # Générer configuration et ressources UE si nécessaire
-    generate_ue_config(ue_id)
-    create_ue_configmap(ue_id)
-    create_ue_pod(ue_id)
+    # Réserver l'identifiant dès le dépôt : /add_pod ne doit pas l'attribuer pendant l'anti-rebond
+    try:
+        reserved = _reserve_identity(ue_id)
+    except PoolExhausted as e:
+        return jsonify({"error": str(e)}), 503
+
+    # Générer configuration et ressources UE (+ UPF dédié) en arrière-plan
+    try:
+        job = JOB_QUEUE.submit(*_ue_event_job("connect", ue_id), delay=UE_DEBOUNCE_WINDOW)
+    except QueueFull as e:
+        if reserved:
+            ALLOCATOR.release([ue_id])
+        return _shed(e)
+
+    return _accepted(job)
 
-    # Créer UPF dédié
-    ok = create_upf_for_ue(ue_id, image=UPF_IMAGE, replicas=UPF_REPLICAS)
-    if not ok:
-        return jsonify({"error": f"échec création UPF pour UE {ue_id}"}), 500
 
-    return jsonify({"status": "ok", "ue_id": ue_id}), 200
+@bp.route('/api/ue-events', methods=['POST'])
+def ue_events():
+    """Ingestion en flux d'événements UE : corps NDJSON, une ligne par événement.
 
+    Chaque ligne ``{"event": "connect"|"disconnect", "ue_id": 1}`` est
+    validée à la lecture ; les événements sont déposés par lots dans la file
+    de jobs, avec la même coalescence par UE que les webhooks unitaires. La
+    réponse NDJSON donne un résultat par ligne (``accepted`` + ``job_id``,
+    ``superseded`` ou ``rejected``), puis un résumé.
+    """
+    def submit(events):
+        outcomes, accepted, reserved = [None] * len(events), [], set()
+        for n, (event, ue_id) in enumerate(events):
+            if event == "connect":
+                try:
+                    if _reserve_identity(ue_id):
+                        reserved.add(ue_id)
+                except PoolExhausted as e:
+                    outcomes[n] = e
+                    continue
+            accepted.append(n)
+        jobs = JOB_QUEUE.submit_many([_ue_event_job(*events[n]) for n in accepted], delay=UE_DEBOUNCE_WINDOW)
+        for n, job in zip(accepted, jobs):
+            outcomes[n] = job
+        ALLOCATOR.release([events[n][1] for n, job in zip(accepted, jobs)
+                           if isinstance(job, QueueFull) and events[n][1] in reserved])
+        return outcomes
+
+    results = ingest_ue_events(request.stream, submit)
+    return Response(stream_with_context(json.dumps(r) + "\n" for r in results), mimetype="application/x-ndjson")
+
+
+@bp.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    """Etat d'un job asynchrone : statut, durée de chaque étape et erreur éventuelle."""
+    job = JOB_QUEUE.get(job_id)
+    if job is None:
+        return jsonify({"error": "job inconnu"}), 404
+    return jsonify(job.to_dict())
+
+
+@bp.route('/api/ue-status/<int:ue_id>')
+def ue_status(ue_id):
+    """Existence et readiness du Pod UE et de l'UPF, servies depuis les caches watch."""
+    synced = all(informer.synced.is_set() for informer in INFORMERS)
+    body = {"ue_id": ue_id, "configured": ue_id in UE_REGISTRY, "cache_synced": synced,
+            "state": STATE_STORE.get(ue_id)}
+    if not synced:
+        return jsonify(body)
+    if UE_GROUPS_ENABLED:
+        group_pod, _ = CONFIGMAP_SHARDS.locate(ue_id)
+        pods = [p for p in (UE_PODS.get(group_pod),) if p is not None]
+        body["group"] = group_pod
+    else:
+        pods = UE_PODS.get_by_ue(ue_id)
+    deployments = UPF_DEPLOYMENTS.get_by_ue(ue_id)
+    body["pod"] = {
+        "exists": bool(pods),
+        "ready": any(pod_ready(p) for p in pods),
+        "phase": (pods[0].get("status") or {}).get("phase") if pods else None,
+    }
+    body["upf"] = {
+        "exists": bool(deployments),
+        "ready": any(deployment_ready(d) for d in deployments),
+        "service": UPF_SERVICES.has_ue(ue_id),
+    }
+    return jsonify(body)
+
+
+@bp.route('/api/traces/<int:ue_id>')
+def ue_trace(ue_id):
+    """Chronologie de l'attachement d'un UE (étapes, durées, délai jusqu'à l'UPF prêt)."""
+    trace = TRACER.get(ue_id)
+    if trace is None:
+        return jsonify({"error": "aucune trace pour cet UE"}), 404
+    return jsonify(trace)
+
+
+@bp.route('/api/traces/chrome')
+def chrome_trace():
+    """Export Chrome trace JSON des attachements (tous, ou ``?ue_id=1,2,3``)."""
+    raw = request.args.get("ue_id")
+    try:
+        ue_ids = [int(x) for x in raw.split(",")] if raw else None
+    except ValueError:
+        return jsonify({"error": "ue_id doit être une liste d'entiers"}), 400
+    return jsonify(TRACER.chrome_trace(ue_ids))
 
-@app.route('/metrics')
+
+@bp.route('/api/warm-pool')
+def warm_pool_stats():
+    """Etat du pool d'UPF pré-démarrés."""
+    return jsonify(WARM_POOL.stats())
+
+
+@bp.route('/api/placement')
+def placement_stats():
+    """Etat du placement des UE sur les UPF partagés (mode consolidation)."""
+    if PLACEMENT is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **PLACEMENT.stats()})
+
+
+@bp.route('/api/reconcile', methods=['GET', 'POST'])
+def reconcile_status():
+    """Dernier rapport de réconciliation ; ``POST`` lance un balayage immédiat."""
+    if request.method == 'POST':
+        return jsonify(RECONCILER.run_once())
+    return jsonify(RECONCILER.last_report or {})
+
+
+@bp.route('/api/allocations')
+def allocation_stats():
+    """Occupation des espaces d'identifiants, de SD et de sous-réseaux, collisions détectées."""
+    return jsonify(ALLOCATOR.stats())
+
+
+@bp.route('/api/k8s-stats')
+def k8s_stats():
+    """Statistiques du backend (client Kubernetes partagé : pool et latences ; dryrun : appels prévus)."""
+    return jsonify({"backend": BACKEND.name, **BACKEND.stats()})
+
+
+@bp.route('/metrics')
 def metrics():
-    """Expose les métriques Prometheus."""
-    refresh_ue_metrics()
-    return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
+    """Expose les métriques Prometheus (agrégées sur tous les workers en mode multi-processus)."""
+    payload, content_type = latest_metrics()
+    return Response(payload, mimetype=content_type)
+
+
+def start_background(leader=True):
+    """Démarre les tâches de fond du contrôleur.
+
+    Avec plusieurs workers, seul le ``leader`` fait tourner les boucles qui
+    doivent être uniques (warm pool, placement, réconciliation, reprise des
+    outbox SMF orphelines) ; chaque worker garde ses caches watch et envoie sa propre outbox.
+    """
+    start_informers()
+    start_sampler()
+    # Ecritures des autres workers : compteurs, liste et flux SSE rafraîchis
+    UE_REGISTRY.start_sync(UE_REGISTRY_SYNC_INTERVAL)
+    if leader:
+        WARM_POOL.start()
+        if PLACEMENT is not None:
+            restore_placement()
+            PLACEMENT.start()
+        if RECONCILE_ENABLED:
+            RECONCILER.start(RECONCILE_INTERVAL)
+    if SMF_NOTIFY_ENABLED:
+        # Reprendre l'envoi des notifications restées dans l'outbox
+        SMF_NOTIFIER.adopt = leader
+        SMF_NOTIFIER.start()
+
+
+def create_app(start_services=False, leader=True):
+    """Construit l'application Flask (``start_services`` lance aussi les tâches de fond)."""
+    flask_app = Flask(__name__)
+    flask_app.register_blueprint(bp)
+    if start_services:
+        start_background(leader)
+    return flask_app
+
+
+app = create_app()
 
 
 if __name__ == "__main__":
-    # Permet de configurer l'hôte et le port via les variables d'environnement
+    # Serveur de développement ; en production : python -m src.server
     host = os.environ.get("HOST", "0.0.0.0")
     port = int(os.environ.get("PORT", "5000"))
     debug = os.environ.get("FLASK_DEBUG", "0") in ("1", "true", "True")
     print(f"Starting Flask on {host}:{port} (debug={debug})")
+    start_background()
     app.run(host=host, port=port, debug=debug)
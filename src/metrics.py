@@ -0,0 +1,131 @@
+"""Exposition des métriques Prometheus, en mono-processus ou multi-workers.
+
+Avec plusieurs workers (``PROMETHEUS_MULTIPROC_DIR`` défini avant l'import de
+``prometheus_client``), chaque processus écrit ses valeurs dans des fichiers
+partagés et ``/metrics`` les agrège via ``MultiProcessCollector`` : les
+compteurs et histogrammes sont sommés, les gauges agrégées selon leur
+``multiprocess_mode``. Les gauges calculées à la lecture (``set_function``) ne
+fonctionnent pas dans ce mode ; ``gauge_function`` les remplace alors par un
+échantillonnage périodique dans chaque worker.
+
+Les valeurs dérivées de l'état du contrôleur (registre UE, caches watch) sont
+calculées au moment du scrape par un ``StateCollector``, à partir de la
+mémoire uniquement : un scrape ne fait ni lecture disque ni appel API. Les
+séries par UE sont limitées aux ``METRICS_PER_UE_LIMIT`` premiers UE (0 par défaut).
+"""
+import os
+import threading
+import time
+
+from prometheus_client import REGISTRY, CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")
+try:
+    METRICS_SAMPLE_INTERVAL = float(os.environ.get("METRICS_SAMPLE_INTERVAL", "5"))
+except Exception:
+    METRICS_SAMPLE_INTERVAL = 5.0
+try:
+    METRICS_PER_UE_LIMIT = int(os.environ.get("METRICS_PER_UE_LIMIT", "0"))
+except Exception:
+    METRICS_PER_UE_LIMIT = 0
+
+_sampled = []
+_state_collectors = []
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def gauge_function(gauge, fn):
+    """Equivalent de ``gauge.set_function(fn)`` compatible avec le mode multi-workers."""
+    if not MULTIPROC_DIR:
+        gauge.set_function(fn)
+        return
+    _sampled.append((gauge, fn))
+
+
+def sample_gauges():
+    for gauge, fn in _sampled:
+        try:
+            gauge.set(fn())
+        except Exception:
+            pass
+
+
+def start_sampler(interval=METRICS_SAMPLE_INTERVAL):
+    """Démarre l'échantillonnage des gauges calculées (mode multi-workers uniquement)."""
+    global _sampler
+    if not MULTIPROC_DIR or _sampler is not None:
+        return
+    with _sampler_lock:
+        if _sampler is not None:
+            return
+
+        def run():
+            while True:
+                sample_gauges()
+                time.sleep(interval)
+
+        _sampler = threading.Thread(target=run, name="metrics-sampler", daemon=True)
+        _sampler.start()
+
+
+class StateCollector:
+    """Gauges évaluées à chaque scrape depuis l'état en mémoire.
+
+    ``fn()`` retourne une valeur, ou pour une gauge à labels un dict
+    ``{valeurs des labels (tuple): valeur}``. Une famille dont ``fn`` lève une
+    exception est omise du scrape.
+    """
+
+    def __init__(self):
+        self._families = []
+
+    def gauge(self, name, documentation, fn, labels=()):
+        self._families.append((name, documentation, list(labels), fn))
+        return self
+
+    def describe(self):
+        for name, documentation, labels, _ in self._families:
+            yield GaugeMetricFamily(name, documentation, labels=labels)
+
+    def collect(self):
+        for name, documentation, labels, fn in self._families:
+            try:
+                value = fn()
+            except Exception:
+                continue
+            family = GaugeMetricFamily(name, documentation, labels=labels)
+            if labels:
+                for key, v in value.items():
+                    family.add_metric([str(k) for k in key], v)
+            else:
+                family.add_metric([], value)
+            yield family
+
+
+def register_state_collector(collector):
+    """Enregistre un ``StateCollector`` (évalué par le worker qui répond au scrape)."""
+    if MULTIPROC_DIR:
+        _state_collectors.append(collector)
+    else:
+        REGISTRY.register(collector)
+
+
+def latest():
+    """Retourne ``(payload, content_type)`` pour l'endpoint ``/metrics``."""
+    if not MULTIPROC_DIR:
+        return generate_latest(), CONTENT_TYPE_LATEST
+    # Valeurs fraîches pour le worker qui répond ; les autres ont leur dernier échantillon
+    sample_gauges()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in _state_collectors:
+        registry.register(collector)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid):
+    """Nettoie les fichiers de métriques d'un worker terminé (gauges ``live*``)."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
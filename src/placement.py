@@ -0,0 +1,194 @@
+"""Placement des UE sur des UPF partagés (mode consolidation).
+
+Au lieu d'un UPF par UE, chaque UE est placé sur un UPF partagé
+``upf-shared-{n}`` accueillant au plus ``max_per_upf`` UE. Le placement est un
+bin-packing « best fit » : l'UE va sur l'UPF le plus rempli ayant encore de la
+place, ce qui concentre la charge et laisse les autres se vider. Un nouvel UPF
+n'est démarré que lorsque tous sont pleins ; un UPF vide est drainé (plus
+aucun placement sauf nécessité) puis supprimé après ``drain_grace`` secondes.
+
+La création et la suppression des UPF sont déléguées à ``ensure_upf(name)`` et
+``remove_upf(name)`` ; les numéros d'UPF ne sont jamais réutilisés pour ne pas
+recréer un UPF en cours de suppression.
+"""
+import os
+import re
+import threading
+import time
+
+from prometheus_client import Gauge
+
+try:
+    UPF_MAX_UES_PER_UPF = int(os.environ.get("UPF_MAX_UES_PER_UPF", "0"))
+    UPF_DRAIN_GRACE = float(os.environ.get("UPF_DRAIN_GRACE", "30"))
+except Exception:
+    UPF_MAX_UES_PER_UPF, UPF_DRAIN_GRACE = 0, 30.0
+
+SHARED_UPF_PREFIX = "upf-shared-"
+SHARED_UPF_RE = re.compile(rf"{SHARED_UPF_PREFIX}(\d+)$")
+
+PLACEMENT_UPFS = Gauge('nexslice_placement_upfs', 'UPF partagés en service (mode consolidation)', multiprocess_mode='max')
+PLACEMENT_UES = Gauge('nexslice_placement_ues', 'UE placés sur des UPF partagés', multiprocess_mode='max')
+PLACEMENT_SAVED = Gauge('nexslice_placement_upfs_saved', 'UPF économisés par rapport au modèle 1 UE = 1 UPF', multiprocess_mode='max')
+
+
+class _SharedUPF:
+    def __init__(self, name):
+        self.name = name
+        self.members = set()
+        self.created = threading.Event()
+        self.creating = False
+        self.ok = None
+        self.draining_since = None
+
+
+class PlacementScheduler:
+    def __init__(self, max_per_upf, ensure_upf, remove_upf, drain_grace=UPF_DRAIN_GRACE):
+        self.max_per_upf = max(1, max_per_upf)
+        self.ensure_upf = ensure_upf
+        self.remove_upf = remove_upf
+        self.drain_grace = drain_grace
+        self._upfs = {}
+        self._ue_upf = {}
+        self._next_index = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def upf_of(self, ue_id):
+        with self._lock:
+            upf = self._ue_upf.get(ue_id)
+            return upf.name if upf is not None else None
+
+    def _pick(self):
+        """UPF le plus rempli ayant de la place ; les UPF en drainage en dernier recours."""
+        candidates = [u for u in self._upfs.values() if len(u.members) < self.max_per_upf]
+        active = [u for u in candidates if u.draining_since is None]
+        if active:
+            return max(active, key=lambda u: (len(u.members), -int(SHARED_UPF_RE.match(u.name).group(1))))
+        if candidates:
+            return candidates[0]
+        upf = _SharedUPF(f"{SHARED_UPF_PREFIX}{self._next_index}")
+        self._next_index += 1
+        self._upfs[upf.name] = upf
+        return upf
+
+    def assign(self, ue_id, timeout=60):
+        """Place ``ue_id`` et retourne le nom de son UPF (None si l'UPF n'a pu être créé)."""
+        with self._lock:
+            upf = self._ue_upf.get(ue_id)
+            if upf is None:
+                upf = self._pick()
+                upf.members.add(ue_id)
+                upf.draining_since = None
+                self._ue_upf[ue_id] = upf
+            # Le premier UE d'un nouvel UPF le crée ; les placements concurrents attendent
+            creator = not upf.creating and not upf.created.is_set()
+            upf.creating = True
+            self._update_metrics()
+        if creator:
+            try:
+                ok = bool(self.ensure_upf(upf.name))
+            except Exception as e:
+                print(f"Erreur lors de la création de l'UPF partagé {upf.name}: {e}")
+                ok = False
+            with self._lock:
+                upf.ok = ok
+                if not ok:
+                    # On oublie cet UPF : les UE qui l'attendaient échouent et seront rejoués
+                    self._upfs.pop(upf.name, None)
+                    for member in upf.members:
+                        self._ue_upf.pop(member, None)
+                    self._update_metrics()
+            upf.created.set()
+        elif not upf.created.wait(timeout):
+            return None
+        return upf.name if upf.ok else None
+
+    def release(self, ue_id):
+        """Retire ``ue_id`` de son UPF ; un UPF vidé passe en drainage."""
+        with self._lock:
+            upf = self._ue_upf.pop(ue_id, None)
+            if upf is None:
+                return False
+            upf.members.discard(ue_id)
+            if not upf.members:
+                upf.draining_since = time.monotonic()
+            self._update_metrics()
+        self.reap()
+        return True
+
+    def reap(self, now=None):
+        """Supprime les UPF vides depuis plus de ``drain_grace`` secondes ; retourne leurs noms."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            drained = [u for u in self._upfs.values()
+                       if not u.members and u.draining_since is not None
+                       and now - u.draining_since >= self.drain_grace]
+            for upf in drained:
+                del self._upfs[upf.name]
+            self._update_metrics()
+        for upf in drained:
+            try:
+                self.remove_upf(upf.name)
+                print(f"UPF partagé {upf.name} drainé et supprimé.")
+            except Exception as e:
+                print(f"Erreur lors de la suppression de l'UPF partagé {upf.name}: {e}")
+        return [u.name for u in drained]
+
+    def restore(self, assignments):
+        """Reconstruit l'état depuis un mapping ``{ue_id: nom d'UPF}`` (ex: labels des Pods UE)."""
+        with self._lock:
+            for ue_id, name in assignments.items():
+                match = SHARED_UPF_RE.match(name or "")
+                if not match or ue_id in self._ue_upf:
+                    continue
+                upf = self._upfs.get(name)
+                if upf is None:
+                    upf = self._upfs[name] = _SharedUPF(name)
+                    upf.ok = True
+                    upf.created.set()
+                upf.members.add(ue_id)
+                self._ue_upf[ue_id] = upf
+                self._next_index = max(self._next_index, int(match.group(1)) + 1)
+            self._update_metrics()
+
+    def reset(self):
+        """Oublie tous les placements (après une suppression globale des UPF)."""
+        with self._lock:
+            self._upfs.clear()
+            self._ue_upf.clear()
+            self._update_metrics()
+
+    def _update_metrics(self):
+        ues = len(self._ue_upf)
+        PLACEMENT_UPFS.set(len(self._upfs))
+        PLACEMENT_UES.set(ues)
+        PLACEMENT_SAVED.set(max(0, ues - len(self._upfs)))
+
+    def stats(self):
+        with self._lock:
+            ues = len(self._ue_upf)
+            upfs = len(self._upfs)
+            return {
+                "max_per_upf": self.max_per_upf,
+                "ues": ues,
+                "upfs": upfs,
+                "upfs_saved": max(0, ues - upfs),
+                "fill_ratio": round(ues / (upfs * self.max_per_upf), 3) if upfs else 0.0,
+                "draining": sorted(u.name for u in self._upfs.values() if u.draining_since is not None),
+                "per_upf": {u.name: len(u.members) for u in self._upfs.values()},
+            }
+
+    def start(self, interval=5):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="upf-placement", daemon=True)
+        self._thread.start()
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.reap()
+            except Exception as e:
+                print(f"Erreur lors du drainage des UPF partagés: {e}")
@@ -0,0 +1,103 @@
+"""Moteur de provisionnement en masse des UE.
+
+Chaque UE passe par une suite d'étapes ordonnées (config → ConfigMap → Pod →
+UPF). Les UE étant indépendants, ils sont traités en parallèle dans un pool de
+threads de taille configurable ; l'ordre des étapes est respecté à l'intérieur
+de chaque UE. Des étapes indépendantes d'un même UE peuvent être regroupées
+(liste d'étapes) : leurs appels Kubernetes/SMF sont alors lancés en même temps.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    PROVISION_CONCURRENCY = int(os.environ.get("PROVISION_CONCURRENCY", "16"))
+    PROVISION_STEP_THREADS = int(os.environ.get("PROVISION_STEP_THREADS", "64"))
+except Exception:
+    PROVISION_CONCURRENCY, PROVISION_STEP_THREADS = 16, 64
+
+# Pool partagé pour les étapes parallèles d'un même UE (les étapes n'y soumettent rien)
+_STEP_POOL = ThreadPoolExecutor(max_workers=max(1, PROVISION_STEP_THREADS), thread_name_prefix="provision-step")
+
+
+def _run_step(name, fn, ue_id):
+    start = time.perf_counter()
+    try:
+        ok = fn(ue_id)
+        error = None if ok is not False else f"étape {name} en échec"
+    except Exception as e:
+        error = str(e) or e.__class__.__name__
+    return error, round((time.perf_counter() - start) * 1000, 3)
+
+
+class BulkProvisioner:
+    """Exécute une liste d'étapes ``(nom, fonction(ue_id))`` pour plusieurs UE.
+
+    Une étape échoue si elle lève une exception ou retourne ``False`` ; les
+    étapes suivantes du même UE sont alors abandonnées (un Pod sans son
+    ConfigMap ne démarrerait pas), sans impact sur les autres UE.
+
+    Un élément de ``steps`` peut être une liste d'étapes indépendantes,
+    exécutées en parallèle ; le groupe échoue si l'une d'elles échoue.
+
+    ``outcomes`` (Counter Prometheus à label ``result``) compte les UE traités
+    par résultat (``ok``/``failed``). ``on_results(results)`` reçoit les
+    rapports terminés : un seul appel pour tout un ``run()``, ce qui permet de
+    les enregistrer en une transaction.
+    """
+
+    def __init__(self, steps, concurrency=PROVISION_CONCURRENCY, outcomes=None, on_results=None):
+        self.steps = list(steps)
+        self.concurrency = max(1, int(concurrency))
+        self.outcomes = outcomes
+        self.on_results = on_results
+
+    def _record(self, results):
+        if self.on_results is None or not results:
+            return
+        try:
+            self.on_results(results)
+        except Exception as e:
+            print(f"Erreur lors de l'enregistrement de {len(results)} résultat(s) de provisionnement: {e}")
+
+    def provision_one(self, ue_id):
+        result = self._provision(ue_id)
+        self._record([result])
+        return result
+
+    def _provision(self, ue_id):
+        result = {"ue_id": ue_id, "ok": True, "failed_step": None, "error": None, "timings_ms": {}}
+        for step in self.steps:
+            group = step if isinstance(step, list) else [step]
+            # La première étape du groupe s'exécute dans le thread courant
+            futures = [_STEP_POOL.submit(_run_step, name, fn, ue_id) for name, fn in group[1:]]
+            outcomes = [_run_step(*group[0], ue_id)] + [f.result() for f in futures]
+            failed = None
+            for (name, _), (error, elapsed_ms) in zip(group, outcomes):
+                result["timings_ms"][name] = elapsed_ms
+                if error is not None and failed is None:
+                    failed = (name, error)
+            if failed is not None:
+                result.update(ok=False, failed_step=failed[0], error=failed[1])
+                break
+        if self.outcomes is not None:
+            self.outcomes.labels(result="ok" if result["ok"] else "failed").inc()
+        return result
+
+    def run(self, ue_ids):
+        """Provisionne tous les ``ue_ids`` et retourne un rapport agrégé."""
+        ue_ids = list(ue_ids)
+        start = time.perf_counter()
+        workers = min(self.concurrency, len(ue_ids)) or 1
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="provision") as pool:
+            results = list(pool.map(self._provision, ue_ids))
+        self._record(results)
+        failed = [r for r in results if not r["ok"]]
+        return {
+            "requested": len(ue_ids),
+            "succeeded": len(results) - len(failed),
+            "failed": len(failed),
+            "concurrency": workers,
+            "duration_s": round(time.perf_counter() - start, 3),
+            "results": results,
+        }
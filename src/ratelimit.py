@@ -0,0 +1,69 @@
+"""Limitation de débit côté client (seau à jetons).
+
+Le seau contient au plus ``burst`` jetons et se remplit de ``rate`` jetons par
+seconde. Chaque appel consomme un jeton : une rafale de ``burst`` appels passe
+immédiatement, puis le débit est lissé à ``rate`` appels par seconde, comme le
+limiteur QPS/burst des clients Kubernetes officiels. ``rate`` <= 0 désactive
+la limitation.
+"""
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None, clock=time.monotonic):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst if burst is not None else rate))
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @property
+    def unlimited(self):
+        return self.rate <= 0
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens=1):
+        """Consomme ``tokens`` (éventuellement à crédit) ; retourne l'attente nécessaire en secondes."""
+        if self.unlimited:
+            return 0.0
+        with self._lock:
+            self._refill(self._clock())
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def try_acquire(self, tokens=1):
+        """Consomme ``tokens`` s'ils sont disponibles immédiatement."""
+        if self.unlimited:
+            return True
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def retry_after(self, tokens=1):
+        """Délai (s) avant que ``tokens`` soient disponibles, sans les consommer."""
+        if self.unlimited:
+            return 0.0
+        with self._lock:
+            self._refill(self._clock())
+            return max(0.0, (tokens - self._tokens) / self.rate)
+
+    def acquire(self, tokens=1):
+        """Attend si besoin puis consomme ``tokens`` ; retourne le temps attendu."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def stats(self):
+        with self._lock:
+            if not self.unlimited:
+                self._refill(self._clock())
+            return {"rate": self.rate, "burst": self.burst, "available": round(max(0.0, self._tokens), 3)}
@@ -0,0 +1,132 @@
+"""Application idempotente des manifestes (read → compare → create/patch).
+
+Chaque objet écrit par le contrôleur porte l'annotation
+``nexslice.io/spec-hash``, empreinte de son manifeste désiré. Avant d'écrire,
+l'objet existant est lu (ou pris dans un cache watch) : si l'empreinte est
+identique et que les champs désirés sont toujours présents à l'identique,
+aucune écriture n'est faite. Sinon l'objet est créé, ou patché pour corriger la
+dérive. Rejouer un webhook de connexion ou redémarrer le contrôleur ne coûte
+donc que des lectures.
+"""
+import copy
+import hashlib
+import json
+
+from prometheus_client import Counter
+
+from src.k8s_gateway import NAMESPACE, get_gateway
+
+SPEC_HASH_ANNOTATION = "nexslice.io/spec-hash"
+
+APPLY_TOTAL = Counter('nexslice_apply_total', 'Résultat des applications de manifestes', ['kind', 'action'])
+
+# kind -> (lecture, création, patch, suppression)
+KINDS = {
+    "ConfigMap": (lambda gw: gw.core_v1.read_namespaced_config_map, lambda gw: gw.core_v1.create_namespaced_config_map,
+                  lambda gw: gw.core_v1.patch_namespaced_config_map, lambda gw: gw.core_v1.delete_namespaced_config_map),
+    "Pod": (lambda gw: gw.core_v1.read_namespaced_pod, lambda gw: gw.core_v1.create_namespaced_pod,
+            lambda gw: gw.core_v1.patch_namespaced_pod, lambda gw: gw.core_v1.delete_namespaced_pod),
+    "Deployment": (lambda gw: gw.apps_v1.read_namespaced_deployment, lambda gw: gw.apps_v1.create_namespaced_deployment,
+                   lambda gw: gw.apps_v1.patch_namespaced_deployment, lambda gw: gw.apps_v1.delete_namespaced_deployment),
+    "Service": (lambda gw: gw.core_v1.read_namespaced_service, lambda gw: gw.core_v1.create_namespaced_service,
+                lambda gw: gw.core_v1.patch_namespaced_service, lambda gw: gw.core_v1.delete_namespaced_service),
+}
+
+
+def spec_hash(body):
+    """Empreinte stable d'un manifeste (hors annotation d'empreinte)."""
+    body = copy.deepcopy(body)
+    (body.get("metadata") or {}).get("annotations", {}).pop(SPEC_HASH_ANNOTATION, None)
+    encoded = json.dumps(body, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def stamped(body):
+    """Copie de ``body`` portant l'annotation ``nexslice.io/spec-hash``."""
+    digest = spec_hash(body)
+    body = copy.deepcopy(body)
+    body.setdefault("metadata", {}).setdefault("annotations", {})[SPEC_HASH_ANNOTATION] = digest
+    return body
+
+
+def is_subset(desired, live):
+    """Vrai si toutes les valeurs de ``desired`` sont présentes à l'identique dans ``live``.
+
+    Les champs ajoutés par l'API server (valeurs par défaut, status) sont ignorés.
+    """
+    if isinstance(desired, dict):
+        return isinstance(live, dict) and all(k in live and is_subset(v, live[k]) for k, v in desired.items())
+    if isinstance(desired, list):
+        return isinstance(live, list) and len(desired) == len(live) and all(
+            is_subset(d, l) for d, l in zip(desired, live))
+    return desired == live
+
+
+def _status(e):
+    return getattr(e, "status", None)
+
+
+def _read(gw, kind, name, namespace):
+    try:
+        resp = gw.call(KINDS[kind][0](gw), name=name, namespace=namespace, _preload_content=False)
+        return json.loads(resp.data)
+    except Exception as e:
+        if _status(e) == 404:
+            return None
+        raise
+
+
+def read(kind, name, namespace=NAMESPACE):
+    """Objet ``kind``/``name`` brut (dict), ou None s'il n'existe pas."""
+    return _read(get_gateway(), kind, name, namespace)
+
+
+def apply(body, live=None, namespace=NAMESPACE, cached=False):
+    """Crée ou met à jour ``body`` ; retourne l'action effectuée.
+
+    ``live`` est l'objet courant s'il est déjà connu ; avec ``cached=True``
+    (cache watch synchronisé), ``live=None`` signifie que l'objet n'existe pas
+    et aucune lecture n'est faite. Sinon l'objet est lu via l'API.
+
+    Actions : ``unchanged``, ``created``, ``patched``, ``replaced`` (Pod dont
+    la spec n'est pas modifiable en place).
+    """
+    kind = body["kind"]
+    _, create_fn, patch_fn, delete_fn = KINDS[kind]
+    name = body["metadata"]["name"]
+    desired = stamped(body)
+    digest = desired["metadata"]["annotations"][SPEC_HASH_ANNOTATION]
+    gw = get_gateway()
+
+    if live is None and not cached:
+        live = _read(gw, kind, name, namespace)
+    if live is None:
+        try:
+            gw.call(create_fn(gw), namespace=namespace, body=desired)
+            action = "created"
+        except Exception as e:
+            if _status(e) != 409:
+                raise
+            # Créé entre-temps (requête concurrente) : on compare avec l'objet réel
+            live = _read(gw, kind, name, namespace)
+            if live is None:
+                # ... et déjà supprimé depuis : nouvelle création plutôt qu'un PATCH voué au 404
+                return apply(body, namespace=namespace, cached=True)
+            return apply(body, live=live, namespace=namespace)
+    else:
+        live_hash = ((live.get("metadata") or {}).get("annotations") or {}).get(SPEC_HASH_ANNOTATION)
+        if live_hash == digest and is_subset(desired, live):
+            action = "unchanged"
+        else:
+            try:
+                gw.call(patch_fn(gw), name=name, namespace=namespace, body=desired)
+                action = "patched"
+            except Exception as e:
+                if kind != "Pod" or _status(e) != 422:
+                    raise
+                # La plupart des champs d'un Pod sont immuables : suppression immédiate puis recréation
+                gw.call(delete_fn(gw), name=name, namespace=namespace, grace_period_seconds=0)
+                gw.call(create_fn(gw), namespace=namespace, body=desired)
+                action = "replaced"
+    APPLY_TOTAL.labels(kind=kind, action=action).inc()
+    return action
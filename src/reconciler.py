@@ -0,0 +1,214 @@
+"""Réconciliation au démarrage et balayage périodique des objets orphelins.
+
+Au démarrage, le contrôleur reconstruit l'état du cluster par des LIST
+paginés du backend (sélecteurs ``app=...,ue-id``) des Pods, ConfigMaps,
+Deployments et Services UE/UPF, puis le compare à l'état voulu (UE de la base d'état) :
+
+* UE voulu, ressources incomplètes (création interrompue, UPF en échec) :
+  les ressources manquantes sont recréées ;
+* UE inconnu, ressources incomplètes (suppression interrompue) : orphelines,
+  elles sont supprimées ;
+* UE inconnu, ressources complètes : au démarrage, l'UE est réintégré à la
+  base (perte de la base locale) ; lors des balayages suivants, il est supprimé.
+
+Les objets créés par l'opérateur ``UEAttachment`` (ownerReference vers la
+ressource personnalisée) portent les mêmes labels mais ne sont jamais
+réintégrés ni supprimés : ils appartiennent à l'opérateur.
+
+Les UE dont un job est en cours, ou modifiés depuis moins de
+``RECONCILE_GRACE`` secondes, sont ignorés. Les corrections sont exécutées en
+parallèle (``RECONCILE_CONCURRENCY``). Ensuite, un balayage toutes les
+``RECONCILE_INTERVAL`` secondes lit les caches watch quand ils sont
+synchronisés, et seuls les ConfigMaps sont relus, en LIST paginé.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client import Counter
+
+from src.backends import get_backend
+from src.informer import ue_id_of
+
+try:
+    RECONCILE_INTERVAL = float(os.environ.get("RECONCILE_INTERVAL", "300"))
+    RECONCILE_GRACE = float(os.environ.get("RECONCILE_GRACE", "120"))
+    RECONCILE_CONCURRENCY = int(os.environ.get("RECONCILE_CONCURRENCY", "16"))
+except Exception:
+    RECONCILE_INTERVAL, RECONCILE_GRACE, RECONCILE_CONCURRENCY = 300.0, 120.0, 16
+
+RECONCILE_ACTIONS = Counter('nexslice_reconcile_actions_total', 'Corrections appliquées par le réconciliateur',
+                            ['action'])
+
+# type -> (type de ressource du backend, sélecteur)
+RESOURCE_KINDS = {
+    "pod": ("Pod", "app=ueransim-ue,ue-id"),
+    "configmap": ("ConfigMap", "app=ueransim-ue,ue-id"),
+    "deployment": ("Deployment", "app=upf,ue-id"),
+    "service": ("Service", "app=upf,ue-id"),
+}
+
+# Propriétaires (ownerReferences) dont les objets sont gérés par un autre contrôleur
+FOREIGN_OWNER_KINDS = ("UEAttachment",)
+
+
+def foreign_owned(obj):
+    """True si l'objet appartient à un autre contrôleur (ex: opérateur ``UEAttachment``)."""
+    return any(ref.get("kind") in FOREIGN_OWNER_KINDS for ref in obj["metadata"].get("ownerReferences") or ())
+
+
+class Reconciler:
+    """Compare le cluster à l'état voulu et corrige les écarts.
+
+    * ``kinds`` : types de ressources attendus pour chaque UE (ex: pas de
+      ``configmap`` par UE en mode ConfigMaps partagés) ;
+    * ``desired()`` : ``{ue_id: date de dernière modification}`` des UE voulus ;
+    * ``repair(ue_id, missing)`` : recrée les types ``missing`` d'un UE ;
+    * ``adopt(ue_ids)`` : réintègre des UE complets inconnus de la base ;
+    * ``busy(ue_id)`` : True si un job de l'UE est en attente ou en cours ;
+    * ``caches`` : ``{type: Informer}`` lus à la place d'un LIST une fois synchronisés ;
+    * ``backend`` : backend de provisionnement (par défaut celui du processus).
+    """
+
+    def __init__(self, kinds, desired, repair, adopt, busy=lambda ue_id: False, caches=None,
+                 grace=RECONCILE_GRACE, concurrency=RECONCILE_CONCURRENCY, backend=None):
+        self.kinds = tuple(kinds)
+        self.desired = desired
+        self.repair = repair
+        self.adopt = adopt
+        self.busy = busy
+        self.caches = caches or {}
+        self.grace = grace
+        self.concurrency = max(1, concurrency)
+        self._backend = backend
+        self.last_report = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def backend(self):
+        return self._backend or get_backend()
+
+    def observe(self, use_caches=False):
+        """État observé ``{ue_id: {type: nom}}`` et nombre de pages LIST lues."""
+        observed, pages = {}, 0
+        for kind in self.kinds:
+            resource, selector = RESOURCE_KINDS[kind]
+            cache = self.caches.get(kind)
+            if use_caches and cache is not None and cache.synced.is_set():
+                items = cache.items()
+            else:
+                items, kind_pages = self.backend.list(resource, selector)
+                pages += kind_pages
+            for obj in items:
+                ue_id = ue_id_of(obj)
+                if ue_id is not None and not foreign_owned(obj):
+                    observed.setdefault(ue_id, {})[kind] = obj["metadata"]["name"]
+        return observed, pages
+
+    def plan(self, observed, desired, startup=False, now=None):
+        """Corrections à appliquer : ``{"repair": {ue_id: [types]}, "delete": [...], "adopt": [...]}``."""
+        now = time.time() if now is None else now
+        plan = {"repair": {}, "delete": [], "adopt": []}
+        for ue_id in sorted(set(observed) | set(desired)):
+            if self.busy(ue_id):
+                continue
+            present = observed.get(ue_id, {})
+            missing = [kind for kind in self.kinds if kind not in present]
+            if ue_id in desired:
+                if missing and now - (desired[ue_id] or 0) >= self.grace:
+                    plan["repair"][ue_id] = missing
+            elif not missing and startup:
+                plan["adopt"].append(ue_id)
+            else:
+                plan["delete"].extend((kind, name, ue_id) for kind, name in present.items())
+        return plan
+
+    def execute(self, plan):
+        """Applique ``plan`` en parallèle ; retourne la liste des erreurs."""
+        errors = []
+        if plan["adopt"]:
+            try:
+                self.adopt(plan["adopt"])
+                RECONCILE_ACTIONS.labels(action="adopt").inc(len(plan["adopt"]))
+            except Exception as e:
+                errors.append(f"adopt: {e}")
+
+        def delete(item):
+            kind, name, ue_id = item
+            # Déjà supprimé entre-temps : rien à faire
+            self.backend.delete(RESOURCE_KINDS[kind][0], name)
+            print(f"Réconciliation : {kind} orphelin {name} (UE {ue_id}) supprimé.")
+            return "delete"
+
+        def repair(item):
+            ue_id, missing = item
+            if self.repair(ue_id, missing) is False:
+                raise RuntimeError(f"recréation de {', '.join(missing)} en échec")
+            print(f"Réconciliation : UE {ue_id}, {', '.join(missing)} recréé(s).")
+            return "repair"
+
+        tasks = [(delete, item) for item in plan["delete"]] + [(repair, item) for item in plan["repair"].items()]
+        if not tasks:
+            return errors
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(tasks)),
+                                thread_name_prefix="reconcile") as pool:
+            futures = [(item, pool.submit(fn, item)) for fn, item in tasks]
+            for item, future in futures:
+                try:
+                    RECONCILE_ACTIONS.labels(action=future.result()).inc()
+                except Exception as e:
+                    errors.append(f"{item[0]} {item[1]}: {e}")
+        return errors
+
+    def run_once(self, startup=False):
+        """Un passage complet (observation, plan, corrections) ; retourne son rapport."""
+        with self._lock:
+            start = time.perf_counter()
+            observed, pages = self.observe(use_caches=not startup)
+            listed = time.perf_counter()
+            desired = self.desired()
+            plan = self.plan(observed, desired, startup=startup)
+            errors = self.execute(plan)
+            report = {
+                "startup": startup,
+                "finished_at": time.time(),
+                "observed_ues": len(observed),
+                "desired_ues": len(desired),
+                "list_pages": pages,
+                "adopted": len(plan["adopt"]),
+                "deleted": len(plan["delete"]),
+                "repaired": len(plan["repair"]),
+                "errors": errors,
+                "list_s": round(listed - start, 3),
+                "duration_s": round(time.perf_counter() - start, 3),
+            }
+            self.last_report = report
+        print(f"Réconciliation{' (démarrage)' if startup else ''} : {report['observed_ues']} UE observés, "
+              f"{report['adopted']} réintégrés, {report['repaired']} réparés, {report['deleted']} objets "
+              f"orphelins supprimés, {len(errors)} erreur(s) en {report['duration_s']}s")
+        return report
+
+    def start(self, interval=RECONCILE_INTERVAL):
+        """Passage de démarrage puis balayages périodiques (``interval`` <= 0 : démarrage seulement)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, interval):
+        startup = True
+        while not self._stop.is_set():
+            try:
+                self.run_once(startup=startup)
+                startup = False
+            except Exception as e:
+                print(f"Erreur de réconciliation: {e}")
+            if interval <= 0 and not startup:
+                return
+            self._stop.wait(interval if interval > 0 else 30)
@@ -0,0 +1,375 @@
+"""Rendu en mémoire des configurations UE et des manifestes Kubernetes.
+
+Les gabarits sont compilés une seule fois à l'import : la config UERANSIM est
+découpée en segments littéraux et en champs, et les manifestes (Pod UE,
+ConfigMap, Deployment/Service UPF) sont construits comme des squelettes dont
+seules les parties propres à chaque UE (nom, labels, référence de ConfigMap)
+sont recréées au rendu. Les sous-arbres constants sont partagés entre les
+manifestes rendus : ils ne doivent pas être modifiés en place.
+
+La persistance sur disque des configs (``./tmp/ue-confs``) est optionnelle,
+atomique (fichier temporaire + rename) et regroupée par un thread d'écriture.
+"""
+import os
+import string
+import threading
+
+UE_CONFIG_TEMPLATE = """# UE Configuration for ue{ue_id}
+supi: 'imsi-{imsi}'
+mcc: '208'
+mnc: '95'
+key: '465B5CE8B199B49FAA5F0A2EE238A6BC'
+op: 'E8ED289DEBA952E4283B54E88E6183CA'
+opType: 'OPC'
+amf: '8000'
+imei: '{imei}'
+imeiSv: '{imeisv}'
+
+# List of gNB IP addresses for Radio Link Simulation
+# Use pod name directly for radio link simulation (not service)
+gnbSearchList:
+  - ueransim-gnb.nexslice.svc.cluster.local
+
+# UAC Access Identities Configuration
+uacAic:
+  mps: false
+  mcs: false
+
+# UAC Access Control Class
+uacAcc:
+  normalClass: 0
+  class11: false
+  class12: false
+  class13: false
+  class14: false
+  class15: false
+
+# Initial PDU sessions to be established
+sessions:
+  - type: 'IPv4'
+    apn: '{dnn}'
+    slice:
+      sst: 1
+      sd: {sd}
+
+# Configured NSSAI for this UE by HPLMN
+configured-nssai:
+  - sst: 1
+    sd: {sd}
+
+# Default Configured NSSAI for this UE
+default-nssai:
+  - sst: 1
+    sd: {sd}
+
+# Supported encryption and integrity algorithms by this UE
+integrity:
+  IA1: true
+  IA2: true
+  IA3: true
+
+integrityMaxRate:
+  uplink: 'full'
+  downlink: 'full'
+
+ciphering:
+  EA1: true
+  EA2: true
+  EA3: true
+"""
+
+
+def _compile(template):
+    """Découpe ``template`` en une liste alternant littéraux et noms de champs."""
+    parts = []
+    for literal, field, _, _ in string.Formatter().parse(template):
+        if literal:
+            parts.append((True, literal))
+        if field is not None:
+            parts.append((False, field))
+    return tuple(parts)
+
+
+_UE_CONFIG_PARTS = _compile(UE_CONFIG_TEMPLATE)
+
+
+def ue_config_fields(ue_id, identity=None):
+    # Padding pour avoir un IMSI unique (ex: 208950000000001)
+    return {
+        "ue_id": str(ue_id),
+        "imsi": f"20895{ue_id:010d}",
+        "imei": f"{ue_id:015d}",
+        "imeisv": f"{ue_id:016d}",
+        "dnn": identity["dnn"] if identity else f"oai-ue{ue_id}",
+        "sd": identity["sd"] if identity else f"{ue_id:06d}",
+    }
+
+
+def render_ue_config(ue_id, identity=None):
+    """Contenu YAML de la configuration UERANSIM d'un UE.
+
+    ``identity`` : identité réservée par l'allocateur (DNN, SD) ; à défaut,
+    valeurs dérivées de l'identifiant.
+    """
+    fields = ue_config_fields(ue_id, identity)
+    return "".join(value if is_literal else fields[value] for is_literal, value in _UE_CONFIG_PARTS)
+
+
+# --- manifestes -------------------------------------------------------------
+
+_UE_CONTAINER_SECURITY = {"capabilities": {"add": ["NET_ADMIN"]}, "privileged": True}
+_UE_VOLUME_MOUNTS = [{"name": "config-volume", "mountPath": "/etc/ueransim"}]
+# UERANSIM entrypoint expects: <component> <config-file> where component is 'ue' or 'gnb'
+_UE_ARGS = ["ue", "/etc/ueransim/ue.yaml"]
+
+_UPF_VOLUMES = [{"name": "configuration", "configMap": {"name": "oai-upf-configmap"}}]
+_UPF_PORTS = [{"containerPort": 2152, "name": "gtpu"}, {"containerPort": 8805, "name": "pfcp"}]
+_UPF_ENV = [
+    {"name": "TZ", "value": "Europe/Paris"},
+    {"name": "ENABLE_5G_FEATURES", "value": "yes"},
+    {"name": "REGISTER_NRF", "value": "no"},
+]
+_UPF_VOLUME_MOUNTS = [{"name": "configuration", "mountPath": "/openair-upf/etc"}]
+_UPF_SECURITY = {"capabilities": {"add": ["NET_ADMIN", "SYS_ADMIN"]}, "privileged": True}
+# Minimal resource requests/limits to avoid noisy-neighbor issues in cluster
+_UPF_RESOURCES = {"requests": {"cpu": "100m", "memory": "128Mi"}, "limits": {"cpu": "500m", "memory": "512Mi"}}
+_UPF_SERVICE_PORTS = [
+    {"protocol": "UDP", "port": 2152, "targetPort": "gtpu", "name": "gtpu"},
+    {"protocol": "UDP", "port": 8805, "targetPort": "pfcp", "name": "pfcp"},
+]
+
+
+def ue_labels(ue_id):
+    return {"app": "ueransim-ue", "ue-id": str(ue_id)}
+
+
+def render_ue_configmap(ue_id, config_data=None):
+    """ConfigMap ``ueransim-ue{id}-config`` (la config est rendue si non fournie)."""
+    return {
+        "apiVersion": "v1",
+        "kind": "ConfigMap",
+        "metadata": {"name": f"ueransim-ue{ue_id}-config", "namespace": "nexslice", "labels": ue_labels(ue_id)},
+        # UERANSIM entrypoint expects /etc/ueransim/ue.yaml (hardcoded)
+        "data": {"ue.yaml": config_data if config_data is not None else render_ue_config(ue_id)},
+    }
+
+
+def render_shard_configmap(name, shard, data):
+    """ConfigMap partagé ``name`` portant les configs de plusieurs UE (clés ``ue{id}.yaml``)."""
+    return {
+        "apiVersion": "v1",
+        "kind": "ConfigMap",
+        "metadata": {"name": name, "namespace": "nexslice",
+                     "labels": {"app": "ueransim-ue", "nexslice.io/shard": str(shard)}},
+        "data": data,
+    }
+
+
+def render_ue_pod(ue_id, image, shard=None, upf=None):
+    """Pod UE ; avec ``shard=(configmap, clé)`` seule la clé de l'UE est montée en ``ue.yaml``.
+
+    ``upf`` (UPF partagé de l'UE) est reporté en label pour reconstruire le placement.
+    """
+    labels = ue_labels(ue_id)
+    if upf is not None:
+        labels["nexslice.io/upf"] = upf
+    if shard is None:
+        config_volume = {"name": f"ueransim-ue{ue_id}-config"}
+    else:
+        config_volume = {"name": shard[0], "items": [{"key": shard[1], "path": "ue.yaml"}]}
+    return {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {"name": f"ueransim-ue{ue_id}", "namespace": "nexslice", "labels": labels},
+        "spec": {
+            "containers": [{
+                "name": "ueransim-ue",
+                "image": image,
+                "imagePullPolicy": "Always",
+                "args": _UE_ARGS,
+                "volumeMounts": _UE_VOLUME_MOUNTS,
+                "securityContext": _UE_CONTAINER_SECURITY,
+            }],
+            "volumes": [{"name": "config-volume", "configMap": config_volume}],
+            "restartPolicy": "Always",
+        },
+    }
+
+
+# Superviseur d'un Pod de groupe : un nr-ue par clé ue{id}.yaml du ConfigMap
+# monté ; une clé ajoutée démarre l'UE, une clé retirée l'arrête, un UE arrêté
+# anormalement est relancé. Le kubelet propage les mises à jour du ConfigMap
+# avec un délai (synchronisation périodique, ~1 min par défaut).
+UE_GROUP_SUPERVISOR = """\
+CONF_DIR=/etc/ueransim/ues
+RUN_DIR=/tmp/ues
+mkdir -p "$RUN_DIR"
+while true; do
+  for conf in "$CONF_DIR"/ue*.yaml; do
+    [ -e "$conf" ] || continue
+    ue=$(basename "$conf" .yaml)
+    pid_file="$RUN_DIR/$ue.pid"
+    if [ ! -e "$pid_file" ] || ! kill -0 "$(cat "$pid_file")" 2>/dev/null; then
+      echo "[group] start $ue"
+      nr-ue -c "$conf" &
+      echo $! > "$pid_file"
+    fi
+  done
+  for pid_file in "$RUN_DIR"/ue*.pid; do
+    [ -e "$pid_file" ] || continue
+    ue=$(basename "$pid_file" .pid)
+    if [ ! -e "$CONF_DIR/$ue.yaml" ]; then
+      echo "[group] stop $ue"
+      kill "$(cat "$pid_file")" 2>/dev/null
+      rm -f "$pid_file"
+    fi
+  done
+  sleep "${UE_GROUP_POLL_SECONDS:-2}"
+done
+"""
+
+
+def render_ue_group_pod(name, group, image):
+    """Pod ``name`` simulant tous les UE du groupe ``group`` (ConfigMap ``name``)."""
+    return {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {"name": name, "namespace": "nexslice",
+                     "labels": {"app": "ueransim-ue", "ue-group": str(group)}},
+        "spec": {
+            "containers": [{
+                "name": "ueransim-ue",
+                "image": image,
+                "imagePullPolicy": "IfNotPresent",
+                "command": ["/bin/sh", "-c", UE_GROUP_SUPERVISOR],
+                "volumeMounts": [{"name": "config-volume", "mountPath": "/etc/ueransim/ues"}],
+                "securityContext": _UE_CONTAINER_SECURITY,
+            }],
+            "volumes": [{"name": "config-volume", "configMap": {"name": name}}],
+            "restartPolicy": "Always",
+        },
+    }
+
+
+def upf_annotations(identity):
+    """Identité de l'UE servi (DNN, S-NSSAI, plage IP), en annotations de l'UPF dédié."""
+    return {
+        "nexslice.io/dnn": identity["dnn"],
+        "nexslice.io/sst": str(identity["sst"]),
+        "nexslice.io/sd": identity["sd"],
+        "nexslice.io/ip-range": identity["ip_range"],
+    }
+
+
+def render_upf(name, labels, image, replicas, identity=None):
+    """Return a (deployment, service) tuple for an UPF named `name`.
+
+    With `identity` (dedicated UPF), the UE's DNN, S-NSSAI and IP range are
+    added as metadata annotations; the pod template is left untouched.
+    """
+    metadata = {"name": name, "namespace": "nexslice", "labels": labels}
+    if identity is not None:
+        metadata["annotations"] = upf_annotations(identity)
+    container = {
+        "name": "upf",
+        "image": image,
+        "imagePullPolicy": "IfNotPresent",
+        "ports": _UPF_PORTS,
+        "env": _UPF_ENV,
+        "volumeMounts": _UPF_VOLUME_MOUNTS,
+        "securityContext": _UPF_SECURITY,
+        "resources": _UPF_RESOURCES,
+    }
+    deployment = {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": metadata,
+        "spec": {
+            "replicas": replicas,
+            "selector": {"matchLabels": labels},
+            "template": {
+                "metadata": {"labels": labels},
+                "spec": {"volumes": _UPF_VOLUMES, "containers": [container]},
+            },
+        },
+    }
+    service = {
+        "apiVersion": "v1",
+        "kind": "Service",
+        "metadata": dict(metadata),
+        "spec": {"selector": labels, "ports": _UPF_SERVICE_PORTS},
+    }
+    return deployment, service
+
+
+# --- persistance -------------------------------------------------------------
+
+def write_atomic(path, content):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+class ConfigWriter:
+    """Persiste les configs UE sur disque par lots, en arrière-plan.
+
+    ``write()`` ne fait qu'enregistrer la dernière version d'une config ; le
+    thread d'écriture vide le lot toutes les ``interval`` secondes. ``discard()``
+    annule une écriture en attente (UE supprimé entre-temps).
+    """
+
+    def __init__(self, conf_dir, enabled=True, interval=0.2):
+        # Chemin absolu : le lot est écrit plus tard, par un autre thread, quel que soit le cwd d'alors
+        self.conf_dir = os.path.abspath(conf_dir)
+        self.enabled = enabled
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread = None
+
+    def write(self, ue_id, content):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._pending[ue_id] = content
+            self._idle.clear()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ue-config-writer", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def discard(self, ue_id):
+        with self._lock:
+            self._pending.pop(ue_id, None)
+
+    def flush(self):
+        """Ecrit immédiatement toutes les configs en attente ; retourne leur nombre."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        if batch:
+            os.makedirs(self.conf_dir, exist_ok=True)
+            for ue_id, content in batch.items():
+                try:
+                    write_atomic(os.path.join(self.conf_dir, f"ue{ue_id}.yaml"), content)
+                except OSError as e:
+                    print(f"Erreur écriture config UE {ue_id}: {e}")
+        with self._lock:
+            if not self._pending:
+                self._idle.set()
+        return len(batch)
+
+    def wait_idle(self, timeout=None):
+        """Attend que toutes les écritures en attente soient sur disque."""
+        return self._idle.wait(timeout)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # Laisser une rafale de créations s'accumuler dans le même lot
+            threading.Event().wait(self.interval)
+            self.flush()
@@ -0,0 +1,133 @@
+"""Point d'entrée de production : Gunicorn (workers ``gthread``) au lieu du serveur Flask.
+
+    python -m src.server
+
+Chaque worker exécute les requêtes dans ``WEB_THREADS`` threads ; les appels
+bloquants (API Kubernetes, SMF) d'une requête n'empêchent donc pas les autres
+d'être servies. Avec ``WEB_WORKERS`` > 1 :
+
+* un seul worker (le « leader », élu par verrou de fichier) fait tourner le
+  pool d'UPF, le placement et la reprise des notifications SMF en attente des
+  workers terminés (outbox de la base d'état, lignes marquées par pid) ;
+* les identifiants d'UE sont réservés dans la base d'état partagée
+  (table ``allocations``, voir ``src/allocator.py``) ;
+* ``/metrics`` agrège les métriques de tous les workers (mode multiprocess de
+  ``prometheus_client``).
+
+Le pool d'UPF et le placement gardent leur état en mémoire : s'ils sont
+activés, le serveur se limite à un worker. La file de jobs et le cache
+d'idempotence restent eux aussi propres à chaque worker : la fusion des
+événements d'un UE (``UE_DEBOUNCE_WINDOW``), la sérialisation de ses jobs et
+le rejeu d'une ``Idempotency-Key`` ne valent qu'entre requêtes servies par le
+même worker.
+"""
+import fcntl
+import os
+import shutil
+
+from gunicorn.app.base import BaseApplication
+
+HOST = os.environ.get("HOST", "0.0.0.0")
+try:
+    PORT = int(os.environ.get("PORT", "5000"))
+    WEB_WORKERS = int(os.environ.get("WEB_WORKERS", "1"))
+    WEB_THREADS = int(os.environ.get("WEB_THREADS", "32"))
+    WEB_TIMEOUT = int(os.environ.get("WEB_TIMEOUT", "120"))
+except Exception:
+    PORT, WEB_WORKERS, WEB_THREADS, WEB_TIMEOUT = 5000, 1, 32, 120
+WEB_STATE_DIR = os.environ.get("WEB_STATE_DIR", "./tmp/web")
+
+_leader_lock = None
+
+
+def _stateful_features():
+    """Options dont l'état en mémoire ne peut pas être partagé entre workers."""
+    enabled = []
+    for name in ("WARM_POOL_SIZE", "UPF_MAX_UES_PER_UPF"):
+        try:
+            if int(os.environ.get(name, "0")) > 0:
+                enabled.append(name)
+        except ValueError:
+            pass
+    return enabled
+
+
+def effective_workers(requested=WEB_WORKERS):
+    stateful = _stateful_features()
+    if requested > 1 and stateful:
+        print(f"{', '.join(stateful)} actif : un seul worker web (au lieu de {requested})")
+        return 1
+    return max(1, requested)
+
+
+def prepare_multiprocess(state_dir=WEB_STATE_DIR):
+    """Prépare l'état partagé entre workers ; à appeler avant l'import de ``src.main``."""
+    metrics_dir = os.path.join(state_dir, "prometheus-multiproc")
+    # Les fichiers d'une exécution précédente fausseraient les compteurs
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
+
+def try_acquire_leader(path):
+    """Tente de prendre le verrou du leader ; il est gardé tant que le processus vit."""
+    global _leader_lock
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    handle = open(path, "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    _leader_lock = handle
+    return True
+
+
+def is_leader():
+    return _leader_lock is not None
+
+
+def post_fork(server, worker):
+    if try_acquire_leader(os.path.join(WEB_STATE_DIR, "leader.lock")):
+        print(f"Worker {worker.pid} : leader (tâches de fond)")
+
+
+def child_exit(server, worker):
+    from src.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
+
+
+class ControllerServer(BaseApplication):
+    def __init__(self, options=None):
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        # Import dans le worker : l'environnement préparé par post_fork est pris en compte
+        from src.main import create_app
+        return create_app(start_services=True, leader=is_leader() or self.options.get("workers", 1) == 1)
+
+
+def main():
+    workers = effective_workers()
+    options = {
+        "bind": f"{HOST}:{PORT}",
+        "workers": workers,
+        "worker_class": "gthread",
+        "threads": WEB_THREADS,
+        "timeout": WEB_TIMEOUT,
+    }
+    if workers > 1:
+        prepare_multiprocess()
+        options.update(post_fork=post_fork, child_exit=child_exit)
+    print(f"Starting controller on {HOST}:{PORT} ({workers} worker(s) x {WEB_THREADS} threads)")
+    ControllerServer(options).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""Notifications SMF (enregistrement / désenregistrement DNN → UPF).
+
+Les notifications passent par une « outbox » persistée dans la base d'état
+(table ``smf_outbox``, une ligne par notification) : une notification non
+délivrée survit à un redémarrage du contrôleur et est retentée avec un backoff
+exponentiel avec jitter. Un thread d'envoi utilise une session HTTP keep-alive
+partagée et, si ``SMF_BATCH_URL`` est configurée, regroupe plusieurs
+enregistrements dans une seule requête.
+
+Chaque ligne porte le pid du worker qui l'envoie ; le worker leader
+(``adopt``) reprend celles des workers terminés.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from prometheus_client import Counter, Histogram
+
+SMF_WEBHOOK_URL = os.environ.get("SMF_WEBHOOK_URL", "http://oai-smf.nexslice.svc.cluster.local:8080/api/dnn/register")
+SMF_UNREGISTER_URL = os.environ.get("SMF_UNREGISTER_URL", SMF_WEBHOOK_URL.rsplit("/", 1)[0] + "/unregister")
+# Endpoint optionnel acceptant {"registrations": [...]} ; vide = pas de batch
+SMF_BATCH_URL = os.environ.get("SMF_BATCH_URL", "")
+try:
+    SMF_TIMEOUT = float(os.environ.get("SMF_TIMEOUT", "5"))
+    SMF_NOTIFY_WAIT = float(os.environ.get("SMF_NOTIFY_WAIT", "5"))
+    SMF_BATCH_MAX = int(os.environ.get("SMF_BATCH_MAX", "100"))
+    SMF_SENDERS = int(os.environ.get("SMF_SENDERS", "4"))
+    SMF_RETRY_BASE = float(os.environ.get("SMF_RETRY_BASE", "0.5"))
+    SMF_RETRY_MAX = float(os.environ.get("SMF_RETRY_MAX", "60"))
+except Exception:
+    SMF_TIMEOUT, SMF_NOTIFY_WAIT, SMF_BATCH_MAX, SMF_SENDERS = 5.0, 5.0, 100, 4
+    SMF_RETRY_BASE, SMF_RETRY_MAX = 0.5, 60.0
+
+SMF_ADOPT_INTERVAL = 30
+
+SMF_OK_STATUSES = (200, 201, 204)
+# 409 : DNN déjà enregistré ; 404 : DNN déjà absent. Rien à retenter dans ces cas.
+SMF_DONE_STATUSES = {"register": SMF_OK_STATUSES + (409,), "unregister": SMF_OK_STATUSES + (404,)}
+
+SMF_REQUEST_SECONDS = Histogram('nexslice_smf_request_seconds', 'Latence des requêtes vers le SMF', ['op'])
+SMF_FAILURES = Counter('nexslice_smf_failures_total', 'Requêtes SMF en échec (seront retentées)', ['op'])
+SMF_DELIVERED = Counter('nexslice_smf_delivered_total', 'Notifications SMF délivrées', ['op'])
+
+
+def _alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SMFNotifier:
+    def __init__(self, register_url=SMF_WEBHOOK_URL, unregister_url=SMF_UNREGISTER_URL, batch_url=SMF_BATCH_URL,
+                 store=None, timeout=SMF_TIMEOUT, senders=SMF_SENDERS):
+        self.register_url = register_url
+        self.unregister_url = unregister_url
+        self.batch_url = batch_url
+        self.batch_supported = bool(batch_url)
+        # StateStore ; None : outbox en mémoire seulement
+        self.store = store
+        self.owner = os.getpid()
+        self.timeout = timeout
+        self.senders = max(1, senders)
+        self._session = None
+        self._session_lock = threading.Lock()
+        # clé "op:dnn" -> entrée ; un seul envoi en attente par DNN et par opération
+        self._outbox = {}
+        self._delivered = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        # Reprise des outbox de workers terminés (worker leader uniquement)
+        self.adopt = False
+        # Appelé avec la liste des (op, payload) livrés, hors verrou
+        self.on_delivered = None
+        self._load()
+
+    # --- outbox persistée ---------------------------------------------------
+
+    def _load(self):
+        if self.store is None:
+            return
+        # Lignes d'une exécution précédente sous le même pid (redémarrage en conteneur) ou libérées par stop()
+        for key, entry in self.store.claim_outbox(self.owner, [self.owner, None]).items():
+            self._outbox[key] = {**entry, "next_attempt_at": 0}
+
+    def adopt_orphans(self):
+        """Reprend les notifications des processus terminés ; retourne le nombre d'entrées reprises."""
+        if self.store is None:
+            return 0
+        dead = [owner for owner in self.store.outbox_owners()
+                if owner is None or (owner != self.owner and not _alive(owner))]
+        if not dead:
+            return 0
+        adopted = 0
+        entries = self.store.claim_outbox(self.owner, dead)
+        with self._lock:
+            for key, entry in entries.items():
+                if key not in self._outbox:
+                    self._outbox[key] = {**entry, "next_attempt_at": 0}
+                    adopted += 1
+        if adopted:
+            print(f"Outbox SMF : {adopted} notification(s) reprise(s) de workers terminés")
+            self._wakeup.set()
+        return adopted
+
+    def depth(self):
+        return len(self._outbox)
+
+    def pending(self):
+        with self._lock:
+            return [dict(e) for e in self._outbox.values()]
+
+    def enqueue(self, op, payload):
+        """Ajoute une notification à l'outbox et retourne un Event levé à sa livraison."""
+        key = f"{op}:{payload['dnn']}"
+        opposite = f"{'unregister' if op == 'register' else 'register'}:{payload['dnn']}"
+        delivered = threading.Event()
+        with self._lock:
+            # Un désenregistrement annule un enregistrement jamais envoyé (et inversement)
+            cancelled = self._outbox.pop(opposite, None) is not None
+            if cancelled:
+                self._delivered.pop(opposite, threading.Event()).set()
+            entry = {"op": op, "payload": payload, "attempts": 0, "created_at": time.time(), "next_attempt_at": 0}
+            self._outbox[key] = entry
+            self._delivered[key] = delivered
+            if self.store is not None:
+                self.store.put_outbox(self.owner, {key: entry}, removed=[opposite] if cancelled else ())
+        self.start()
+        self._wakeup.set()
+        return delivered
+
+    def _complete(self, keys):
+        delivered = []
+        with self._lock:
+            for key in keys:
+                entry = self._outbox.pop(key, None)
+                if entry is not None:
+                    delivered.append((entry["op"], entry["payload"]))
+                event = self._delivered.pop(key, None)
+                if event is not None:
+                    event.set()
+            if self.store is not None:
+                self.store.delete_outbox(keys)
+        if self.on_delivered is not None and delivered:
+            try:
+                self.on_delivered(delivered)
+            except Exception as e:
+                print(f"Erreur lors du suivi des notifications SMF livrées: {e}")
+
+    def _reschedule(self, keys, error):
+        now = time.time()
+        with self._lock:
+            retried = {}
+            for key in keys:
+                entry = self._outbox.get(key)
+                if entry is None:
+                    continue
+                entry["attempts"] += 1
+                entry["last_error"] = error
+                # Backoff exponentiel avec « full jitter » (exposant borné : 2.0 ** 1024 déborde)
+                delay = min(SMF_RETRY_MAX, SMF_RETRY_BASE * 2 ** min(entry["attempts"], 16))
+                entry["next_attempt_at"] = now + random.uniform(0, delay)
+                retried[key] = entry
+            if self.store is not None and retried:
+                self.store.put_outbox(self.owner, retried)
+
+    # --- envoi ---------------------------------------------------------------
+
+    @property
+    def session(self):
+        """Session HTTP keep-alive, créée (et ``requests`` importé) au premier envoi."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.senders, max_retries=0)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    def _post(self, op, url, body):
+        start = time.perf_counter()
+        try:
+            response = self.session.post(url, json=body, timeout=self.timeout)
+        finally:
+            SMF_REQUEST_SECONDS.labels(op=op).observe(time.perf_counter() - start)
+        return response
+
+    def _send_one(self, key, entry):
+        from requests.exceptions import RequestException
+
+        op = entry["op"]
+        url = self.register_url if op == "register" else self.unregister_url
+        try:
+            response = self._post(op, url, entry["payload"])
+            if response.status_code in SMF_DONE_STATUSES[op]:
+                SMF_DELIVERED.labels(op=op).inc()
+                print(f"✓ SMF {op} : {entry['payload']['dnn']} (Status: {response.status_code})")
+                self._complete([key])
+                return
+            error = f"status {response.status_code}: {response.text[:200]}"
+        except RequestException as e:
+            error = e.__class__.__name__
+        SMF_FAILURES.labels(op=op).inc()
+        print(f"⚠ SMF {op} {entry['payload']['dnn']} en échec ({error}), nouvel essai planifié")
+        self._reschedule([key], error)
+
+    def _send_batch(self, items):
+        from requests.exceptions import RequestException
+
+        keys = [key for key, _ in items]
+        try:
+            response = self._post("register_batch", self.batch_url,
+                                  {"registrations": [entry["payload"] for _, entry in items]})
+            if response.status_code in SMF_OK_STATUSES:
+                SMF_DELIVERED.labels(op="register").inc(len(items))
+                print(f"✓ SMF register : {len(items)} DNN en un lot (Status: {response.status_code})")
+                self._complete(keys)
+                return True
+            if response.status_code in (404, 405, 501):
+                # Le SMF ne connaît pas l'endpoint de lot : repli sur l'envoi unitaire
+                print(f"⚠ SMF batch non supporté (status {response.status_code}), envoi unitaire")
+                self.batch_supported = False
+                return False
+            error = f"status {response.status_code}"
+        except RequestException as e:
+            error = e.__class__.__name__
+        SMF_FAILURES.labels(op="register").inc(len(items))
+        self._reschedule(keys, error)
+        return True
+
+    def flush(self):
+        """Envoie toutes les notifications arrivées à échéance ; retourne le nombre traité."""
+        now = time.time()
+        with self._lock:
+            due = [(k, dict(e)) for k, e in self._outbox.items() if e["next_attempt_at"] <= now]
+        if not due:
+            return 0
+        singles = due
+        if self.batch_supported:
+            registers = [item for item in due if item[1]["op"] == "register"]
+            if len(registers) > 1:
+                singles = [item for item in due if item[1]["op"] != "register"]
+                for i in range(0, len(registers), SMF_BATCH_MAX):
+                    if not self._send_batch(registers[i:i + SMF_BATCH_MAX]):
+                        singles.extend(registers[i:])
+                        break
+        if singles:
+            with ThreadPoolExecutor(max_workers=min(self.senders, len(singles))) as pool:
+                list(pool.map(lambda item: self._send_one(*item), singles))
+        return len(due)
+
+    def _next_due_in(self):
+        with self._lock:
+            if not self._outbox:
+                return None
+            return max(0.0, min(e["next_attempt_at"] for e in self._outbox.values()) - time.time())
+
+    def start(self):
+        if self._thread is not None or self._stopping.is_set():
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="smf-outbox", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """Arrête le thread d'envoi et libère les notifications en attente (reprises par un autre processus)."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self.store is not None:
+            self.store.claim_outbox(None, [self.owner])
+
+    def _run(self):
+        while not self._stopping.is_set():
+            timeout = self._next_due_in()
+            if self.adopt:
+                try:
+                    self.adopt_orphans()
+                except Exception as e:
+                    print(f"Erreur reprise des outbox SMF orphelines: {e}")
+                timeout = SMF_ADOPT_INTERVAL if timeout is None else min(timeout, SMF_ADOPT_INTERVAL)
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Erreur envoi outbox SMF: {e}")
+                time.sleep(1)
+
+    # --- API utilisée par le contrôleur --------------------------------------
+
+    def notify(self, op, payload, wait=SMF_NOTIFY_WAIT):
+        """Met la notification en outbox et attend sa livraison au plus ``wait`` secondes.
+
+        Retourne True si le SMF a accusé réception dans le délai ; sinon la
+        notification reste dans l'outbox et sera retentée.
+        """
+        delivered = self.enqueue(op, payload)
+        return delivered.wait(wait) if wait else False
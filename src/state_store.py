@@ -0,0 +1,288 @@
+"""État des UE dans une base SQLite locale (mode WAL).
+
+Une ligne par UE : identité réseau (S-NSSAI, DNN, plage IP), UPF attribué,
+état de l'enregistrement SMF, phase du cycle de vie et horodatages. Les
+écritures par lots (``upsert_many``, ``update_many``, ``delete_many``) se font
+en une transaction ; les requêtes par phase ou état SMF utilisent des index.
+
+Le mode WAL laisse les lectures se poursuivre pendant une écriture, y compris
+depuis d'autres processus (workers Gunicorn) ouvrant le même fichier. Chaque
+thread a sa propre connexion.
+
+Chaque écriture sur ``ues`` avance le compteur ``ues_version`` de la table
+``meta`` (et ``ues_members`` si des UE ont été ajoutés ou retirés) dans la même
+transaction : ``versions()`` permet à un worker de savoir si un autre a modifié
+la base depuis sa dernière lecture.
+
+La table ``allocations`` garde l'identité réseau réservée à chaque UE (voir
+``src/allocator.py``) ; ses contraintes d'unicité (SD, plage IP) détectent les
+collisions entre workers.
+
+La table ``smf_outbox`` garde les notifications SMF en attente (voir
+``src/smf_notifier.py``), une ligne par notification, avec le pid du processus
+qui l'envoie : chaque ajout, livraison ou nouvel essai n'écrit que sa ligne.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+UE_STATE_DB = os.environ.get("UE_STATE_DB", "./tmp/nexslice-state.db")
+
+# Phases du cycle de vie d'un UE
+PHASES = ("configured", "provisioned", "failed")
+# Etat de l'enregistrement du DNN de l'UE auprès du SMF
+SMF_STATUSES = ("none", "pending", "registered", "skipped")
+
+FIELDS = ("sst", "sd", "dnn", "ip_range", "upf", "smf_status", "phase", "error")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ues (
+    ue_id      INTEGER PRIMARY KEY,
+    sst        INTEGER,
+    sd         TEXT,
+    dnn        TEXT,
+    ip_range   TEXT,
+    upf        TEXT,
+    smf_status TEXT NOT NULL DEFAULT 'none',
+    phase      TEXT NOT NULL DEFAULT 'configured',
+    error      TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ues_phase ON ues (phase);
+CREATE INDEX IF NOT EXISTS ues_smf_status ON ues (smf_status);
+CREATE INDEX IF NOT EXISTS ues_upf ON ues (upf);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS allocations (
+    ue_id      INTEGER PRIMARY KEY,
+    sd         TEXT NOT NULL UNIQUE,
+    ip_range   TEXT NOT NULL UNIQUE,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS smf_outbox (
+    key   TEXT PRIMARY KEY,
+    owner INTEGER,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS smf_outbox_owner ON smf_outbox (owner);
+"""
+
+
+class StateStore:
+    def __init__(self, path=UE_STATE_DB):
+        # Chemin absolu : les connexions sont ouvertes paresseusement, par thread
+        self.path = os.path.abspath(path)
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Transactions explicites (BEGIN) : pas de transaction implicite du module sqlite3
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        self._enable_wal(conn)
+        # En WAL, NORMAL garde la base cohérente après un crash sans fsync à chaque commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._init_lock:
+            if not self._initialized:
+                conn.executescript(SCHEMA)
+                self._initialized = True
+        self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _enable_wal(conn, timeout=30):
+        # Le passage en WAL d'une base neuve n'attend pas le verrou (pas de busy timeout) :
+        # deux processus qui ouvrent la base en même temps reçoivent « database is locked »
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                return
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) or time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.01)
+
+    @contextmanager
+    def transaction(self):
+        """Transaction d'écriture (verrou pris dès le début, entre processus aussi)."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def upsert_many(self, records):
+        """Crée ou met à jour les UE ``{ue_id: {champ: valeur}}`` en une transaction.
+
+        Retourne ``versions()`` après l'écriture.
+        """
+        now = time.time()
+        with self.transaction() as conn:
+            inserted = 0
+            for ue_id, fields in records.items():
+                fields = {k: v for k, v in fields.items() if k in FIELDS}
+                columns = ["ue_id", "created_at", "updated_at", *fields]
+                cursor = conn.execute(
+                    f"INSERT OR IGNORE INTO ues ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    (ue_id, now, now, *fields.values()))
+                if cursor.rowcount:
+                    inserted += 1
+                    continue
+                assignments = ", ".join(["updated_at = ?"] + [f"{k} = ?" for k in fields])
+                conn.execute(f"UPDATE ues SET {assignments} WHERE ue_id = ?", (now, *fields.values(), ue_id))
+            return self._bump(conn, members=inserted > 0)
+
+    def upsert(self, ue_id, **fields):
+        return self.upsert_many({ue_id: fields})
+
+    def update_many(self, changes):
+        """Met à jour les UE existants ``{ue_id: {champ: valeur}}`` en une transaction ; retourne ``versions()``."""
+        now = time.time()
+        with self.transaction() as conn:
+            for ue_id, fields in changes.items():
+                fields = {k: v for k, v in fields.items() if k in FIELDS}
+                if not fields:
+                    continue
+                assignments = ", ".join(["updated_at = ?"] + [f"{k} = ?" for k in fields])
+                conn.execute(f"UPDATE ues SET {assignments} WHERE ue_id = ?", (now, *fields.values(), ue_id))
+            return self._bump(conn, members=False)
+
+    def update(self, ue_id, **fields):
+        return self.update_many({ue_id: fields})
+
+    def delete_many(self, ue_ids):
+        """Supprime les UE ``ue_ids`` en une transaction ; retourne ``versions()``."""
+        with self.transaction() as conn:
+            cursor = conn.executemany("DELETE FROM ues WHERE ue_id = ?", [(ue_id,) for ue_id in ue_ids])
+            return self._bump(conn, members=cursor.rowcount > 0)
+
+    def _bump(self, conn, members):
+        # Toute écriture avance ues_version ; ues_members seulement si des lignes ont été ajoutées ou retirées
+        keys = ("ues_version", "ues_members") if members else ("ues_version",)
+        conn.executemany("INSERT INTO meta (key, value) VALUES (?, 1) "
+                         "ON CONFLICT (key) DO UPDATE SET value = value + 1", [(key,) for key in keys])
+        return self._versions(conn)
+
+    def _versions(self, conn):
+        values = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('ues_members', 'ues_version')"))
+        return int(values.get("ues_members", 0)), int(values.get("ues_version", 0))
+
+    def versions(self):
+        """Compteurs ``(ues_members, ues_version)`` : ajouts/retraits d'UE, et toute écriture sur ``ues``."""
+        return self._versions(self._connect())
+
+    def phases(self):
+        """Phase de chaque UE : ``{ue_id: phase}``."""
+        return {row[0]: row[1] for row in self._connect().execute("SELECT ue_id, phase FROM ues")}
+
+    def get(self, ue_id):
+        row = self._connect().execute("SELECT * FROM ues WHERE ue_id = ?", (ue_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def ids(self, phase=None, smf_status=None):
+        """Identifiants triés, éventuellement filtrés par phase et/ou état SMF (index)."""
+        clauses, params = [], []
+        for column, value in (("phase", phase), ("smf_status", smf_status)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(f"SELECT ue_id FROM ues{where} ORDER BY ue_id", params)
+        return [row[0] for row in rows]
+
+    def page(self, after=0, limit=500, phase=None, smf_status=None, upf=None):
+        """Au plus ``limit`` identifiants triés > ``after`` (curseur), filtrés par phase, état SMF et/ou UPF."""
+        clauses, params = ["ue_id > ?"], [after]
+        for column, value in (("phase", phase), ("smf_status", smf_status), ("upf", upf)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        rows = self._connect().execute(
+            f"SELECT ue_id FROM ues WHERE {' AND '.join(clauses)} ORDER BY ue_id LIMIT ?", (*params, limit))
+        return [row[0] for row in rows]
+
+    def updated_at(self):
+        """Date de dernière modification de chaque UE : ``{ue_id: timestamp}``."""
+        return {row[0]: row[1] for row in self._connect().execute("SELECT ue_id, updated_at FROM ues")}
+
+    def count_by(self, column):
+        """Nombre d'UE par valeur de ``column`` (``phase``, ``smf_status`` ou ``upf``)."""
+        if column not in ("phase", "smf_status", "upf"):
+            raise ValueError(f"colonne non indexée : {column}")
+        rows = self._connect().execute(f"SELECT {column}, COUNT(*) FROM ues GROUP BY {column}")
+        return {row[0]: row[1] for row in rows}
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM ues").fetchone()[0]
+
+    def identities(self):
+        """Identité enregistrée de chaque UE : ``[(ue_id, sd, ip_range)]``."""
+        return [tuple(row) for row in self._connect().execute("SELECT ue_id, sd, ip_range FROM ues ORDER BY ue_id")]
+
+    def insert_allocation(self, ue_id, sd, ip_range):
+        """Réserve ``(sd, ip_range)`` pour ``ue_id`` ; retourne None, ou la colonne en collision."""
+        try:
+            with self.transaction() as conn:
+                conn.execute("INSERT INTO allocations (ue_id, sd, ip_range, created_at) VALUES (?, ?, ?, ?)",
+                             (ue_id, sd, ip_range, time.time()))
+        except sqlite3.IntegrityError as e:
+            # "UNIQUE constraint failed: allocations.<colonne>"
+            return str(e).rsplit(".", 1)[-1]
+        return None
+
+    def allocation(self, ue_id):
+        row = self._connect().execute("SELECT ue_id, sd, ip_range FROM allocations WHERE ue_id = ?",
+                                      (ue_id,)).fetchone()
+        return tuple(row) if row is not None else None
+
+    def allocations(self):
+        """Identités réservées : ``[(ue_id, sd, ip_range)]``."""
+        return [tuple(row) for row in self._connect().execute("SELECT ue_id, sd, ip_range FROM allocations")]
+
+    def delete_allocations(self, ue_ids):
+        with self.transaction() as conn:
+            conn.executemany("DELETE FROM allocations WHERE ue_id = ?", [(ue_id,) for ue_id in ue_ids])
+
+    def put_outbox(self, owner, entries, removed=()):
+        """Enregistre les notifications ``{clé: entrée}`` de ``owner`` et supprime ``removed`` (une transaction)."""
+        with self.transaction() as conn:
+            conn.executemany("DELETE FROM smf_outbox WHERE key = ?", [(key,) for key in removed])
+            conn.executemany("INSERT INTO smf_outbox (key, owner, entry) VALUES (?, ?, ?) "
+                             "ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, entry = excluded.entry",
+                             [(key, owner, json.dumps(entry)) for key, entry in entries.items()])
+
+    def delete_outbox(self, keys):
+        with self.transaction() as conn:
+            conn.executemany("DELETE FROM smf_outbox WHERE key = ?", [(key,) for key in keys])
+
+    def outbox_owners(self):
+        """Processus (pid, ou None pour une outbox libérée) ayant des notifications en attente."""
+        return [row[0] for row in self._connect().execute("SELECT DISTINCT owner FROM smf_outbox")]
+
+    def claim_outbox(self, owner, previous):
+        """Attribue à ``owner`` les notifications des processus ``previous`` ; retourne ``{clé: entrée}`` de ``owner``."""
+        with self.transaction() as conn:
+            conn.executemany("UPDATE smf_outbox SET owner = ? WHERE owner IS ?", [(owner, p) for p in previous])
+            rows = conn.execute("SELECT key, entry FROM smf_outbox WHERE owner IS ?", (owner,)).fetchall()
+        return {row[0]: json.loads(row[1]) for row in rows}
+
+    def get_meta(self, key, default=None):
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row is not None else default
+
+    def set_meta(self, key, value):
+        with self.transaction() as conn:
+            conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                         "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, str(value)))
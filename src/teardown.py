@@ -0,0 +1,124 @@
+"""Suppression en masse des UE et UPF par sélecteur de labels.
+
+Au lieu de quatre DELETE par UE, chaque type de ressource est supprimé avec
+un ``deletecollection`` filtré par label (``app=ueransim-ue``, ``app=upf``),
+éventuellement restreint à des ``ue-id`` (sélecteur ``ue-id in (...)``
+découpé en tranches). Les quatre types sont traités en parallèle, et un LIST
+préalable sur le même sélecteur permet de rapporter ce qui a été supprimé.
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.k8s_gateway import NAMESPACE, get_gateway
+from src.ue_registry import UE_CONF_RE
+
+try:
+    TEARDOWN_SELECTOR_CHUNK = int(os.environ.get("TEARDOWN_SELECTOR_CHUNK", "500"))
+except Exception:
+    TEARDOWN_SELECTOR_CHUNK = 500
+
+# (type, label de base, méthode LIST, méthode DELETECOLLECTION)
+RESOURCE_KINDS = (
+    ("pods", "app=ueransim-ue", lambda gw: gw.core_v1.list_namespaced_pod,
+     lambda gw: gw.core_v1.delete_collection_namespaced_pod),
+    ("configmaps", "app=ueransim-ue", lambda gw: gw.core_v1.list_namespaced_config_map,
+     lambda gw: gw.core_v1.delete_collection_namespaced_config_map),
+    ("deployments", "app=upf", lambda gw: gw.apps_v1.list_namespaced_deployment,
+     lambda gw: gw.apps_v1.delete_collection_namespaced_deployment),
+    ("services", "app=upf", lambda gw: gw.core_v1.list_namespaced_service,
+     lambda gw: gw.core_v1.delete_collection_namespaced_service),
+)
+
+
+def label_selectors(base, ue_ids=None, chunk=TEARDOWN_SELECTOR_CHUNK):
+    """Sélecteurs couvrant ``ue_ids`` (tous les UE si None)."""
+    if ue_ids is None:
+        return [base]
+    ue_ids = sorted(ue_ids)
+    return [f"{base},ue-id in ({','.join(str(i) for i in ue_ids[n:n + chunk])})"
+            for n in range(0, len(ue_ids), chunk)]
+
+
+def _teardown_kind(kind, base, list_fn, delete_fn, ue_ids):
+    gw = get_gateway()
+    names, calls, errors = [], 0, []
+    for selector in label_selectors(base, ue_ids):
+        try:
+            calls += 1
+            # Réponses brutes : inutile de désérialiser des milliers d'objets pour leurs noms
+            found = gw.call(list_fn(gw), namespace=NAMESPACE, label_selector=selector, _preload_content=False)
+            items = json.loads(found.data).get("items") or []
+            if not items:
+                continue
+            calls += 1
+            gw.call(delete_fn(gw), namespace=NAMESPACE, label_selector=selector, _preload_content=False)
+            names.extend(item["metadata"]["name"] for item in items)
+        except Exception as e:
+            errors.append(f"{kind}: {e}")
+    return kind, names, calls, errors
+
+
+def teardown_cluster(ue_ids=None):
+    """Supprime Pods, ConfigMaps, Deployments et Services UE/UPF (tous, ou ``ue_ids``)."""
+    removed, errors, calls = {}, [], 0
+    with ThreadPoolExecutor(max_workers=len(RESOURCE_KINDS), thread_name_prefix="teardown") as pool:
+        futures = [pool.submit(_teardown_kind, kind, base, list_fn, delete_fn, ue_ids)
+                   for kind, base, list_fn, delete_fn in RESOURCE_KINDS]
+        for future in futures:
+            kind, names, kind_calls, kind_errors = future.result()
+            removed[kind] = names
+            calls += kind_calls
+            errors.extend(kind_errors)
+    return {"removed": removed, "api_calls": calls, "errors": errors}
+
+
+def remove_local_configs(conf_dir, lo=None, hi=None, ue_ids=None):
+    """Supprime en un seul parcours les ``ue*.yaml`` de ``conf_dir`` dont l'id est dans [lo, hi].
+
+    Si ``ue_ids`` est fourni (UE connus de la base d'état), seuls leurs
+    fichiers sont supprimés, sans parcourir le répertoire.
+    """
+    removed = []
+    if ue_ids is not None:
+        for ue_id in ue_ids:
+            try:
+                os.remove(os.path.join(conf_dir, f"ue{ue_id}.yaml"))
+                removed.append(ue_id)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Erreur suppression fichier ue{ue_id}.yaml: {e}")
+        return sorted(removed)
+    if not os.path.isdir(conf_dir):
+        return removed
+    with os.scandir(conf_dir) as entries:
+        for entry in entries:
+            match = UE_CONF_RE.match(entry.name)
+            if not match:
+                continue
+            ue_id = int(match.group(1))
+            if (lo is not None and ue_id < lo) or (hi is not None and ue_id > hi):
+                continue
+            try:
+                os.remove(entry.path)
+                removed.append(ue_id)
+            except OSError as e:
+                print(f"Erreur suppression fichier {entry.path}: {e}")
+    return sorted(removed)
+
+
+def bulk_teardown(conf_dir, lo=None, hi=None, cluster=teardown_cluster, local_ids=None):
+    """Suppression complète des UE d'id dans [lo, hi] (tous si non bornés).
+
+    Supprime les ressources du cluster avec ``cluster(ue_ids)`` (ex:
+    ``Backend.teardown`` ; None pour n'en supprimer aucune) puis les configs
+    locales (celles de ``local_ids`` si fourni, voir ``remove_local_configs``).
+    """
+    start = time.perf_counter()
+    ue_ids = None if lo is None and hi is None else range(lo or 1, hi + 1)
+    report = cluster(ue_ids) if cluster is not None else {"removed": {}, "api_calls": 0, "errors": []}
+    report["local_configs"] = remove_local_configs(conf_dir, lo, hi, local_ids)
+    report["duration_s"] = round(time.perf_counter() - start, 3)
+    return report
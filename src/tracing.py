@@ -0,0 +1,134 @@
+"""Latence par étape du cycle de vie et chronologie d'attachement par UE.
+
+Chaque étape (rendu de la config, création ConfigMap/Pod/Deployment/Service,
+notification SMF, attente de l'UPF prêt) alimente l'histogramme Prometheus
+``nexslice_stage_duration_seconds{stage=...}`` et la chronologie de l'UE
+concerné. Les chronologies des ``TRACE_MAX_UES`` derniers UE sont gardées en
+mémoire et exportables au format Chrome trace (chrome://tracing, Perfetto).
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from prometheus_client import Histogram
+
+try:
+    TRACE_MAX_UES = int(os.environ.get("TRACE_MAX_UES", "10000"))
+except Exception:
+    TRACE_MAX_UES = 10000
+
+STAGE_SECONDS = Histogram(
+    'nexslice_stage_duration_seconds',
+    'Durée de chaque étape du cycle de vie UE/UPF',
+    ['stage'],
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 20, 30, 60, 120),
+)
+
+
+class Trace:
+    def __init__(self, ue_id):
+        self.ue_id = ue_id
+        self.started_at = time.time()
+        self.spans = []
+        self.ready_at = None
+
+    def to_dict(self):
+        return {
+            "ue_id": self.ue_id,
+            "started_at": self.started_at,
+            "upf_ready_ms": round((self.ready_at - self.started_at) * 1000, 3) if self.ready_at else None,
+            "spans": [
+                {
+                    "stage": stage,
+                    "offset_ms": round((start - self.started_at) * 1000, 3),
+                    "duration_ms": round((end - start) * 1000, 3),
+                    "ok": error is None,
+                    "error": error,
+                }
+                for stage, start, end, error in self.spans
+            ],
+        }
+
+
+class Tracer:
+    def __init__(self, max_ues=TRACE_MAX_UES):
+        self.max_ues = max(1, max_ues)
+        self._traces = OrderedDict()
+        self._lock = threading.Lock()
+
+    def begin(self, ue_id):
+        """Démarre une nouvelle chronologie d'attachement pour ``ue_id``."""
+        with self._lock:
+            self._traces.pop(ue_id, None)
+            self._traces[ue_id] = Trace(ue_id)
+            self._evict()
+
+    def _evict(self):
+        # Appelé sous self._lock : seules les max_ues chronologies les plus récentes sont gardées
+        while len(self._traces) > self.max_ues:
+            self._traces.popitem(last=False)
+
+    def _trace(self, ue_id):
+        trace = self._traces.get(ue_id)
+        if trace is None:
+            # Etape enregistrée sans begin() (ex: déconnexion, réconciliation)
+            trace = self._traces[ue_id] = Trace(ue_id)
+            self._evict()
+        return trace
+
+    def record(self, ue_id, stage, start, end, error=None):
+        STAGE_SECONDS.labels(stage=stage).observe(end - start)
+        with self._lock:
+            self._trace(ue_id).spans.append((stage, start, end, error))
+
+    @contextmanager
+    def span(self, ue_id, stage):
+        """Mesure le bloc ``with`` comme étape ``stage`` de l'UE ``ue_id``."""
+        start = time.time()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e) or e.__class__.__name__
+            raise
+        finally:
+            self.record(ue_id, stage, start, time.time(), error)
+
+    def mark_upf_ready(self, ue_id):
+        """Enregistre le délai début d'attachement → UPF prêt (une fois par attachement)."""
+        now = time.time()
+        with self._lock:
+            trace = self._traces.get(ue_id)
+            if trace is None or trace.ready_at is not None:
+                return
+            trace.ready_at = now
+            trace.spans.append(("upf_ready", trace.started_at, now, None))
+        STAGE_SECONDS.labels(stage="upf_ready").observe(now - trace.started_at)
+
+    def get(self, ue_id):
+        with self._lock:
+            trace = self._traces.get(ue_id)
+            return trace.to_dict() if trace else None
+
+    def chrome_trace(self, ue_ids=None):
+        """Export au format Chrome trace : un « thread » par UE, un événement complet par étape."""
+        with self._lock:
+            traces = [self._traces[u] for u in (ue_ids or self._traces) if u in self._traces]
+            events = []
+            for trace in traces:
+                events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": trace.ue_id,
+                               "args": {"name": f"ue{trace.ue_id}"}})
+                for stage, start, end, error in trace.spans:
+                    events.append({
+                        "name": stage,
+                        "cat": "attach",
+                        "ph": "X",
+                        "pid": 1,
+                        "tid": trace.ue_id,
+                        "ts": int(start * 1_000_000),
+                        "dur": int((end - start) * 1_000_000),
+                        "args": {"ok": error is None, "error": error},
+                    })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
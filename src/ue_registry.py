@@ -0,0 +1,252 @@
+"""Index en mémoire des UE configurés.
+
+Remplace les parcours de ``./tmp/ue-confs/`` : le répertoire est lu une seule
+fois (au premier accès), puis l'index est tenu à jour à chaque création ou
+suppression d'UE. Les identifiants sont conservés triés, ce qui donne le
+nombre et l'identifiant max en O(1) et une page de la liste en O(k).
+
+Avec ``store`` (``StateStore``), l'index est chargé depuis la base d'état au
+lieu du répertoire, et chaque ajout ou retrait y est écrit. Au premier
+démarrage sur une base vide, les ``ue*.yaml`` existants y sont importés.
+L'index garde aussi la phase de chaque UE (``phase_counts()`` sans requête).
+Les compteurs ``versions()`` de la base indiquent si un autre worker l'a
+modifiée : ``sync()`` (appelé par les requêtes et toutes les
+``interval`` secondes par ``start_sync()``) recharge alors l'index.
+
+Avec ``feed`` (``ChangeFeed``), chaque ajout ou retrait effectif y est publié
+(``{"op": "add"|"remove", "ue_ids": [...], "count": n, "last": max_id}``) : sa version sert
+d'ETag à ``/api/ue-list`` et de curseur au flux ``/api/ue-stream``.
+"""
+import bisect
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+UE_CONF_RE = re.compile(r'ue(\d+)\.yaml$')
+
+
+class UERegistry:
+    def __init__(self, conf_dir, store=None, feed=None):
+        self.conf_dir = conf_dir
+        self.store = store
+        self.feed = feed
+        self._ids = []
+        self._members = set()
+        self._phases = {}
+        self._phase_counts = Counter()
+        # Compteurs versions() de la base correspondant à l'index (None : à recharger)
+        self._synced = None
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._sync_thread = None
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if self.store is not None and self.store.get_meta("conf_dir_imported") is None:
+                imported = self._scan_conf_dir() - set(self.store.ids())
+                self.store.upsert_many({ue_id: {} for ue_id in imported})
+                self.store.set_meta("conf_dir_imported", len(imported))
+            # Des UE ont pu être ajoutés avant le premier chargement
+            self._load(extra=self._members)
+
+    def _load(self, extra=()):
+        # Appelé sous self._lock ; versions lues avant les données : une écriture
+        # concurrente provoque au pire un rechargement de plus
+        if self.store is not None:
+            self._synced = self.store.versions()
+            phases = self.store.phases()
+        else:
+            phases = {ue_id: "configured" for ue_id in self._scan_conf_dir()}
+        for ue_id in extra:
+            phases.setdefault(ue_id, "configured")
+        self._phases = phases
+        self._phase_counts = Counter(phases.values())
+        self._members = set(phases)
+        self._ids = sorted(self._members)
+        self._loaded = True
+        if self.feed is not None:
+            self.feed.publish({"op": "reload", "count": len(self._ids), "last": self._ids[-1] if self._ids else 0})
+
+    def _track(self, versions, members):
+        # Appelé sous self._lock après une écriture de ce processus : si les compteurs
+        # ont avancé de plus que cette écriture, un autre worker a aussi écrit
+        if self._synced is None:
+            return
+        expected = (self._synced[0] + (1 if members else 0), self._synced[1] + 1)
+        self._synced = versions if versions == expected else None
+
+    def sync(self):
+        """Recharge l'index si un autre processus a modifié la base ; retourne True s'il a été rechargé."""
+        self._ensure_loaded()
+        if self.store is None:
+            return False
+        versions = self.store.versions()
+        with self._lock:
+            if versions == self._synced:
+                return False
+            self._load()
+            return True
+
+    def start_sync(self, interval):
+        """Appelle ``sync()`` toutes les ``interval`` secondes (thread de fond, une fois par processus)."""
+        if self.store is None or interval <= 0 or self._sync_thread is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sync()
+                except Exception as e:
+                    print(f"⚠ Synchronisation du registre UE : {e}")
+
+        self._sync_thread = threading.Thread(target=run, name="ue-registry-sync", daemon=True)
+        self._sync_thread.start()
+
+    def _scan_conf_dir(self):
+        ids = set()
+        if os.path.isdir(self.conf_dir):
+            for name in os.listdir(self.conf_dir):
+                match = UE_CONF_RE.match(name)
+                if match:
+                    ids.add(int(match.group(1)))
+        return ids
+
+    def reload(self):
+        """Relit le répertoire de configuration (ex: après un changement de ``conf_dir``)."""
+        with self._lock:
+            self._ids = []
+            self._members = set()
+            self._loaded = False
+        self._ensure_loaded()
+
+    def add(self, ue_id, **fields):
+        """Ajoute ``ue_id`` (et enregistre ``fields`` dans la base) ; retourne False s'il était déjà présent."""
+        self._ensure_loaded()
+        with self._lock:
+            new = ue_id not in self._members
+            if self.store is not None:
+                self._track(self.store.upsert(ue_id, **fields), members=new)
+            self._set_phase(ue_id, fields.get("phase"))
+            if not new:
+                self._publish_state({ue_id: fields})
+                return False
+            self._members.add(ue_id)
+            bisect.insort(self._ids, ue_id)
+            self._publish("add", [ue_id])
+            return True
+
+    def add_many(self, records):
+        """Ajoute les UE ``{ue_id: champs}`` (une seule transaction en base)."""
+        self._ensure_loaded()
+        with self._lock:
+            added = [ue_id for ue_id in records if ue_id not in self._members]
+            if self.store is not None:
+                self._track(self.store.upsert_many(records), members=bool(added))
+            updated = {}
+            for ue_id, fields in records.items():
+                self._set_phase(ue_id, fields.get("phase"))
+                if ue_id not in self._members:
+                    self._members.add(ue_id)
+                    bisect.insort(self._ids, ue_id)
+                else:
+                    updated[ue_id] = fields
+            self._publish("add", added)
+            self._publish_state(updated)
+
+    def update_many(self, changes):
+        """Met à jour en base l'état des UE ``{ue_id: champs}`` (sans les ajouter à l'index)."""
+        self._ensure_loaded()
+        with self._lock:
+            if self.store is not None:
+                self._track(self.store.update_many(changes), members=False)
+            for ue_id, fields in changes.items():
+                if ue_id in self._members:
+                    self._set_phase(ue_id, fields.get("phase"))
+
+    def remove(self, ue_id):
+        """Retire ``ue_id`` ; retourne False s'il était absent."""
+        return bool(self.remove_many([ue_id]))
+
+    def remove_many(self, ue_ids):
+        """Retire les ``ue_ids`` (une seule transaction en base) ; retourne ceux qui étaient présents."""
+        self._ensure_loaded()
+        ue_ids = list(ue_ids)
+        with self._lock:
+            removed = [ue_id for ue_id in ue_ids if ue_id in self._members]
+            if self.store is not None:
+                self._track(self.store.delete_many(ue_ids), members=bool(removed))
+            for ue_id in removed:
+                self._members.discard(ue_id)
+                self._phase_counts[self._phases.pop(ue_id)] -= 1
+                del self._ids[bisect.bisect_left(self._ids, ue_id)]
+            self._publish("remove", removed)
+        return removed
+
+    def _set_phase(self, ue_id, phase):
+        # Appelé sous self._lock ; un nouvel UE sans phase est « configured » (défaut de la base)
+        previous = self._phases.get(ue_id)
+        phase = phase or previous or "configured"
+        if phase != previous:
+            if previous is not None:
+                self._phase_counts[previous] -= 1
+            self._phase_counts[phase] += 1
+            self._phases[ue_id] = phase
+
+    def _publish(self, op, ue_ids):
+        # Appelé sous self._lock : les versions suivent l'ordre des modifications
+        if self.feed is not None and ue_ids:
+            self.feed.publish({"op": op, "ue_ids": sorted(ue_ids), "count": len(self._ids),
+                               "last": self._ids[-1] if self._ids else 0})
+
+    def _publish_state(self, changes):
+        # UE déjà présents réécrits en base : leur état (phase, UPF...) a pu changer
+        changes = {ue_id: fields for ue_id, fields in changes.items() if fields}
+        if self.feed is not None and self.store is not None and changes:
+            self.feed.publish({"op": "state", "ues": changes})
+
+    def __contains__(self, ue_id):
+        self._ensure_loaded()
+        return ue_id in self._members
+
+    def count(self):
+        self._ensure_loaded()
+        return len(self._ids)
+
+    def phase_counts(self):
+        """Nombre d'UE par phase (tenu en mémoire)."""
+        self._ensure_loaded()
+        with self._lock:
+            return {phase: count for phase, count in self._phase_counts.items() if count > 0}
+
+    def max_id(self):
+        self._ensure_loaded()
+        with self._lock:
+            return self._ids[-1] if self._ids else 0
+
+    def between(self, lo, hi):
+        """Identifiants triés compris dans [lo, hi] (O(log n + k))."""
+        self._ensure_loaded()
+        with self._lock:
+            return self._ids[bisect.bisect_left(self._ids, lo):bisect.bisect_right(self._ids, hi)]
+
+    def list(self, offset=0, limit=None):
+        """Identifiants triés, éventuellement restreints à ``[offset, offset + limit)``."""
+        self._ensure_loaded()
+        with self._lock:
+            if limit is None:
+                return self._ids[offset:]
+            return self._ids[offset:offset + limit]
+
+    def page(self, after=0, limit=None):
+        """Au plus ``limit`` identifiants triés strictement supérieurs à ``after`` (curseur, O(log n + k))."""
+        self._ensure_loaded()
+        with self._lock:
+            start = bisect.bisect_right(self._ids, after)
+            return self._ids[start:] if limit is None else self._ids[start:start + limit]
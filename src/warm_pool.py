@@ -0,0 +1,150 @@
+"""Pool d'UPF pré-démarrés (« warm pool »).
+
+Le pool maintient ``size`` Deployments UPF inactifs et prêts, étiquetés
+``app=upf-pool``. Lors d'une connexion UE, un UPF prêt est attribué à l'UE
+sans créer de nouveau pod : les labels de la Deployment sont réécrits
+(``app=upf``, ``ue-id``) et le Service ``upf-ue{id}`` est créé avec un
+sélecteur sur le ``pool-id`` du pod. Le template de pod n'est pas modifié, ce
+qui évite tout redémarrage. Un thread de fond recrée les UPF consommés.
+"""
+import os
+import threading
+import time
+import uuid
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from src.informer import Informer, deployment_ready
+from src.k8s_gateway import NAMESPACE, get_gateway
+
+try:
+    WARM_POOL_REFILL_INTERVAL = float(os.environ.get("WARM_POOL_REFILL_INTERVAL", "5"))
+except Exception:
+    WARM_POOL_REFILL_INTERVAL = 5.0
+
+POOL_LABEL = "upf-pool"
+
+WARM_POOL_HITS = Counter('nexslice_warm_pool_hits_total', 'Connexions UE servies par un UPF pré-démarré')
+WARM_POOL_MISSES = Counter('nexslice_warm_pool_misses_total', 'Connexions UE sans UPF prêt dans le pool (création à froid)')
+WARM_POOL_CLAIM_SECONDS = Histogram('nexslice_warm_pool_claim_seconds', 'Durée d\'attribution d\'un UPF du pool à un UE',
+                                    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5))
+WARM_POOL_READY = Gauge('nexslice_warm_pool_ready', 'UPF inactifs et prêts dans le pool', multiprocess_mode='max')
+WARM_POOL_TARGET = Gauge('nexslice_warm_pool_target', 'Taille cible du pool d\'UPF pré-démarrés', multiprocess_mode='max')
+
+
+class WarmPool:
+    """Pool de ``size`` UPF inactifs construits par ``builder``.
+
+    ``builder(name, labels, image, replicas)`` a la signature de
+    ``make_upf_deployment_and_service`` et retourne ``(deployment, service)``.
+    """
+
+    def __init__(self, builder, size, image, replicas=1, refill_interval=WARM_POOL_REFILL_INTERVAL):
+        self.builder = builder
+        self.size = max(0, size)
+        self.image = image
+        self.replicas = replicas
+        self.refill_interval = refill_interval
+        self.informer = Informer("upf-pool", lambda gw: gw.apps_v1.list_namespaced_deployment,
+                                 f"app={POOL_LABEL}", on_change=self._on_change)
+        self._claimed = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        WARM_POOL_TARGET.set(self.size)
+
+    @property
+    def enabled(self):
+        return self.size > 0
+
+    def _idle(self):
+        return [d for d in self.informer.items() if d["metadata"]["name"] not in self._claimed]
+
+    def _on_change(self, event_type, obj):
+        with self._lock:
+            # Une Deployment attribuée ne correspond plus au sélecteur app=upf-pool
+            if event_type == "DELETED":
+                self._claimed.discard(obj["metadata"]["name"])
+            WARM_POOL_READY.set(sum(1 for d in self._idle() if deployment_ready(d)))
+
+    def stats(self):
+        with self._lock:
+            idle = self._idle()
+            return {
+                "target": self.size,
+                "idle": len(idle),
+                "ready": sum(1 for d in idle if deployment_ready(d)),
+                "synced": self.informer.synced.is_set(),
+            }
+
+    def _create_idle(self):
+        pool_id = uuid.uuid4().hex[:10]
+        name = f"upf-warm-{pool_id}"
+        labels = {"app": POOL_LABEL, "pool-id": pool_id}
+        deployment, _ = self.builder(name, labels, self.image, self.replicas)
+        gw = get_gateway()
+        gw.call(gw.apps_v1.create_namespaced_deployment, namespace=NAMESPACE, body=deployment)
+        # Le cache sera mis à jour par le watch ; on l'alimente déjà pour ne pas sur-provisionner
+        self.informer.apply_event("ADDED", deployment)
+        print(f"UPF {name} ajouté au pool.")
+
+    def refill(self):
+        """Crée les UPF manquants pour revenir à la taille cible."""
+        if not self.informer.synced.is_set():
+            return 0
+        with self._lock:
+            missing = self.size - len(self._idle())
+        created = 0
+        for _ in range(max(0, missing)):
+            try:
+                self._create_idle()
+                created += 1
+            except Exception as e:
+                print(f"Erreur lors du remplissage du pool UPF: {e}")
+                break
+        return created
+
+    def claim(self, ue_id):
+        """Attribue un UPF prêt à ``ue_id`` ; retourne son nom, ou None si le pool est vide."""
+        start = time.perf_counter()
+        with self._lock:
+            candidates = [d for d in self._idle() if deployment_ready(d)] if self.informer.synced.is_set() else []
+            if not candidates:
+                WARM_POOL_MISSES.inc()
+                return None
+            deployment = candidates[0]
+            name = deployment["metadata"]["name"]
+            self._claimed.add(name)
+        pool_id = deployment["metadata"]["labels"]["pool-id"]
+        ue_labels = {"app": "upf", "ue-id": str(ue_id)}
+        try:
+            gw = get_gateway()
+            # Seuls les labels de la Deployment changent : le pod en cours n'est pas recréé
+            gw.call(gw.apps_v1.patch_namespaced_deployment, name=name, namespace=NAMESPACE,
+                    body={"metadata": {"labels": {**ue_labels, "pool-id": pool_id}}})
+            _, service = self.builder(f"upf-ue{ue_id}", {"pool-id": pool_id}, self.image, self.replicas)
+            service["metadata"]["labels"] = ue_labels
+            gw.call(gw.core_v1.create_namespaced_service, namespace=NAMESPACE, body=service)
+        except Exception:
+            with self._lock:
+                self._claimed.discard(name)
+            raise
+        finally:
+            self._wakeup.set()
+        WARM_POOL_HITS.inc()
+        WARM_POOL_CLAIM_SECONDS.observe(time.perf_counter() - start)
+        print(f"UPF {name} du pool attribué à l'UE {ue_id}.")
+        return name
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self.informer.start()
+        self._thread = threading.Thread(target=self._run, name="warm-pool-refill", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self.refill()
+            self._wakeup.wait(self.refill_interval)
+            self._wakeup.clear()
@@ -163,19 +163,19 @@ echo ""
 # Start Flask controller
 echo "[5/5] Starting Flask controller..."
 
-if pgrep -f 'python -m src.main' > /dev/null; then
-    echo "⚠️  Flask controller already running. Stop it first with: pkill -f 'python -m src.main'"
+if pgrep -f 'python -m src.server' > /dev/null; then
+    echo "⚠️  Flask controller already running. Stop it first with: pkill -f 'python -m src.server'"
     exit 1
 fi
 
-echo "    Starting Flask (DEMO_MODE=$DEMO_MODE)..."
+echo "    Starting Flask via Gunicorn (DEMO_MODE=$DEMO_MODE, WEB_WORKERS=${WEB_WORKERS:-1})..."
 echo "    Logs: /tmp/nexslice_flask.log"
 
-nohup ./.venv/bin/python -m src.main > /tmp/nexslice_flask.log 2>&1 &
+nohup ./.venv/bin/python -m src.server > /tmp/nexslice_flask.log 2>&1 &
 echo $! > /tmp/nexslice_flask.pid
 sleep 2
 
-if pgrep -f 'python -m src.main' > /dev/null; then
+if pgrep -f 'python -m src.server' > /dev/null; then
     echo "✅ Flask controller started"
 else
     echo "❌ Flask controller failed to start"
@@ -200,7 +200,7 @@ echo "   • tail -f /tmp/nexslice_flask.log"
 echo "   • curl http://localhost:5000/metrics"
 echo ""
 echo "🛑 To stop all services:"
-echo "   pkill -f 'python -m src.main'"
+echo "   pkill -f 'python -m src.server'"
 echo "   pkill -f 'prometheus.*prometheus.yml'"
 if command -v grafana-server &> /dev/null; then
     echo "   pkill -f 'grafana-server'"
@@ -0,0 +1,153 @@
+import copy
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from collections import defaultdict, deque
+
+import pytest
+
+# src.main ouvre la base d'état (outbox SMF comprise) et le répertoire des configs UE dès
+# l'import : ils doivent pointer vers un répertoire jetable avant toute collecte,
+# sinon les tests écrivent dans ./tmp du dépôt et partagent leur état entre exécutions.
+_STATE_DIR = tempfile.mkdtemp(prefix="nexslice-tests-")
+os.environ["UE_STATE_DB"] = os.path.join(_STATE_DIR, "nexslice-state.db")
+os.environ["UE_CONF_DIR"] = os.path.join(_STATE_DIR, "ue-confs")
+
+
+_spec = importlib.util.spec_from_file_location("fake_k8s", os.path.join(os.path.dirname(__file__), "..", "scripts", "fake_k8s.py"))
+fake_k8s = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(fake_k8s)
+
+NAMESPACE = "nexslice"
+# Suffixe des méthodes ``<verbe>_namespaced_<type>`` du client Kubernetes -> kind
+KINDS = {"pod": "Pod", "config_map": "ConfigMap", "deployment": "Deployment", "service": "Service"}
+VERBS = ("read", "list", "create", "patch", "delete", "delete_collection")
+
+
+class ApiError(Exception):
+    """Erreur d'API portant son code HTTP dans ``status``, comme ``kubernetes.client.ApiException``."""
+
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+
+class Raw:
+    """Réponse brute (``_preload_content=False``) : corps JSON dans ``data``."""
+
+    def __init__(self, obj):
+        self.data = json.dumps(obj).encode()
+
+
+class FakeGateway:
+    """Passerelle Kubernetes en mémoire : ``FakeKube`` (scripts/fake_k8s.py) appelé sans HTTP.
+
+    ``core_v1`` et ``apps_v1`` exposent les méthodes ``<verbe>_namespaced_<type>``
+    du client (``VERBS`` x ``KINDS``). Chaque appel est noté dans
+    ``calls`` (``(méthode, kwargs)``) ; ``fail()`` fait échouer le prochain
+    appel d'une méthode.
+    """
+
+    def __init__(self):
+        self.kube = fake_k8s.FakeKube()
+        self.calls = []
+        self._failures = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    @property
+    def core_v1(self):
+        return self
+
+    apps_v1 = core_v1
+
+    def call(self, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+    def fail(self, method, status):
+        """Le prochain appel de ``method`` (ex: ``patch_namespaced_pod``) lève ``ApiError(status)``."""
+        with self._lock:
+            self._failures[method].append(status)
+
+    def add(self, *objects):
+        for obj in objects:
+            self.kube.create(obj["kind"], NAMESPACE, obj)
+
+    def get(self, kind, name):
+        return self.kube.objects[kind].get((NAMESPACE, name))
+
+    def count(self, kind):
+        return self.kube.count(kind)
+
+    def writes(self):
+        """Ecritures ``(verbe, nom)`` dans l'ordre des appels (lectures et LIST exclues)."""
+        writes = []
+        for method, kwargs in self.calls:
+            verb = method.split("_namespaced_")[0]
+            if verb not in ("read", "list"):
+                writes.append((verb, kwargs.get("name") or (kwargs.get("body") or {}).get("metadata", {}).get("name")))
+        return writes
+
+    def __getattr__(self, method):
+        verb, sep, suffix = method.partition("_namespaced_")
+        if not sep or suffix not in KINDS or verb not in VERBS:
+            raise AttributeError(method)
+        kind = KINDS[suffix]
+
+        def fn(**kwargs):
+            with self._lock:
+                self.calls.append((method, kwargs))
+                failures = self._failures.get(method)
+                status = failures.popleft() if failures else None
+            if status is not None:
+                raise ApiError(status)
+            namespace = kwargs["namespace"]
+            try:
+                if verb == "read":
+                    result = self.kube._get(kind, namespace, kwargs["name"])
+                elif verb == "list":
+                    result = self.kube.list(kind, namespace, kwargs.get("label_selector"))
+                elif verb == "create":
+                    result = self.kube.create(kind, namespace, kwargs["body"])
+                elif verb == "patch":
+                    result = self.kube.patch(kind, namespace, kwargs["name"], kwargs["body"])
+                elif verb == "delete":
+                    result = self.kube.delete(kind, namespace, kwargs["name"])
+                else:
+                    result = self.kube.delete_collection(kind, namespace, kwargs.get("label_selector"))
+            except fake_k8s.ApiError as e:
+                raise ApiError(e.code) from None
+            return Raw(result) if kwargs.get("_preload_content") is False else copy.deepcopy(result)
+        fn.__name__ = method
+        return fn
+
+
+@pytest.fixture
+def gateway(monkeypatch):
+    """``FakeGateway`` renvoyé par ``get_gateway()`` dans tous les modules de ``src`` déjà importés."""
+    from src import k8s_gateway
+
+    fake = FakeGateway()
+    original = k8s_gateway.get_gateway
+    for name, module in list(sys.modules.items()):
+        if name.startswith("src.") and getattr(module, "get_gateway", None) is original:
+            monkeypatch.setattr(module, "get_gateway", lambda: fake)
+    return fake
+
+
+@pytest.fixture(autouse=True)
+def _flush_ue_configs():
+    # Les configs UE sont écrites en arrière-plan : les vider avant la fin du test
+    # (et le retour au cwd d'origine) plutôt que pendant le test suivant
+    yield
+    main = sys.modules.get("src.main")
+    if main is not None:
+        main.CONFIG_WRITER.flush()
+        main.CONFIG_WRITER.wait_idle(5)
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_STATE_DIR, ignore_errors=True)
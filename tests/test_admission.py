@@ -0,0 +1,82 @@
+import os
+import time
+
+os.environ.setdefault("DEMO_MODE", "1")
+
+from src.admission import IdempotencyCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_replays_until_ttl_and_detects_conflicts():
+    clock = FakeClock()
+    cache = IdempotencyCache(ttl=10, max_keys=2, clock=clock)
+    assert cache.begin("k1", "a") == ("new", None)
+    assert cache.begin("k1", "a") == ("in_flight", None)
+    cache.complete("k1", (202, b"{}", {}))
+    assert cache.begin("k1", "a") == ("replay", (202, b"{}", {}))
+    assert cache.begin("k1", "b") == ("conflict", None)
+
+    cache.begin("k2", "a")
+    cache.begin("k3", "a")
+    assert len(cache) == 2 and cache.begin("k1", "a")[0] == "new"
+
+    clock.now = 11
+    assert cache.begin("k2", "a")[0] == "new"
+    cache.abandon("k2")
+    assert cache.begin("k2", "a")[0] == "new"
+
+
+def test_webhook_idempotency_key_replays_response(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from src import main
+
+    client = main.app.test_client()
+    headers = {"Idempotency-Key": "evt-42"}
+    first = client.post("/api/ue-connect", json={"ue_id": 42}, headers=headers)
+    replay = client.post("/api/ue-connect", json={"ue_id": 42}, headers=headers)
+    assert first.status_code == replay.status_code == 202
+    assert replay.json["job_id"] == first.json["job_id"]
+    assert replay.headers["Idempotent-Replayed"] == "true" and replay.headers["Location"] == first.headers["Location"]
+
+    other = client.post("/api/ue-disconnect", json={"ue_id": 42}, headers=headers)
+    assert other.status_code == 422
+
+
+def test_flapping_ue_runs_only_final_state(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from src import main
+
+    monkeypatch.setattr(main, "UE_DEBOUNCE_WINDOW", 0.3)
+    client = main.app.test_client()
+    jobs = [client.post(f"/api/{event}", json={"ue_id": 43}).json["job_id"]
+            for event in ("ue-connect", "ue-disconnect", "ue-connect")]
+
+    deadline = time.time() + 5
+    while True:
+        statuses = [client.get(f"/api/jobs/{job_id}").json["status"] for job_id in jobs]
+        if statuses[-1] not in ("queued", "running") or time.time() > deadline:
+            break
+        time.sleep(0.01)
+    assert statuses == ["superseded", "superseded", "succeeded"]
+
+
+def test_queue_full_sheds_with_retry_after(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from src import main
+    from src.jobs import QueueFull
+
+    def full(*args, **kwargs):
+        raise QueueFull("file de jobs pleine (1)")
+
+    monkeypatch.setattr(main.JOB_QUEUE, "submit", full)
+    r = main.app.test_client().post("/api/ue-connect", json={"ue_id": 44}, headers={"Idempotency-Key": "k"})
+    assert r.status_code == 429 and 1 <= int(r.headers["Retry-After"]) <= 60
+    # Un délestage n'est pas mémorisé : le client peut réessayer avec la même clé
+    assert "k" not in main.IDEMPOTENCY._entries
@@ -0,0 +1,109 @@
+import ipaddress
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("DEMO_MODE", "1")
+
+import pytest
+
+from src.allocator import IdentityAllocator, PoolExhausted, SlotBitmap
+from src.state_store import StateStore
+
+
+def test_bitmap_reuses_oldest_freed_slot_first():
+    bitmap = SlotBitmap(4)
+    assert [bitmap.allocate() for _ in range(3)] == [0, 1, 2]
+    bitmap.release(1)
+    bitmap.release(0)
+    bitmap.release(0)  # double libération ignorée
+    assert bitmap.allocate(preferred=2) == 1 and bitmap.allocate() == 0
+    assert bitmap.allocate() == 3 and bitmap.allocate() is None
+    assert not bitmap.take(3) and bitmap.stats() == {"size": 4, "used": 4}
+
+
+def test_identities_keep_legacy_values_and_stay_valid_past_255():
+    allocator = IdentityAllocator()
+    assert allocator.identity(7) == {"dnn": "oai-ue7", "ip_range": "12.1.7.0/24", "sst": 1, "sd": "000007"}
+
+    identities = [allocator.identity(ue_id) for ue_id in range(1, 1001)]
+    ranges = [ipaddress.IPv4Network(i["ip_range"]) for i in identities]
+    assert len(set(ranges)) == len(set(i["sd"] for i in identities)) == 1000
+    assert all(r.prefixlen == 24 and r.subnet_of(ipaddress.IPv4Network("12.0.0.0/8")) for r in ranges)
+
+
+def test_released_ids_and_subnets_are_reused_under_churn():
+    allocator = IdentityAllocator(id_max=10, subnet_pool="10.0.0.0/28", subnet_prefix=30)
+    ids = [allocator.allocate() for _ in range(4)]
+    assert ids == [1, 2, 3, 4]
+    with pytest.raises(PoolExhausted):
+        allocator.allocate()  # 4 sous-réseaux /30 dans un /28
+
+    freed = allocator.identity(2)
+    allocator.release([2])
+    assert allocator.allocate() == 2 and allocator.identity(2)["ip_range"] == freed["ip_range"]
+    # Un millier de cycles connexion/déconnexion sans épuiser les espaces
+    for _ in range(1000):
+        allocator.release([3])
+        assert allocator.allocate() == 3
+    assert allocator.stats()["subnets"]["used"] == 4
+
+
+def test_allocations_persist_and_collide_safely_across_workers(tmp_path):
+    path = str(tmp_path / "state.db")
+    workers = [IdentityAllocator(StateStore(path), subnet_pool="10.0.0.0/16", subnet_prefix=24) for _ in range(2)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        ids = list(pool.map(lambda i: workers[i % 2].allocate(), range(200)))
+    assert sorted(ids) == list(range(1, 201))
+    assert sum(w.collisions for w in workers) > 0
+
+    # Redémarrage : les identités sont relues, rien n'est réattribué
+    restarted = IdentityAllocator(StateStore(path), subnet_pool="10.0.0.0/16", subnet_prefix=24)
+    records = [restarted.identity(ue_id) for ue_id in ids]
+    assert len({r["ip_range"] for r in records}) == len({r["sd"] for r in records}) == 200
+    assert restarted.allocate() == 201 and restarted.stats()["allocated"] == 201
+
+
+def test_slots_released_by_another_worker_are_reused(tmp_path):
+    path = str(tmp_path / "state.db")
+    worker1, worker2 = (IdentityAllocator(StateStore(path), id_max=10, subnet_pool="10.0.0.0/28", subnet_prefix=30)
+                        for _ in range(2))
+    worker2.stats()  # chargé avant les réservations de worker1
+    assert [worker1.allocate() for _ in range(4)] == [1, 2, 3, 4]
+
+    # worker2 ne connaît pas l'UE 2 : son identité est lue en base pour la libérer
+    freed = worker1.identity(2)
+    worker2.release([2])
+    assert StateStore(path).allocation(2) is None
+    # worker1 croit ses espaces pleins : ils sont reconstruits depuis la base
+    assert worker1.allocate() == 2 and worker1.identity(2)["ip_range"] == freed["ip_range"]
+    with pytest.raises(PoolExhausted):
+        worker2.allocate()
+
+
+def test_legacy_identities_are_imported_and_invalid_ones_reassigned(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"))
+    store.upsert_many({
+        1: {"sd": "000001", "ip_range": "12.1.1.0/24"},
+        2: {"sd": "000001", "ip_range": "12.1.2.0/24"},  # SD en double
+        300: {"sd": "000300", "ip_range": "12.1.300.0/24"},  # plage invalide
+    })
+    allocator = IdentityAllocator(store)
+    assert allocator.identity(1) == {"dnn": "oai-ue1", "ip_range": "12.1.1.0/24", "sst": 1, "sd": "000001"}
+    assert allocator.identity(2)["sd"] != "000001"
+    assert ipaddress.IPv4Network(store.get(300)["ip_range"]).prefixlen == 24
+    assert allocator.stats()["collisions"] == 2
+
+
+def test_one_allocation_feeds_config_upf_and_smf(tmp_path, monkeypatch):
+    from src import main
+
+    allocator = IdentityAllocator(StateStore(str(tmp_path / "state.db")), subnet_pool="10.8.0.0/16")
+    monkeypatch.setattr(main, "ALLOCATOR", allocator)
+    identity = allocator.identity(4242)
+
+    assert f"sd: {identity['sd']}\n" in main.render_ue_config(4242, main.ue_identity(4242))
+    deployment, _ = main.make_upf_deployment_and_service("upf-ue4242", {"app": "upf"}, "upf:test", 1,
+                                                         main.ue_identity(4242))
+    assert deployment["metadata"]["annotations"]["nexslice.io/ip-range"] == identity["ip_range"]
+    payload = main.smf_registration_payload(4242)
+    assert (payload["ip_range"], payload["sd"]) == (identity["ip_range"], identity["sd"])
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("DEMO_MODE", "1")
+
+import pytest
+
+from src import main
+from src.backends import create_backend
+from src.backends.dryrun import DryRunBackend
+from src.backends.memory import MemoryBackend
+from src.renderer import render_ue_configmap
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def test_memory_backend_applies_lists_and_tears_down():
+    backend = MemoryBackend()
+    for ue_id in (1, 2, 3):
+        assert backend.apply(render_ue_configmap(ue_id, f"config {ue_id}")) == "created"
+    assert backend.apply(render_ue_configmap(2, "config 2")) == "unchanged"
+    assert backend.apply(render_ue_configmap(2, "config 2 bis")) == "patched"
+
+    items, pages = backend.list("ConfigMap", "app=ueransim-ue,ue-id in (1,3)")
+    assert [i["metadata"]["labels"]["ue-id"] for i in items] == ["1", "3"] and pages == 1
+    assert backend.get("ConfigMap", "ueransim-ue2-config")["data"]["ue.yaml"] == "config 2 bis"
+
+    assert backend.delete("ConfigMap", "ueransim-ue1-config") and not backend.delete("ConfigMap", "absent")
+    report = backend.teardown([2])
+    assert report["removed"]["configmaps"] == ["ueransim-ue2-config"] and report["api_calls"] == 4
+    assert list(backend.objects["ConfigMap"]) == ["ueransim-ue3-config"]
+    # L'apply « unchanged » n'écrit rien
+    assert backend.stats()["calls"]["create"] == 3 and backend.stats()["calls"]["patch"] == 1
+
+
+def test_memory_backend_simulates_latency():
+    backend = MemoryBackend(latency=0.02)
+    start = time.perf_counter()
+    backend.list("Pod")
+    backend.list("Pod")
+    assert time.perf_counter() - start >= 0.04
+    assert backend.stats()["calls"] == {"list": 2}
+
+
+def test_dryrun_records_planned_writes_without_a_cluster(monkeypatch):
+    backend = DryRunBackend(max_calls=3, verbose=False)
+    monkeypatch.setattr(main, "BACKEND", backend)
+    monkeypatch.setattr(main, "PLACEMENT", None)
+    monkeypatch.setattr(main, "WARM_POOL", main.WarmPool(main.make_upf_deployment_and_service, 0, "upf", 1))
+
+    assert main.create_upf_for_ue(7)
+    assert main.create_upf_for_ue(7)  # rejoué : rien à écrire
+    assert main.delete_upf_for_ue(7)
+    # Seuls les 3 derniers appels prévus sont gardés
+    assert backend.planned() == [
+        {"verb": "create", "kind": "Service", "name": "upf-ue7"},
+        {"verb": "delete", "kind": "Deployment", "name": "upf-ue7"},
+        {"verb": "delete", "kind": "Service", "name": "upf-ue7"},
+    ]
+    assert not any(backend.objects.values())
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_backend("nomad")
+
+
+def test_controller_import_does_not_load_kubernetes(tmp_path):
+    env = dict(os.environ, PROVISIONING_BACKEND="memory", UE_STATE_DB=str(tmp_path / "state.db"),
+               UE_CONF_DIR=str(tmp_path / "ue-confs"))
+    code = "import sys, src.main; print(sorted(m for m in ('kubernetes', 'requests') if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,111 @@
+import os
+import threading
+
+os.environ.setdefault("DEMO_MODE", "1")
+
+from src import main
+from src.changefeed import ChangeFeed
+from src.state_store import StateStore
+from src.ue_registry import UERegistry
+
+
+def test_feed_replays_changes_and_detects_gaps():
+    feed = ChangeFeed(history=3)
+    for i in range(5):
+        feed.publish({"n": i})
+    assert feed.version == 5
+    assert feed.since(5) == []
+    assert feed.since(3) == [(4, {"n": 3}), (5, {"n": 4})]
+    # Versions 1 et 2 sorties du journal, version future, autre processus : instantané
+    assert feed.since(1) is None and feed.since(9) is None
+    assert feed.parse_token(feed.token(4)) == 4 and ChangeFeed().parse_token(feed.token(4)) is None
+
+    threading.Timer(0.05, feed.publish, args=({"n": 5},)).start()
+    assert feed.wait(5, timeout=2) == 6
+    assert feed.wait(6, timeout=0.01) == 6
+
+
+def test_registry_publishes_changes_and_pages_by_cursor(tmp_path):
+    feed = ChangeFeed()
+    registry = UERegistry(str(tmp_path / "confs"), store=StateStore(str(tmp_path / "state.db")), feed=feed)
+    registry.add_many({i: {"phase": "configured"} for i in (1, 2, 3, 5)})
+    registry.remove_many([2, 9])
+    assert registry.add(6)
+    registry.add(3, phase="provisioned")
+
+    ops = [event for _, event in feed.since(0)]
+    assert ops[0]["op"] == "reload"
+    assert ops[1:4] == [
+        {"op": "add", "ue_ids": [1, 2, 3, 5], "count": 4, "last": 5},
+        {"op": "remove", "ue_ids": [2], "count": 3, "last": 5},
+        {"op": "add", "ue_ids": [6], "count": 4, "last": 6},
+    ]
+    assert ops[4] == {"op": "state", "ues": {3: {"phase": "provisioned"}}}
+    assert registry.page(0, 2) == [1, 3] and registry.page(3, 2) == [5, 6] and registry.page(6) == []
+    assert registry.store.page(0, 10, phase="provisioned") == [3]
+
+
+def _isolated_controller(tmp_path, monkeypatch):
+    feed = ChangeFeed()
+    store = StateStore(str(tmp_path / "state.db"))
+    registry = UERegistry(str(tmp_path / "confs"), store=store, feed=feed)
+    monkeypatch.setattr(main, "UE_CHANGES", feed)
+    monkeypatch.setattr(main, "STATE_STORE", store)
+    monkeypatch.setattr(main, "UE_REGISTRY", registry)
+    return main.create_app(start_services=False).test_client(), registry
+
+
+def test_ue_list_paginates_filters_and_revalidates(tmp_path, monkeypatch):
+    client, registry = _isolated_controller(tmp_path, monkeypatch)
+    registry.add_many({i: {"phase": "provisioned" if i % 2 else "configured"} for i in range(1, 8)})
+
+    first = client.get("/api/ue-list?limit=3")
+    assert first.json["ues"] == [1, 2, 3] and first.json["next_cursor"] == 3
+    second = client.get("/api/ue-list?limit=3&cursor=3")
+    assert second.json["ues"] == [4, 5, 6] and second.json["next_cursor"] == 6
+    assert client.get("/api/ue-list?limit=3&cursor=6").json == {"ues": [7], "next_cursor": None,
+                                                                "version": first.json["version"]}
+    assert client.get("/api/ue-list?phase=provisioned").json["ues"] == [1, 3, 5, 7]
+    assert client.get("/api/ue-list?limit=0").status_code == 400
+    assert client.get("/api/ue-list?phase=unknown").status_code == 400
+
+    # Rien n'a changé : 304 sans corps, pour la même requête seulement
+    etag = first.headers["ETag"]
+    assert client.get("/api/ue-list?limit=3", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/ue-list?limit=4", headers={"If-None-Match": etag}).status_code == 200
+    count = client.get("/api/ue-count")
+    assert count.json == {"count": 7, "last": 7}
+    assert client.get("/api/ue-count", headers={"If-None-Match": count.headers["ETag"]}).status_code == 304
+
+    registry.remove(2)
+    assert client.get("/api/ue-list?limit=3", headers={"If-None-Match": etag}).json["ues"] == [1, 3, 4]
+    # Nombre d'UE, pas le plus grand identifiant
+    assert client.get("/api/ue-count").json == {"count": 6, "last": 7}
+
+
+def test_ue_stream_resumes_from_last_event_id(tmp_path, monkeypatch):
+    client, registry = _isolated_controller(tmp_path, monkeypatch)
+    monkeypatch.setattr(main, "UE_STREAM_MAX_SECONDS", 0)
+    registry.add(1)
+
+    body = client.get("/api/ue-stream").get_data(as_text=True)
+    assert "event: snapshot" in body and '"count": 1' in body
+    last_id = [line for line in body.splitlines() if line.startswith("id: ")][-1][4:]
+
+    registry.add(2)
+    registry.remove(1)
+    resumed = client.get("/api/ue-stream", headers={"Last-Event-ID": last_id}).get_data(as_text=True)
+    assert "event: snapshot" not in resumed
+    assert resumed.count("event: delta") == 2 and '"op": "remove"' in resumed
+
+
+def test_ue_stream_limits_concurrent_clients(tmp_path, monkeypatch):
+    client, _ = _isolated_controller(tmp_path, monkeypatch)
+    monkeypatch.setattr(main, "UE_STREAM_SLOTS", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(main, "UE_STREAM_MAX_SECONDS", 0)
+
+    held = client.get("/api/ue-stream", buffered=False)
+    refused = client.get("/api/ue-stream")
+    assert refused.status_code == 503 and refused.headers["Retry-After"] == "5"
+    held.close()
+    assert client.get("/api/ue-stream").status_code == 200
@@ -0,0 +1,39 @@
+from src.configmap_shards import ShardedConfigMaps
+from src.renderer import render_ue_pod
+
+
+def test_burst_is_coalesced_into_one_write_per_shard(gateway):
+    shards = ShardedConfigMaps(shard_size=256, flush_interval=60)
+
+    writes = [shards.put(ue_id, f"config {ue_id}") for ue_id in range(1, 301)]
+    assert shards.depth() == 300
+    assert shards.flush() == 2
+    assert all(w.wait(0) for w in writes)
+    assert sorted(gateway.writes()) == [("create", "ueransim-shard-0"), ("create", "ueransim-shard-1"),
+                                  ("patch", "ueransim-shard-0"), ("patch", "ueransim-shard-1")]
+    assert len(gateway.get("ConfigMap", "ueransim-shard-0")["data"]) == 256
+    assert gateway.get("ConfigMap", "ueransim-shard-1")["data"]["ue300.yaml"] == "config 300"
+
+    gateway.calls.clear()
+    shards.remove([1, 2])
+    shards.remove([5000])
+    shards.flush()
+    # Retrait sur un shard absent : pas de création
+    assert gateway.get("ConfigMap", "ueransim-shard-19") is None
+    assert ("create", "ueransim-shard-19") not in gateway.writes()
+    assert "ue1.yaml" not in gateway.get("ConfigMap", "ueransim-shard-0")["data"]
+
+
+def test_failed_write_is_reported(gateway):
+    gateway.fail("patch_namespaced_config_map", 500)
+    shards = ShardedConfigMaps(shard_size=10, flush_interval=60)
+    write = shards.put(3, "x")
+    shards.flush()
+    assert not write.wait(0) and write.error
+
+
+def test_pod_mounts_only_its_key():
+    shards = ShardedConfigMaps(shard_size=256)
+    pod = render_ue_pod(300, "img", shards.locate(300))
+    assert pod["spec"]["volumes"][0]["configMap"] == {
+        "name": "ueransim-shard-1", "items": [{"key": "ue300.yaml", "path": "ue.yaml"}]}
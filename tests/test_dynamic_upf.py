@@ -21,13 +21,9 @@ def test_create_and_delete_upf():
     core = client.CoreV1Api()
 
     # Create a UE via add_pod
-    r = requests.post(f"{API_BASE}/add_pod")
-    assert r.status_code in (200, 302)
-
-    # Get last UE id
-    r = requests.get(f"{API_BASE}/api/ue-count")
-    assert r.status_code == 200
-    ue_id = r.json()['count']
+    r = requests.post(f"{API_BASE}/add_pod", headers={"Accept": "application/json"})
+    assert r.status_code == 202
+    ue_id = r.json()['ue_id']
 
     name = f"upf-ue{ue_id}"
 
@@ -0,0 +1,76 @@
+import io
+import json
+import os
+import time
+
+os.environ.setdefault("DEMO_MODE", "1")
+
+from src.events import ingest
+from src.jobs import QueueFull
+
+
+class Job:
+    def __init__(self, n):
+        self.id = f"job-{n}"
+
+
+def ndjson(*lines):
+    return io.BytesIO("".join(line + "\n" for line in lines).encode())
+
+
+def test_ingest_groups_batches_and_reports_each_line():
+    batches = []
+
+    def submit(events):
+        batches.append(events)
+        return [Job(ue_id) if ue_id != 4 else QueueFull("file de jobs pleine (3)") for _, ue_id in events]
+
+    body = ndjson(
+        '{"event": "connect", "ue_id": 1}',
+        '{"event": "disconnect", "ue_id": 1}',
+        'pas du json',
+        '',
+        '{"event": "connect", "ue_id": 2}',
+        '{"event": "reboot", "ue_id": 3}',
+        '{"event": "connect", "ue_id": 4}',
+        '{"event": "connect", "ue_id": ' + "9" * 5000 + '}',
+        '{"event": "connect", "ue_id": 5}',
+    )
+    results = list(ingest(body, submit, batch_size=3))
+
+    assert batches == [[("disconnect", 1), ("connect", 2)], [("connect", 4), ("connect", 5)]]
+    by_line = {r["line"]: r for r in results if "line" in r}
+    assert by_line[1]["status"] == "superseded" and by_line[1]["superseded_by_line"] == 2
+    assert by_line[2] == {"line": 2, "event": "disconnect", "ue_id": 1, "status": "accepted", "job_id": "job-1"}
+    assert by_line[3]["status"] == by_line[6]["status"] == by_line[8]["status"] == "rejected"
+    assert by_line[7]["status"] == "rejected" and "pleine" in by_line[7]["error"]
+    assert results[-1] == {"summary": {"lines": 8, "truncated": False, "accepted": 3, "superseded": 1,
+                                       "rejected": 4}}
+
+
+def test_ingest_stops_at_event_limit():
+    results = list(ingest(ndjson(*['{"event": "connect", "ue_id": %d}' % n for n in range(1, 6)]),
+                          lambda events: [Job(ue_id) for _, ue_id in events], max_events=3))
+    assert [r["status"] for r in results[:-1]] == ["accepted"] * 3 + ["rejected"]
+    assert results[-1]["summary"]["truncated"] is True
+
+
+def test_ue_events_endpoint_streams_results(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from src import main
+
+    monkeypatch.setattr(main, "UE_DEBOUNCE_WINDOW", 0)
+    client = main.app.test_client()
+    body = "\n".join(json.dumps({"event": "connect", "ue_id": n}) for n in range(60, 70))
+    r = client.post("/api/ue-events", data=body, content_type="application/x-ndjson")
+    assert r.status_code == 200 and r.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in r.data.decode().splitlines()]
+    assert lines[-1]["summary"]["accepted"] == 10
+
+    deadline = time.time() + 5
+    for result in lines[:-1]:
+        job = main.JOB_QUEUE.get(result["job_id"])
+        while job.finished_at is None and time.time() < deadline:
+            time.sleep(0.01)
+        assert job.status == "succeeded"
+    assert main.STATE_STORE.get(60)["phase"] == "provisioned" and main.STATE_STORE.get(60)["dnn"] == "oai-ue60"
@@ -0,0 +1,85 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+from src.k8s_gateway import KubeGateway
+from src.renderer import render_upf
+
+_spec = importlib.util.spec_from_file_location("fake_k8s", os.path.join(os.path.dirname(__file__), "..", "scripts", "fake_k8s.py"))
+fake_k8s = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(fake_k8s)
+
+
+@pytest.fixture
+def kube():
+    fake = fake_k8s.FakeKube(seed=1)
+    server = fake.serve()
+    fake.gateway = KubeGateway(host=f"http://127.0.0.1:{server.server_address[1]}")
+    yield fake
+    server.shutdown()
+
+
+def configmap(name, ue_id):
+    return {"apiVersion": "v1", "kind": "ConfigMap",
+            "metadata": {"name": name, "labels": {"app": "ueransim-ue", "ue-id": str(ue_id)}},
+            "data": {"ue.yaml": "x"}}
+
+
+def test_crud_with_the_kubernetes_client(kube):
+    gw = kube.gateway
+    gw.call(gw.core_v1.create_namespaced_config_map, namespace="nexslice", body=configmap("cm1", 1))
+    with pytest.raises(Exception) as conflict:
+        gw.call(gw.core_v1.create_namespaced_config_map, namespace="nexslice", body=configmap("cm1", 1))
+    assert conflict.value.status == 409
+
+    gw.call(gw.core_v1.patch_namespaced_config_map, name="cm1", namespace="nexslice",
+            body={"data": {"ue.yaml": None, "other": "y"}})
+    live = gw.call(gw.core_v1.read_namespaced_config_map, name="cm1", namespace="nexslice")
+    assert live.data == {"other": "y"}
+
+    gw.call(gw.core_v1.delete_namespaced_config_map, name="cm1", namespace="nexslice")
+    with pytest.raises(Exception) as missing:
+        gw.call(gw.core_v1.read_namespaced_config_map, name="cm1", namespace="nexslice")
+    assert missing.value.status == 404
+
+
+def test_selectors_pagination_and_deletecollection(kube):
+    gw = kube.gateway
+    for ue_id in range(1, 6):
+        gw.call(gw.core_v1.create_namespaced_config_map, namespace="nexslice", body=configmap(f"cm{ue_id}", ue_id))
+
+    page = gw.call(gw.core_v1.list_namespaced_config_map, namespace="nexslice",
+                   label_selector="app=ueransim-ue,ue-id in (1,2,3)", limit=2)
+    assert [i.metadata.name for i in page.items] == ["cm1", "cm2"] and page.metadata._continue
+    rest = gw.call(gw.core_v1.list_namespaced_config_map, namespace="nexslice",
+                   label_selector="app=ueransim-ue,ue-id in (1,2,3)", limit=2, _continue=page.metadata._continue)
+    assert [i.metadata.name for i in rest.items] == ["cm3"] and not rest.metadata._continue
+
+    gw.call(gw.core_v1.delete_collection_namespaced_config_map, namespace="nexslice", label_selector="ue-id notin (5)")
+    assert kube.count("ConfigMap") == 1
+
+
+def test_watch_streams_events_after_resource_version(kube):
+    gw = kube.gateway
+    deployment, _ = render_upf("upf-ue1", {"app": "upf", "ue-id": "1"}, "upf:test", 1)
+    gw.call(gw.apps_v1.create_namespaced_deployment, namespace="nexslice", body=deployment)
+    resp = gw.call(gw.apps_v1.list_namespaced_deployment, namespace="nexslice", label_selector="app=upf",
+                   watch=True, resource_version="0", timeout_seconds=1, _preload_content=False)
+    events = [json.loads(line) for line in resp.data.decode().splitlines()]
+    # Création puis passage à l'état prêt (ready_delay=0)
+    assert [e["type"] for e in events] == ["ADDED", "MODIFIED"]
+    assert events[1]["object"]["status"]["readyReplicas"] == 1
+
+
+def test_error_injection_on_writes_only(kube):
+    gw = kube.gateway
+    kube.errors = {429: 1.0}
+    # Sans nouvel essai côté passerelle : on observe la réponse brute du serveur
+    gw.retries_429 = 0
+    with pytest.raises(Exception) as throttled:
+        gw.call(gw.core_v1.create_namespaced_config_map, namespace="nexslice", body=configmap("cm1", 1))
+    assert throttled.value.status == 429 and throttled.value.headers["Retry-After"] == "1"
+    gw.call(gw.core_v1.list_namespaced_config_map, namespace="nexslice")
+    assert kube.stats()["injected_errors"] == {"429": 1}
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from src.informer import Informer, ResourceExpired, deployment_ready
+
+pytestmark = pytest.mark.usefixtures("gateway")
+
+
+class FakeResponse:
+    def __init__(self, data=None, events=()):
+        self.data = json.dumps(data).encode() if data is not None else b""
+        self._body = b"".join(json.dumps(e).encode() + b"\n" for e in events)
+
+    def stream(self, amt, decode_content=False):
+        for i in range(0, len(self._body), 7):
+            yield self._body[i:i + 7]
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+def deployment(name, ue_id, rv, ready=0):
+    return {"metadata": {"name": name, "labels": {"app": "upf", "ue-id": str(ue_id)}, "resourceVersion": rv},
+            "spec": {"replicas": 1}, "status": {"readyReplicas": ready}}
+
+
+def test_list_then_watch_updates_indexes():
+    calls = []
+
+    def list_fn(namespace, label_selector, watch=False, resource_version=None, **kwargs):
+        calls.append((watch, resource_version))
+        if not watch:
+            return FakeResponse({"metadata": {"resourceVersion": "10"},
+                                 "items": [deployment("upf-ue1", 1, "9"), deployment("upf-ue2", 2, "10")]})
+        return FakeResponse(events=[
+            {"type": "MODIFIED", "object": deployment("upf-ue1", 1, "11", ready=1)},
+            {"type": "DELETED", "object": deployment("upf-ue2", 2, "12")},
+            {"type": "ADDED", "object": deployment("upf-ue3", 3, "13")},
+            {"type": "BOOKMARK", "object": {"metadata": {"resourceVersion": "20"}}},
+        ])
+
+    inf = Informer("upf", lambda gw: list_fn, "app=upf")
+    inf.relist()
+    assert inf.synced.is_set() and inf.count() == 2 and inf.resource_version == "10"
+
+    inf.watch_once()
+    assert calls[-1] == (True, "10")
+    assert inf.ue_ids() == [1, 3]
+    assert deployment_ready(inf.get_by_ue(1)[0])
+    assert not inf.has_ue(2)
+    assert inf.resource_version == "20"
+
+
+def test_watch_reports_expired_resource_version():
+    def list_fn(namespace, label_selector, watch=False, **kwargs):
+        return FakeResponse(events=[{"type": "ERROR", "object": {"code": 410, "message": "too old"}}])
+
+    inf = Informer("upf", lambda gw: list_fn, "app=upf")
+    inf.resource_version = "1"
+    with pytest.raises(ResourceExpired):
+        inf.watch_once()
@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+
+os.environ.setdefault("DEMO_MODE", "1")
+
+import pytest
+
+from src.jobs import JobQueue, QueueFull
+
+
+def wait_for(job, timeout=5):
+    deadline = time.time() + timeout
+    while job.status in ("queued", "running") and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_job_records_stage_timings_and_errors():
+    q = JobQueue(workers=2, maxsize=10)
+    ok = wait_for(q.submit("t", 1, lambda ue_id: {"ok": True, "timings_ms": {"upf": 1.5}}))
+    ko = wait_for(q.submit("t", 2, lambda ue_id: {"ok": False, "failed_step": "pod", "error": "boom"}))
+
+    assert ok.to_dict()["status"] == "succeeded" and ok.to_dict()["timings_ms"] == {"upf": 1.5}
+    assert ko.status == "failed" and ko.failed_step == "pod" and ko.error == "boom"
+    assert q.get(ok.id) is ok
+
+
+def test_submit_rejects_when_queue_full():
+    release = threading.Event()
+    q = JobQueue(workers=1, maxsize=1)
+    q.submit("t", 1, lambda ue_id: release.wait() and {"ok": True})
+    time.sleep(0.05)
+    q.submit("t", 2, lambda ue_id: {"ok": True})
+    with pytest.raises(QueueFull):
+        q.submit("t", 3, lambda ue_id: {"ok": True})
+    assert q.depth() == 1
+    release.set()
+
+
+def test_ue_connect_returns_202_and_job_status(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from src import main
+
+    client = main.app.test_client()
+    r = client.post("/api/ue-connect", json={"ue_id": 7})
+    assert r.status_code == 202
+    job_id = r.json["job_id"]
+
+    deadline = time.time() + 5
+    while True:
+        status = client.get(f"/api/jobs/{job_id}").json
+        if status["status"] not in ("queued", "running") or time.time() > deadline:
+            break
+        time.sleep(0.01)
+    assert status["status"] == "succeeded"
+    assert set(status["timings_ms"]) == {"config", "configmap", "pod", "upf"}
+    assert client.get("/api/jobs/unknown").status_code == 404
+
+
+def test_add_pod_skips_ids_of_pending_connect_jobs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from src import main
+
+    monkeypatch.setattr(main, "UE_DEBOUNCE_WINDOW", 0.3)
+    client = main.app.test_client()
+    # Prochain identifiant que /add_pod attribuerait
+    pending = main.ALLOCATOR.allocate()
+    main.ALLOCATOR.release([pending])
+    connect = client.post("/api/ue-connect", json={"ue_id": pending})
+    assert connect.status_code == 202
+
+    added = client.post("/add_pod", headers={"Accept": "application/json"})
+    assert added.status_code == 202 and added.json["ue_id"] != pending
+    assert main.JOB_QUEUE.get(added.json["job_id"]).key == f"ue:{added.json['ue_id']}"
+    for job_id in (connect.json["job_id"], added.json["job_id"]):
+        assert wait_for(main.JOB_QUEUE.get(job_id)).status == "succeeded"
+
+
+def test_keyed_jobs_coalesce_to_last_request_within_window():
+    q = JobQueue(workers=2, maxsize=10)
+    ran = []
+    connect = q.submit("ue_connect", 1, lambda ue_id: ran.append("connect") or {"ok": True}, key="ue:1", delay=0.2)
+    disconnect = q.submit("ue_disconnect", 1, lambda ue_id: ran.append("disconnect") or {"ok": True},
+                          key="ue:1", delay=0.2)
+    again = wait_for(q.submit("ue_connect", 1, lambda ue_id: ran.append("connect") or {"ok": True},
+                              key="ue:1", delay=0.2))
+
+    assert again.status == "succeeded" and ran == ["connect"]
+    assert connect.status == disconnect.status == "superseded"
+    assert connect.superseded_by == disconnect.id and disconnect.superseded_by == again.id
+    assert q.depth() == 0
+
+
+def test_jobs_with_same_key_never_run_concurrently():
+    q = JobQueue(workers=4, maxsize=10)
+    active, overlaps = [], []
+
+    def run(ue_id):
+        active.append(ue_id)
+        overlaps.append(len(active))
+        time.sleep(0.05)
+        active.pop()
+        return {"ok": True}
+
+    first = q.submit("ue_connect", 1, run, key="ue:1")
+    time.sleep(0.01)
+    second = wait_for(q.submit("ue_disconnect", 1, run, key="ue:1"))
+    wait_for(first)
+    assert first.status == second.status == "succeeded"
+    assert second.started_at >= first.finished_at and max(overlaps) == 1
+
+
+def test_retry_after_is_bounded():
+    release = threading.Event()
+    q = JobQueue(workers=1, maxsize=100)
+    q.submit("t", 1, lambda ue_id: release.wait() and {"ok": True})
+    for ue_id in range(2, 50):
+        q.submit("t", ue_id, lambda ue_id: {"ok": True})
+    assert 1 <= q.retry_after() <= 60
+    release.set()
@@ -0,0 +1,75 @@
+import os
+
+os.environ.setdefault("DEMO_MODE", "1")
+
+from prometheus_client import CollectorRegistry, generate_latest
+
+from src import main
+from src.backends import Backend
+from src.informer import Informer
+from src.metrics import StateCollector
+
+
+def test_state_collector_evaluates_at_scrape_time():
+    state = {"ues": 1}
+
+    def broken():
+        raise RuntimeError("cache indisponible")
+
+    registry = CollectorRegistry()
+    registry.register(StateCollector()
+                      .gauge("demo_ues", "UE", lambda: state["ues"])
+                      .gauge("demo_pods", "Pods", lambda: {("ready",): 2, ("pending",): 1}, labels=["state"])
+                      .gauge("demo_broken", "Toujours en erreur", broken))
+    state["ues"] = 5
+    text = generate_latest(registry).decode()
+
+    assert "demo_ues 5.0" in text
+    assert 'demo_pods{state="ready"} 2.0' in text and 'demo_pods{state="pending"} 1.0' in text
+    assert "demo_broken" not in text
+
+
+def _pod(ue_id, phase, ready=False):
+    conditions = [{"type": "Ready", "status": "True"}] if ready else []
+    return {"metadata": {"name": f"ueransim-ue{ue_id}", "labels": {"app": "ueransim-ue", "ue-id": str(ue_id)}},
+            "status": {"phase": phase, "conditions": conditions}}
+
+
+def _upf(ue_id, ready):
+    return {"metadata": {"name": f"upf-ue{ue_id}", "labels": {"app": "upf", "ue-id": str(ue_id)}},
+            "spec": {"replicas": 1}, "status": {"readyReplicas": 1 if ready else 0}}
+
+
+def test_scrape_uses_caches_without_api_calls(monkeypatch):
+    pods = Informer("pods", None, "app=ueransim-ue")
+    upfs = Informer("upfs", None, "app=upf")
+    for event in (_pod(1, "Running", ready=True), _pod(2, "Running"), _pod(3, "Pending")):
+        pods.apply_event("ADDED", event)
+    for event in (_upf(1, True), _upf(2, False)):
+        upfs.apply_event("ADDED", event)
+    pods.synced.set()
+    upfs.synced.set()
+
+    class NoApi(Backend):
+        cluster_api = True
+
+        def get(self, kind, name):
+            raise AssertionError("un scrape ne doit pas appeler l'API")
+
+        list = get
+
+    monkeypatch.setattr(main, "UE_PODS", pods)
+    monkeypatch.setattr(main, "UPF_DEPLOYMENTS", upfs)
+    monkeypatch.setattr(main, "METRICS_PER_UE_LIMIT", 2)
+    monkeypatch.setattr(main, "BACKEND", NoApi())
+
+    text = main.create_app().test_client().get("/metrics").get_data(as_text=True)
+
+    assert 'nexslice_ue_pods{state="ready"} 1.0' in text
+    assert 'nexslice_ue_pods{state="not_ready"} 1.0' in text
+    assert 'nexslice_ue_pods{state="pending"} 1.0' in text
+    assert 'nexslice_upfs{state="ready"} 1.0' in text and 'nexslice_upfs{state="not_ready"} 1.0' in text
+    assert "nexslice_upfs_total 2.0" in text
+    assert 'nexslice_ue_ready{ue_id="1"} 1.0' in text and 'nexslice_ue_ready{ue_id="2"} 0.0' in text
+    assert 'ue_id="3"' not in text
+    assert "nexslice_ue_series_dropped 1.0" in text
@@ -0,0 +1,29 @@
+import importlib.util
+import os
+
+import pytest
+
+kopf = pytest.importorskip("kopf")
+
+_spec = importlib.util.spec_from_file_location("nexslice_operator", os.path.join(os.path.dirname(__file__), "..", "operator", "handler.py"))
+handler = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(handler)
+
+
+def test_desired_objects_are_owned_by_the_attachment():
+    owner = {"apiVersion": "nexslice.io/v1", "kind": "UEAttachment",
+             "metadata": {"name": "ue7", "namespace": "nexslice", "uid": "1234"}}
+    objects = handler.desired_objects(7, {"ueId": 7, "upfImage": "upf:test"}, "nexslice")
+    kopf.adopt(objects, owner=owner)
+
+    assert [o["kind"] for o in objects] == ["ConfigMap", "Deployment", "Service", "Pod"]
+    assert objects[1]["spec"]["template"]["spec"]["containers"][0]["image"] == "upf:test"
+    for obj in objects:
+        assert obj["metadata"]["ownerReferences"][0]["uid"] == "1234"
+
+
+def test_invalid_ue_id_is_permanent():
+    with pytest.raises(kopf.PermanentError):
+        handler._ue_id({"ueId": "abc"})
+    with pytest.raises(kopf.PermanentError):
+        handler._ue_id({"ueId": 0})
@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.placement import PlacementScheduler
+
+
+class Recorder:
+    def __init__(self, fail=()):
+        self.created, self.removed = [], []
+        self.fail = set(fail)
+        self.lock = threading.Lock()
+
+    def ensure(self, name):
+        with self.lock:
+            self.created.append(name)
+        return name not in self.fail
+
+    def remove(self, name):
+        self.removed.append(name)
+
+
+def test_packs_until_full_then_starts_new_upf():
+    rec = Recorder()
+    placement = PlacementScheduler(4, rec.ensure, rec.remove, drain_grace=0)
+    names = [placement.assign(ue_id) for ue_id in range(1, 10)]
+    assert names == ["upf-shared-0"] * 4 + ["upf-shared-1"] * 4 + ["upf-shared-2"]
+    assert rec.created == ["upf-shared-0", "upf-shared-1", "upf-shared-2"]
+    # Rejouer une connexion ne déplace pas l'UE
+    assert placement.assign(5) == "upf-shared-1"
+    stats = placement.stats()
+    assert stats["ues"] == 9 and stats["upfs"] == 3 and stats["upfs_saved"] == 6
+
+
+def test_best_fit_and_drain():
+    rec = Recorder()
+    placement = PlacementScheduler(4, rec.ensure, rec.remove, drain_grace=0)
+    for ue_id in range(1, 9):
+        placement.assign(ue_id)
+    placement.release(1)
+    for ue_id in range(5, 8):
+        placement.release(ue_id)
+    # upf-shared-0 a 3 UE, upf-shared-1 en a 1 : le nouvel UE va sur le plus rempli
+    assert placement.assign(20) == "upf-shared-0"
+    placement.release(8)
+    assert rec.removed == ["upf-shared-1"]
+    # Les numéros ne sont pas réutilisés
+    for ue_id in range(30, 32):
+        placement.assign(ue_id)
+    assert placement.upf_of(31) == "upf-shared-2"
+
+
+def test_grace_period_keeps_empty_upf_for_reuse():
+    rec = Recorder()
+    placement = PlacementScheduler(2, rec.ensure, rec.remove, drain_grace=60)
+    placement.assign(1)
+    placement.release(1)
+    assert placement.stats()["draining"] == ["upf-shared-0"]
+    assert placement.assign(2) == "upf-shared-0"
+    assert placement.stats()["draining"] == [] and rec.removed == []
+
+
+def test_concurrent_assign_creates_each_upf_once():
+    rec = Recorder()
+    placement = PlacementScheduler(10, rec.ensure, rec.remove)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        names = list(pool.map(placement.assign, range(1, 101)))
+    assert all(names)
+    assert sorted(rec.created) == sorted(set(rec.created)) and len(rec.created) == 10
+
+
+def test_failed_creation_and_restore():
+    rec = Recorder(fail={"upf-shared-0"})
+    placement = PlacementScheduler(2, rec.ensure, rec.remove)
+    assert placement.assign(1) is None
+    assert placement.upf_of(1) is None
+
+    restored = PlacementScheduler(2, rec.ensure, rec.remove)
+    restored.restore({1: "upf-shared-3", 2: "upf-shared-3", 3: "upf-ue3"})
+    assert restored.stats()["per_upf"] == {"upf-shared-3": 2}
+    assert restored.assign(4) == "upf-shared-4"
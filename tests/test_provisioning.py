@@ -0,0 +1,78 @@
+import os
+import threading
+
+os.environ.setdefault("DEMO_MODE", "1")
+
+from src.provisioning import BulkProvisioner
+
+
+def test_steps_run_in_order_per_ue():
+    calls = {}
+    lock = threading.Lock()
+
+    def step(name):
+        def fn(ue_id):
+            with lock:
+                calls.setdefault(ue_id, []).append(name)
+            return True
+        return fn
+
+    provisioner = BulkProvisioner([(n, step(n)) for n in ("config", "configmap", "pod", "upf")], concurrency=8)
+    report = provisioner.run(range(1, 21))
+
+    assert report["succeeded"] == 20 and report["failed"] == 0
+    assert all(seq == ["config", "configmap", "pod", "upf"] for seq in calls.values())
+
+
+def test_partial_failures_are_reported():
+    def configmap(ue_id):
+        if ue_id == 3:
+            raise RuntimeError("409 Conflict")
+        return ue_id != 5
+
+    pod_calls = []
+    provisioner = BulkProvisioner([("configmap", configmap), ("pod", pod_calls.append)], concurrency=4)
+    report = provisioner.run(range(1, 7))
+
+    assert report["failed"] == 2
+    failed = {r["ue_id"]: r for r in report["results"] if not r["ok"]}
+    assert failed[3]["failed_step"] == "configmap" and "409" in failed[3]["error"]
+    assert failed[5]["failed_step"] == "configmap"
+    # Pas de Pod pour un UE dont le ConfigMap a échoué
+    assert sorted(pod_calls) == [1, 2, 4, 6]
+
+
+def test_create_pods_accepts_range():
+    from src import main
+
+    client = main.app.test_client()
+    r = client.post("/create_pods", json={"start": 5, "count": 10, "concurrency": 4})
+    assert r.status_code == 200
+    assert r.json["requested"] == 10 and r.json["succeeded"] == 10
+    assert main.CONFIG_WRITER.wait_idle(5)
+    assert {f"ue{i}.yaml" for i in range(5, 15)} <= set(os.listdir(main.CONFIG_WRITER.conf_dir))
+
+    assert client.post("/create_pods", json={"start": 0}).status_code == 400
+
+
+def test_step_group_runs_in_parallel_and_reports_first_failure():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def waiting(ue_id):
+        # Bloquerait indéfiniment si les deux étapes du groupe étaient séquentielles
+        barrier.wait()
+        return True
+
+    def failing(ue_id):
+        barrier.wait()
+        raise RuntimeError("500 Internal Server Error")
+
+    ok = BulkProvisioner([("config", lambda ue_id: True), [("configmap", waiting), ("upf", waiting)]])
+    result = ok.provision_one(1)
+    assert result["ok"] and set(result["timings_ms"]) == {"config", "configmap", "upf"}
+
+    barrier.reset()
+    ko = BulkProvisioner([[("configmap", waiting), ("upf", failing)], ("pod", lambda ue_id: True)])
+    result = ko.provision_one(2)
+    assert not result["ok"] and result["failed_step"] == "upf"
+    assert "pod" not in result["timings_ms"]
@@ -0,0 +1,96 @@
+import pytest
+
+from src.k8s_gateway import KubeGateway
+from src.ratelimit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_burst_then_steady_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, burst=5, clock=clock)
+
+    assert all(bucket.try_acquire() for _ in range(5))
+    assert not bucket.try_acquire()
+    assert abs(bucket.retry_after() - 0.1) < 1e-9
+
+    clock.now = 0.25
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    # Le seau ne dépasse jamais sa capacité
+    clock.now = 100
+    assert bucket.stats()["available"] == 5
+
+
+def test_reserve_borrows_and_returns_wait():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=4, burst=1, clock=clock)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.25
+    assert bucket.reserve() == 0.5
+
+
+def test_unlimited_bucket():
+    bucket = TokenBucket(rate=0)
+    assert bucket.unlimited and all(bucket.try_acquire() for _ in range(1000))
+    assert bucket.acquire() == 0.0
+
+
+def test_gateway_calls_wait_for_tokens():
+    gw = KubeGateway()
+    gw.limiter = TokenBucket(rate=50, burst=1)
+
+    def read_namespaced_pod(**kwargs):
+        return "ok"
+
+    assert [gw.call(read_namespaced_pod, name="p") for _ in range(3)] == ["ok"] * 3
+    throttled = gw.stats()["throttled"]
+    assert throttled["count"] == 2 and throttled["wait_s"] >= 0.03
+
+
+def test_gateway_limits_writes_only():
+    gw = KubeGateway(write_qps=50, write_burst=1)
+
+    def read_namespaced_pod(**kwargs):
+        return "read"
+
+    def create_namespaced_pod(**kwargs):
+        return "created"
+
+    for _ in range(3):
+        gw.call(read_namespaced_pod, name="p")
+    assert gw.stats()["throttled"]["count"] == 0
+    for _ in range(3):
+        gw.call(create_namespaced_pod, body={})
+    assert gw.stats()["throttled"]["count"] == 2
+
+
+def test_gateway_retries_429_with_retry_after():
+    gw = KubeGateway(write_qps=0, retries_429=2)
+    attempts = []
+
+    class TooManyRequests(Exception):
+        status = 429
+        headers = {"Retry-After": "0.01"}
+
+    def patch_namespaced_deployment(**kwargs):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise TooManyRequests()
+        return "patched"
+
+    assert gw.call(patch_namespaced_deployment, name="d", body={}) == "patched"
+    assert len(attempts) == 3 and gw.stats()["retried_429"] == 2
+
+    attempts.clear()
+    gw.retries_429 = 1
+    with pytest.raises(TooManyRequests):
+        gw.call(patch_namespaced_deployment, name="d", body={})
+    assert len(attempts) == 2
@@ -0,0 +1,55 @@
+from src.reconcile import SPEC_HASH_ANNOTATION, apply, is_subset
+
+
+def configmap(data="a"):
+    return {"apiVersion": "v1", "kind": "ConfigMap", "metadata": {"name": "cm", "namespace": "nexslice"},
+            "data": {"ue.yaml": data}}
+
+
+def test_replayed_apply_writes_nothing(gateway):
+    assert apply(configmap()) == "created"
+    assert SPEC_HASH_ANNOTATION in gateway.get("ConfigMap", "cm")["metadata"]["annotations"]
+    gateway.calls.clear()
+    assert apply(configmap()) == "unchanged"
+    assert gateway.writes() == []
+
+
+def test_changed_spec_and_drift_are_patched(gateway):
+    apply(configmap())
+    assert apply(configmap("b")) == "patched"
+    gateway.kube.patch("ConfigMap", "nexslice", "cm", {"data": {"ue.yaml": "edited by hand"}})
+    assert apply(configmap("b")) == "patched"
+    assert gateway.get("ConfigMap", "cm")["data"]["ue.yaml"] == "b"
+
+
+def test_cached_absence_skips_read_and_conflict_is_resolved(gateway):
+    apply(configmap())
+    gateway.calls.clear()
+    # Cache périmé : l'objet existe déjà, le 409 mène à une comparaison
+    assert apply(configmap(), live=None, cached=True) == "unchanged"
+    assert gateway.writes() == [("create", "cm")]
+
+
+def test_conflict_then_deletion_retries_the_create(gateway):
+    apply(configmap())
+    # Objet supprimé juste après avoir provoqué un 409 (suppression concurrente)
+    gateway.kube.delete("ConfigMap", "nexslice", "cm")
+    gateway.fail("create_namespaced_config_map", 409)
+    gateway.calls.clear()
+    assert apply(configmap("b"), live=None, cached=True) == "created"
+    assert gateway.writes() == [("create", "cm"), ("create", "cm")]
+    assert gateway.get("ConfigMap", "cm")["data"]["ue.yaml"] == "b"
+
+
+def test_immutable_pod_is_replaced(gateway):
+    pod = {"apiVersion": "v1", "kind": "Pod", "metadata": {"name": "p"}, "spec": {"containers": [{"image": "a"}]}}
+    apply(pod)
+    gateway.fail("patch_namespaced_pod", 422)
+    pod["spec"]["containers"][0]["image"] = "b"
+    assert apply(pod) == "replaced"
+    assert gateway.get("Pod", "p")["spec"]["containers"][0]["image"] == "b"
+
+
+def test_is_subset_ignores_server_defaults():
+    assert is_subset({"ports": [{"port": 1}]}, {"ports": [{"port": 1, "protocol": "TCP"}], "status": {}})
+    assert not is_subset({"ports": [{"port": 1}]}, {"ports": [{"port": 2}]})
@@ -0,0 +1,103 @@
+import importlib.util
+import os
+import time
+
+import pytest
+
+from src import informer, k8s_gateway
+from src.backends.kubernetes import KubernetesBackend
+from src.backends.memory import MemoryBackend
+from src.k8s_gateway import KubeGateway
+from src.reconciler import Reconciler
+
+_spec = importlib.util.spec_from_file_location("fake_k8s", os.path.join(os.path.dirname(__file__), "..", "scripts", "fake_k8s.py"))
+fake_k8s = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(fake_k8s)
+
+KINDS = {"pod": ("Pod", "ueransim-ue{}", "ueransim-ue"), "configmap": ("ConfigMap", "ueransim-ue{}-config", "ueransim-ue"),
+         "deployment": ("Deployment", "upf-ue{}", "upf"), "service": ("Service", "upf-ue{}", "upf")}
+
+
+@pytest.fixture
+def kube(monkeypatch):
+    fake = fake_k8s.FakeKube(seed=1)
+    server = fake.serve()
+    gw = KubeGateway(host=f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(k8s_gateway, "_gateway", gw)
+    monkeypatch.setattr(informer, "LIST_PAGE_SIZE", 2)
+    yield fake
+    server.shutdown()
+
+
+def seed(kube, ue_id, kinds=tuple(KINDS)):
+    for kind in kinds:
+        api_kind, name, app = KINDS[kind]
+        kube.create(api_kind, "nexslice", {"metadata": {"name": name.format(ue_id),
+                                                        "labels": {"app": app, "ue-id": str(ue_id)}}})
+
+
+def names(kube, api_kind):
+    return sorted(name for _, name in kube.objects[api_kind])
+
+
+def test_startup_pass_repairs_deletes_orphans_and_adopts(kube):
+    old = time.time() - 3600
+    seed(kube, 1)                                   # complet et voulu
+    seed(kube, 2, ("configmap", "deployment"))      # voulu, création interrompue
+    seed(kube, 3, ("deployment",))                  # UPF orphelin
+    seed(kube, 4)                                   # complet mais absent de la base
+    seed(kube, 6, ("pod",))                         # voulu mais modifié à l'instant
+    kube.create("Pod", "nexslice", {"metadata": {"name": "ueransim-group-0", "labels": {"app": "ueransim-ue"}}})
+    desired = {1: old, 2: old, 5: old, 6: time.time()}
+    repaired, adopted = {}, []
+
+    def repair(ue_id, missing):
+        repaired[ue_id] = missing
+        seed(kube, ue_id, missing)
+
+    r = Reconciler(list(KINDS), lambda: desired, repair, adopted.extend, busy=lambda ue_id: ue_id == 5, grace=60,
+                   backend=KubernetesBackend())
+    report = r.run_once(startup=True)
+
+    assert repaired == {2: ["pod", "service"]}
+    assert adopted == [4]
+    assert names(kube, "Deployment") == ["upf-ue1", "upf-ue2", "upf-ue4"]
+    # Les objets sans label ue-id (Pod de groupe) ne sont jamais touchés
+    assert "ueransim-group-0" in names(kube, "Pod")
+    assert report["deleted"] == 1 and report["repaired"] == 1 and report["adopted"] == 1 and not report["errors"]
+    # Pages de 2 objets : 3 Pods, 3 ConfigMaps, 4 Deployments, 2 Services
+    assert report["list_pages"] == 7
+
+    # Balayage suivant : un UE complet inconnu de la base est supprimé, plus réintégré
+    seed(kube, 7)
+    report = r.run_once()
+    assert report["deleted"] == 8 and adopted == [4]
+    assert names(kube, "Service") == ["upf-ue1", "upf-ue2"]
+
+
+def test_orphans_swept_from_the_memory_backend():
+    backend = MemoryBackend()
+    for ue_id in (1, 2):
+        backend.apply({"apiVersion": "v1", "kind": "Pod",
+                       "metadata": {"name": f"ueransim-ue{ue_id}", "labels": {"app": "ueransim-ue", "ue-id": str(ue_id)}}})
+    r = Reconciler(["pod"], lambda: {1: 0}, lambda ue_id, missing: True, lambda ue_ids: None, backend=backend)
+
+    report = r.run_once()
+
+    assert report["deleted"] == 1 and report["list_pages"] == 1
+    assert sorted(backend.objects["Pod"]) == ["ueransim-ue1"]
+
+
+def test_objects_of_the_ueattachment_operator_are_left_alone():
+    backend = MemoryBackend()
+    owner = {"apiVersion": "nexslice.io/v1", "kind": "UEAttachment", "name": "ue9", "uid": "1234"}
+    for kind, name, app in (("Pod", "ueransim-ue9", "ueransim-ue"), ("Deployment", "upf-ue9", "upf")):
+        backend.apply({"apiVersion": "v1", "kind": kind,
+                       "metadata": {"name": name, "labels": {"app": app, "ue-id": "9"}, "ownerReferences": [owner]}})
+    adopted = []
+    r = Reconciler(["pod", "deployment"], dict, lambda ue_id, missing: True, adopted.extend, backend=backend)
+
+    assert r.run_once(startup=True)["observed_ues"] == 0 and adopted == []
+    report = r.run_once()
+    assert report["deleted"] == 0
+    assert sorted(backend.objects["Pod"]) == ["ueransim-ue9"] and sorted(backend.objects["Deployment"]) == ["upf-ue9"]
@@ -0,0 +1,60 @@
+import os
+
+import yaml
+
+from src.renderer import ConfigWriter, render_ue_config, render_ue_configmap, render_ue_pod, render_upf
+
+
+def test_ue_config_fields():
+    config = yaml.safe_load(render_ue_config(42))
+    assert config["supi"] == "imsi-208950000000042"
+    assert config["imei"] == "000000000000042" and config["imeiSv"] == "0000000000000042"
+    assert config["sessions"][0]["apn"] == "oai-ue42"
+    assert render_ue_config(42).count("sd: 000042\n") == 3
+    assert render_ue_config(42).startswith("# UE Configuration for ue42\n")
+
+
+def test_manifests_do_not_share_per_ue_parts():
+    pod1, pod2 = render_ue_pod(1, "img"), render_ue_pod(2, "img")
+    assert pod1["metadata"]["labels"] == {"app": "ueransim-ue", "ue-id": "1"}
+    assert pod2["spec"]["volumes"][0]["configMap"]["name"] == "ueransim-ue2-config"
+    pod1["metadata"]["labels"]["extra"] = "x"
+    assert "extra" not in render_ue_pod(1, "img")["metadata"]["labels"]
+
+    configmap = render_ue_configmap(3)
+    assert configmap["data"]["ue.yaml"] == render_ue_config(3)
+    assert render_ue_configmap(3, "payload")["data"]["ue.yaml"] == "payload"
+
+    deployment, service = render_upf("upf-ue4", {"app": "upf", "ue-id": "4"}, "upf-img", 2)
+    assert deployment["spec"]["replicas"] == 2
+    assert deployment["spec"]["template"]["spec"]["containers"][0]["image"] == "upf-img"
+    assert service["spec"]["selector"] == {"app": "upf", "ue-id": "4"}
+
+
+def test_config_writer_batches_and_discards(tmp_path):
+    writer = ConfigWriter(str(tmp_path / "confs"), interval=60)
+    writer.write(1, "a")
+    writer.write(2, "b")
+    writer.write(1, "a2")
+    writer.discard(2)
+    assert writer.flush() == 1
+    assert writer.wait_idle(0)
+    assert os.listdir(tmp_path / "confs") == ["ue1.yaml"]
+    assert (tmp_path / "confs" / "ue1.yaml").read_text() == "a2"
+
+
+def test_config_writer_resolves_conf_dir_at_creation(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    writer = ConfigWriter("confs", interval=0)
+    (tmp_path / "elsewhere").mkdir()
+    monkeypatch.chdir(tmp_path / "elsewhere")
+    writer.write(1, "a")
+    assert writer.wait_idle(5)
+    assert os.listdir(tmp_path / "confs") == ["ue1.yaml"] and os.listdir(tmp_path / "elsewhere") == []
+
+
+def test_config_writer_disabled(tmp_path):
+    writer = ConfigWriter(str(tmp_path / "confs"), enabled=False)
+    writer.write(1, "a")
+    assert writer.flush() == 0
+    assert not (tmp_path / "confs").exists()
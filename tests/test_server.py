@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip("gunicorn")
+
+from src import server
+
+
+def test_stateful_features_limit_to_one_worker(monkeypatch):
+    monkeypatch.delenv("WARM_POOL_SIZE", raising=False)
+    monkeypatch.delenv("UPF_MAX_UES_PER_UPF", raising=False)
+    assert server.effective_workers(4) == 4
+    monkeypatch.setenv("UPF_MAX_UES_PER_UPF", "10")
+    assert server.effective_workers(4) == 1
+
+
+def test_prepare_multiprocess_resets_metrics_dir(monkeypatch, tmp_path):
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    stale = tmp_path / "prometheus-multiproc" / "counter_123.db"
+    stale.parent.mkdir()
+    stale.write_text("")
+    server.prepare_multiprocess(str(tmp_path))
+    assert not stale.exists()
+    assert server.os.environ["PROMETHEUS_MULTIPROC_DIR"] == str(tmp_path / "prometheus-multiproc")
@@ -0,0 +1,125 @@
+import importlib.util
+import os
+import time
+
+import pytest
+
+from src import smf_notifier
+from src.smf_notifier import SMFNotifier
+from src.state_store import StateStore
+
+_spec = importlib.util.spec_from_file_location("stub_smf", os.path.join(os.path.dirname(__file__), "..", "scripts", "stub_smf.py"))
+stub_smf = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(stub_smf)
+
+
+def payload(ue_id):
+    return {"dnn": f"oai-ue{ue_id}", "upf_fqdn": f"upf-ue{ue_id}.nexslice.svc.cluster.local"}
+
+
+@pytest.fixture
+def smf():
+    stub = stub_smf.StubSMF()
+    server = stub.serve()
+    stub.base = f"http://127.0.0.1:{server.server_address[1]}/api/dnn"
+    yield stub
+    server.shutdown()
+
+
+def make_notifier(smf, tmp_path, batch=False):
+    return SMFNotifier(register_url=f"{smf.base}/register", unregister_url=f"{smf.base}/unregister",
+                       batch_url=f"{smf.base}/register/batch" if batch else "",
+                       store=StateStore(str(tmp_path / "state.db")))
+
+
+def test_register_and_unregister(smf, tmp_path):
+    notifier = make_notifier(smf, tmp_path)
+    assert notifier.notify("register", payload(1), wait=5)
+    assert smf.registrations == {"oai-ue1": "upf-ue1.nexslice.svc.cluster.local"}
+    assert notifier.notify("unregister", {"dnn": "oai-ue1"}, wait=5)
+    assert smf.registrations == {} and notifier.depth() == 0
+
+
+def test_registrations_are_batched(smf, tmp_path):
+    notifier = make_notifier(smf, tmp_path, batch=True)
+    for i in range(1, 11):
+        notifier.enqueue("register", payload(i))
+    while notifier.depth():
+        notifier.flush()
+    assert len(smf.registrations) == 10
+    assert smf.requests < 10
+
+
+def test_batch_falls_back_when_unsupported(smf, tmp_path):
+    smf.batch = False
+    notifier = make_notifier(smf, tmp_path, batch=True)
+    notifier.enqueue("register", payload(1))
+    notifier.enqueue("register", payload(2))
+    notifier.flush()
+    assert not notifier.batch_supported
+    assert len(smf.registrations) == 2 and notifier.depth() == 0
+
+
+def test_failed_notifications_survive_restart_and_are_retried(smf, tmp_path, monkeypatch):
+    monkeypatch.setattr(smf_notifier, "SMF_RETRY_BASE", 0.0)
+    smf.fail_rate = 1.0
+    notifier = make_notifier(smf, tmp_path)
+    notifier.enqueue("register", payload(1))
+    notifier.enqueue("register", payload(2))
+    notifier.enqueue("unregister", {"dnn": "oai-ue2"})  # annule l'enregistrement de l'UE 2
+    notifier.flush()
+    assert [e["payload"]["dnn"] for e in notifier.pending()] == ["oai-ue1", "oai-ue2"]
+    assert notifier.pending()[0]["attempts"] >= 1
+
+    # Arrêt du premier contrôleur (son thread d'envoi a démarré au premier enqueue)
+    notifier.stop()
+    smf.fail_rate = 0.0
+    restarted = make_notifier(smf, tmp_path)
+    assert restarted.depth() == 2
+    restarted.flush()
+    assert restarted.depth() == 0
+    assert smf.registrations == {"oai-ue1": "upf-ue1.nexslice.svc.cluster.local"}
+
+
+def test_backoff_is_capped_after_many_attempts(smf, tmp_path, monkeypatch):
+    monkeypatch.setattr(SMFNotifier, "start", lambda self: None)
+    notifier = make_notifier(smf, tmp_path)
+    notifier.enqueue("register", payload(1))
+    notifier._outbox["register:oai-ue1"]["attempts"] = 5000
+    before = time.time()
+    notifier._reschedule(["register:oai-ue1"], "SMF injoignable")
+    entry = notifier.pending()[0]
+    assert entry["attempts"] == 5001
+    assert before <= entry["next_attempt_at"] <= time.time() + smf_notifier.SMF_RETRY_MAX
+
+
+def test_adopt_orphans_takes_over_notifications_of_dead_workers(smf, tmp_path):
+    import subprocess
+    import sys
+
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    store = StateStore(str(tmp_path / "state.db"))
+    entry = {"op": "register", "payload": payload(7), "attempts": 1, "created_at": 0}
+    store.put_outbox(dead.pid, {"register:oai-ue7": entry})
+    store.put_outbox(os.getppid(), {"register:oai-ue8": {**entry, "payload": payload(8)}})
+
+    notifier = make_notifier(smf, tmp_path)
+    assert notifier.depth() == 0
+    assert notifier.adopt_orphans() == 1 and notifier.adopt_orphans() == 0
+    assert [e["payload"]["dnn"] for e in notifier.pending()] == ["oai-ue7"]
+    # Les notifications d'un worker vivant ne sont pas touchées
+    assert sorted(store.outbox_owners()) == sorted({os.getpid(), os.getppid()})
+
+
+def test_outbox_rows_are_written_incrementally(smf, tmp_path, monkeypatch):
+    monkeypatch.setattr(SMFNotifier, "start", lambda self: None)
+    notifier = make_notifier(smf, tmp_path)
+
+    writes = []
+    monkeypatch.setattr(notifier.store, "put_outbox",
+                        lambda owner, entries, removed=(): writes.append((sorted(entries), list(removed))))
+    notifier.enqueue("register", payload(2))
+    notifier.enqueue("unregister", {"dnn": "oai-ue2"})
+    # Une ligne écrite par notification, sans réécrire le reste de l'outbox
+    assert writes == [(["register:oai-ue2"], []), (["unregister:oai-ue2"], ["register:oai-ue2"])]
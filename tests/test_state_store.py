@@ -0,0 +1,95 @@
+import os
+import threading
+
+os.environ.setdefault("DEMO_MODE", "1")
+
+from src.state_store import StateStore
+from src.ue_registry import UERegistry
+
+
+def test_batch_writes_and_indexed_queries(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"))
+    store.upsert_many({ue_id: {"dnn": f"oai-ue{ue_id}", "sd": f"{ue_id:06d}"} for ue_id in range(1, 6)})
+    store.update_many({1: {"phase": "provisioned", "upf": "upf-ue1"}, 2: {"phase": "failed", "error": "pod: boom"},
+                       3: {"smf_status": "pending", "unknown": "ignoré"}})
+
+    assert store.count() == 5
+    assert store.ids(phase="configured") == [3, 4, 5]
+    assert store.ids(smf_status="pending") == [3]
+    assert store.count_by("phase") == {"configured": 3, "provisioned": 1, "failed": 1}
+    record = store.get(1)
+    assert record["upf"] == "upf-ue1" and record["dnn"] == "oai-ue1" and record["updated_at"] >= record["created_at"]
+
+    # Un upsert partiel conserve les autres champs
+    store.upsert(1, sd="000042")
+    assert store.get(1)["upf"] == "upf-ue1" and store.get(1)["sd"] == "000042"
+    store.delete_many([1, 2])
+    assert store.get(1) is None and store.ids() == [3, 4, 5]
+
+
+def test_transaction_rolls_back_on_error(tmp_path):
+    store = StateStore(str(tmp_path / "state.db"))
+    try:
+        with store.transaction() as conn:
+            conn.execute("INSERT INTO ues (ue_id, created_at, updated_at) VALUES (1, 0, 0)")
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert store.count() == 0
+
+
+def test_concurrent_writers_share_the_database(tmp_path):
+    path = str(tmp_path / "state.db")
+    # Deux processus simulés par deux instances (connexions distinctes)
+    stores = [StateStore(path), StateStore(path)]
+    threads = [threading.Thread(target=lambda n=n: [stores[n % 2].upsert(ue_id, phase="configured")
+                                                    for ue_id in range(n * 100 + 1, n * 100 + 101)])
+               for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert stores[0].count() == 400 and stores[1].ids()[:3] == [1, 2, 3]
+
+
+def test_registry_imports_yaml_once_and_writes_through(tmp_path):
+    confs = tmp_path / "confs"
+    confs.mkdir()
+    for name in ("ue1.yaml", "ue4.yaml"):
+        (confs / name).write_text("")
+    store = StateStore(str(tmp_path / "state.db"))
+    registry = UERegistry(str(confs), store=store)
+    assert registry.list() == [1, 4] and store.ids() == [1, 4]
+
+    registry.add(7, dnn="oai-ue7")
+    registry.remove_many([1, 4])
+    assert store.ids() == [7] and store.get(7)["dnn"] == "oai-ue7"
+
+    # Redémarrage : l'index vient de la base, le répertoire n'est plus relu
+    (confs / "ue9.yaml").write_text("")
+    assert UERegistry(str(confs), store=StateStore(str(tmp_path / "state.db"))).list() == [7]
+
+
+def test_registries_of_two_workers_resync_from_the_store(tmp_path):
+    from src.changefeed import ChangeFeed
+
+    path = str(tmp_path / "state.db")
+    feed = ChangeFeed()
+    worker1 = UERegistry(str(tmp_path), store=StateStore(path), feed=feed)
+    worker2 = UERegistry(str(tmp_path), store=StateStore(path))
+    worker1.add_many({1: {}, 2: {}, 3: {}})
+    assert worker2.count() == 3 and worker2.phase_counts() == {"configured": 3}
+
+    # Ses propres écritures ne déclenchent pas de rechargement
+    assert not worker1.sync()
+    worker2.add(10)
+    worker2.remove(1)
+    worker2.update_many({2: {"phase": "provisioned"}})
+    assert worker2.phase_counts() == {"configured": 2, "provisioned": 1} and not worker2.sync()
+
+    version = feed.version
+    assert worker1.count() == 3 and worker1.sync()
+    assert worker1.list() == [2, 3, 10] and worker1.max_id() == 10
+    assert worker1.phase_counts() == {"configured": 2, "provisioned": 1}
+    # Le rechargement avance la version (ETag, flux SSE)
+    assert feed.version > version and not worker1.sync()
@@ -0,0 +1,44 @@
+import os
+
+os.environ.setdefault("DEMO_MODE", "1")
+
+import pytest
+
+from src.teardown import bulk_teardown, label_selectors
+
+
+@pytest.fixture
+def cluster(gateway):
+    for i in range(1, 251):
+        labels = {"app": "ueransim-ue", "ue-id": str(i)}
+        gateway.add({"kind": "Pod", "metadata": {"name": f"ueransim-ue{i}", "labels": labels}},
+                    {"kind": "ConfigMap", "metadata": {"name": f"ueransim-ue{i}-config", "labels": labels}})
+        labels = {"app": "upf", "ue-id": str(i)}
+        gateway.add({"kind": "Deployment", "metadata": {"name": f"upf-ue{i}", "labels": labels}},
+                    {"kind": "Service", "metadata": {"name": f"upf-ue{i}", "labels": labels}})
+    return gateway
+
+
+def test_label_selectors_are_chunked():
+    assert label_selectors("app=upf") == ["app=upf"]
+    selectors = label_selectors("app=upf", range(1, 6), chunk=2)
+    assert selectors == ["app=upf,ue-id in (1,2)", "app=upf,ue-id in (3,4)", "app=upf,ue-id in (5)"]
+
+
+def test_range_teardown_uses_collection_calls(cluster, tmp_path):
+    for i in (1, 2, 150, 300):
+        (tmp_path / f"ue{i}.yaml").write_text("")
+    report = bulk_teardown(str(tmp_path), lo=101, hi=200)
+
+    assert {k: len(v) for k, v in report["removed"].items()} == {
+        "pods": 100, "configmaps": 100, "deployments": 100, "services": 100}
+    assert report["api_calls"] == 8 and report["errors"] == []
+    assert report["local_configs"] == [150]
+    assert cluster.count("Pod") == 150
+
+
+def test_full_teardown(cluster, tmp_path):
+    report = bulk_teardown(str(tmp_path))
+    assert len(report["removed"]["deployments"]) == 250
+    assert report["api_calls"] == 8
+    assert all(cluster.count(kind) == 0 for kind in ("Pod", "ConfigMap", "Deployment", "Service"))
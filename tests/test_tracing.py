@@ -0,0 +1,70 @@
+import os
+import time
+
+os.environ.setdefault("DEMO_MODE", "1")
+
+import pytest
+
+from src.tracing import STAGE_SECONDS, Tracer
+
+
+def test_spans_feed_timeline_and_histogram():
+    tracer = Tracer(max_ues=2)
+    histogram = STAGE_SECONDS.labels(stage="pod_create")
+    before = (histogram._sum.get(), sum(bucket.get() for bucket in histogram._buckets))
+    tracer.begin(1)
+    with tracer.span(1, "pod_create"):
+        pass
+    with pytest.raises(RuntimeError):
+        with tracer.span(1, "service_create"):
+            raise RuntimeError("409")
+    tracer.mark_upf_ready(1)
+    tracer.mark_upf_ready(1)
+
+    trace = tracer.get(1)
+    assert [s["stage"] for s in trace["spans"]] == ["pod_create", "service_create", "upf_ready"]
+    assert trace["spans"][1]["error"] == "409" and trace["upf_ready_ms"] is not None
+    # Une observation de plus, de la durée de l'étape
+    assert sum(bucket.get() for bucket in histogram._buckets) - before[1] == 1
+    assert histogram._sum.get() - before[0] == pytest.approx(trace["spans"][0]["duration_ms"] / 1000, abs=1e-6)
+
+    events = tracer.chrome_trace()["traceEvents"]
+    assert {e["name"] for e in events if e["ph"] == "X"} == {"pod_create", "service_create", "upf_ready"}
+
+    # Seules les max_ues chronologies les plus récentes sont conservées
+    tracer.begin(2)
+    tracer.begin(3)
+    assert tracer.get(1) is None and tracer.get(3) is not None
+    # Y compris pour les étapes enregistrées sans begin()
+    for ue_id in range(10, 20):
+        tracer.record(ue_id, "pod_create", 0, 0)
+    assert [u for u in (3, 17, 18, 19) if tracer.get(u) is not None] == [18, 19]
+
+
+def test_trace_endpoints(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from src import main
+
+    client = main.app.test_client()
+    client.post("/create_pods", json={"start": 300, "count": 2})
+    trace = client.get("/api/traces/300").json
+    assert trace["spans"][0]["stage"] == "config_render"
+    chrome = client.get("/api/traces/chrome?ue_id=300,301").json
+    assert {e["tid"] for e in chrome["traceEvents"]} == {300, 301}
+    assert client.get("/api/traces/999999").status_code == 404
+    assert b"nexslice_stage_duration_seconds_bucket" in client.get("/metrics").data
+
+
+def test_connect_trace_starts_when_the_job_runs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from src import main
+
+    monkeypatch.setattr(main, "UE_DEBOUNCE_WINDOW", 0.2)
+    client = main.app.test_client()
+    job = main.JOB_QUEUE.get(client.post("/api/ue-connect", json={"ue_id": 320}).json["job_id"])
+    deadline = time.time() + 5
+    while job.finished_at is None and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.status == "succeeded"
+    # La fenêtre d'anti-rebond n'est pas comptée dans la chronologie
+    assert client.get("/api/traces/320").json["started_at"] >= job.started_at
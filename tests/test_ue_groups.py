@@ -0,0 +1,43 @@
+import os
+
+os.environ.setdefault("DEMO_MODE", "1")
+
+from src import main
+from src.backends.dryrun import DryRunBackend
+from src.configmap_shards import ShardedConfigMaps
+from src.ue_registry import UERegistry
+
+
+def _group_mode(monkeypatch, tmp_path):
+    backend = DryRunBackend(verbose=False)
+    monkeypatch.setattr(main, "BACKEND", backend)
+    monkeypatch.setattr(main, "UE_GROUPS_ENABLED", True)
+    monkeypatch.setattr(main, "UE_GROUP_SIZE", 4)
+    monkeypatch.setattr(main, "CONFIGMAP_SHARDS", ShardedConfigMaps(4, prefix="ueransim-group-"))
+    monkeypatch.setattr(main, "UE_REGISTRY", UERegistry(str(tmp_path)))
+    return backend
+
+
+def test_ues_share_their_group_pod(monkeypatch, tmp_path):
+    backend = _group_mode(monkeypatch, tmp_path)
+    assert main.create_ue_pod(5) and main.create_ue_pod(6)
+    # Le second UE retrouve le Pod du groupe inchangé
+    assert backend.planned() == [{"verb": "create", "kind": "Pod", "name": "ueransim-group-1"}]
+    pod = backend.objects["Pod"]["ueransim-group-1"]
+    assert pod["metadata"]["labels"] == {"app": "ueransim-ue", "ue-group": "1"}
+    assert pod["spec"]["volumes"][0]["configMap"] == {"name": "ueransim-group-1"}
+    assert "nr-ue" in pod["spec"]["containers"][0]["command"][-1]
+
+
+def test_group_pod_deleted_only_when_empty(monkeypatch, tmp_path):
+    backend = _group_mode(monkeypatch, tmp_path)
+    for ue_id in (5, 6, 9):
+        main.UE_REGISTRY.add(ue_id)
+
+    main.UE_REGISTRY.remove(5)
+    assert main.delete_ue_pod(5)
+    assert backend.planned() == []
+
+    main.UE_REGISTRY.remove(6)
+    assert main.delete_ue_pod(6)
+    assert backend.planned() == [{"verb": "delete", "kind": "Pod", "name": "ueransim-group-1"}]
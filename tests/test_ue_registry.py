@@ -0,0 +1,21 @@
+from src.ue_registry import UERegistry
+
+
+def test_registry_loads_directory_once_and_tracks_changes(tmp_path):
+    for name in ("ue3.yaml", "ue1.yaml", "ue10.yaml", "notes.txt", "ue2.yaml.bak"):
+        (tmp_path / name).write_text("")
+    registry = UERegistry(str(tmp_path))
+
+    assert registry.list() == [1, 3, 10]
+    assert registry.count() == 3 and registry.max_id() == 10
+
+    # Les requêtes suivantes ne relisent pas le répertoire
+    (tmp_path / "ue42.yaml").write_text("")
+    assert 42 not in registry
+
+    assert registry.add(5) and not registry.add(5)
+    assert registry.remove(10) and not registry.remove(10)
+    assert registry.list() == [1, 3, 5]
+    assert registry.list(offset=1, limit=1) == [3]
+    assert registry.max_id() == 5
+
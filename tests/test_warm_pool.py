@@ -0,0 +1,58 @@
+import os
+
+os.environ.setdefault("DEMO_MODE", "1")
+
+from src.main import make_upf_deployment_and_service
+from src.warm_pool import WarmPool
+
+
+def ready(deployment):
+    return {**deployment, "status": {"readyReplicas": 1}}
+
+
+def test_refill_then_claim_relabels_without_new_pod(gateway):
+    pool = WarmPool(make_upf_deployment_and_service, size=2, image="upf:test")
+    pool.informer.synced.set()
+
+    assert pool.refill() == 2
+    created = [kw["body"] for verb, kw in gateway.calls if verb == "create_namespaced_deployment"]
+    assert len(created) == 2 and all(d["metadata"]["labels"]["app"] == "upf-pool" for d in created)
+
+    # Aucun UPF prêt : miss, l'appelant crée l'UPF à froid
+    assert pool.claim(1) is None
+
+    pool.informer.apply_event("MODIFIED", ready(created[0]))
+    gateway.calls.clear()
+    name = pool.claim(1)
+
+    assert name == created[0]["metadata"]["name"]
+    verbs = [verb for verb, _ in gateway.calls]
+    assert verbs == ["patch_namespaced_deployment", "create_namespaced_service"]
+    patch = gateway.calls[0][1]["body"]["metadata"]["labels"]
+    assert patch["app"] == "upf" and patch["ue-id"] == "1"
+    service = gateway.calls[1][1]["body"]
+    assert service["metadata"]["name"] == "upf-ue1"
+    assert service["spec"]["selector"] == {"pool-id": created[0]["metadata"]["labels"]["pool-id"]}
+
+    # L'UPF attribué ne compte plus dans le pool
+    assert pool.stats()["idle"] == 1
+    assert pool.claim(2) is None
+
+
+def test_repaired_service_of_a_claimed_upf_selects_its_pool_id(monkeypatch):
+    from src import main
+    from src.backends.memory import MemoryBackend
+
+    backend = MemoryBackend()
+    monkeypatch.setattr(main, "BACKEND", backend)
+    claimed, _ = make_upf_deployment_and_service("upf-pool-abc", {"app": "upf", "pool-id": "abc"}, "upf:test", 1)
+    claimed["metadata"]["labels"] = {"app": "upf", "ue-id": "7", "pool-id": "abc"}
+    backend.apply(claimed)
+    cold, _ = make_upf_deployment_and_service("upf-ue8", {"app": "upf", "ue-id": "8"}, "upf:test", 1)
+    backend.apply(cold)
+
+    assert main.create_upf_service(7) and main.create_upf_service(8)
+    services = backend.objects["Service"]
+    assert services["upf-ue7"]["spec"]["selector"] == {"pool-id": "abc"}
+    assert services["upf-ue7"]["metadata"]["labels"] == {"app": "upf", "ue-id": "7"}
+    assert services["upf-ue8"]["spec"]["selector"] == {"app": "upf", "ue-id": "8"}